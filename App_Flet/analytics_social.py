@@ -0,0 +1,137 @@
+"""Análises detalhadas das inscrições com NumPy.
+
+load_columns() lê numa única consulta, direto num array NumPy tipado, as colunas de renda,
+família e despesas e os códigos de escolaridade e situação de moradia; compute_analytics() calcula
+sobre esses arrays, de forma vetorizada, medianas, percentis, renda per capita, comprometimento da renda com despesas e
+histogramas de renda per capita por escolaridade e por moradia.
+"""
+
+import numpy as np
+
+# As categorias são as mesmas opções do formulário de inscrição
+from app_social import ESCOLARIDADES, SITUACOES_MORADIA
+
+# Rótulos curtos das categorias, na ordem das listas, para o eixo dos gráficos
+ESCOLARIDADES_CURTAS = ["Sem", "EF-I", "EF-C", "EM-I", "EM-C", "ES-I", "ES-C", "Pós"]
+SITUACOES_MORADIA_CURTAS = ["Própria", "Alugada", "Cedida", "Ocupação", "Rua", "Outro"]
+
+# Valores fora das listas (dados importados, por exemplo) caem nesta categoria
+OUTRA_CATEGORIA = "Não informado"
+
+PERCENTIS = (10, 25, 50, 75, 90)
+
+# Limites (R$ por pessoa) das faixas de renda per capita dos histogramas
+FAIXAS_PER_CAPITA = (218, 500, 1000, 2000)
+FAIXAS_PER_CAPITA_ROTULOS = ["Até R$ 218", "R$ 218-500", "R$ 500-1.000", "R$ 1.000-2.000", "Acima de R$ 2.000"]
+
+# Tipos das colunas de load_columns(): os códigos de categoria já chegam como inteiros
+COLUMNS_DTYPE = np.dtype([
+    ('renda', np.float64),
+    ('membros', np.float64),
+    ('despesas', np.float64),
+    ('escolaridade', np.intp),
+    ('moradia', np.intp)
+])
+
+# Separação entre categorias na chave de ordenação das medianas; rendas per capita acima
+# disso são limitadas a esse teto só nessa ordenação
+CATEGORY_STRIDE = 1e7
+
+def category_case(column, values):
+    """Expressão SQL que troca o texto da categoria pelo seu índice na lista"""
+    whens = ' '.join('WHEN ? THEN ?' for _ in values)
+    params = []
+    for code, value in enumerate(values):
+        params.extend([value, code])
+    return f'CASE {column} {whens} ELSE {len(values)} END', params
+
+def load_columns(conn):
+    """Lê as colunas das análises num único array tipado, sem listas de tuplas intermediárias"""
+    escolaridade_sql, escolaridade_params = category_case('escolaridade', ESCOLARIDADES)
+    moradia_sql, moradia_params = category_case('situacao_moradia', SITUACOES_MORADIA)
+    cursor = conn.execute(
+        f'SELECT renda_familiar, membros_familia, despesas_mensais, {escolaridade_sql}, {moradia_sql} '
+        'FROM inscricoes',
+        escolaridade_params + moradia_params
+    )
+    # Cada linha do cursor é gravada direto no registro do array, já convertida para o tipo do campo
+    rows = np.fromiter(cursor, dtype=COLUMNS_DTYPE)
+    return {name: rows[name] for name in COLUMNS_DTYPE.names}
+
+def sorted_percentiles(sorted_values, percents):
+    """Percentis (interpolação linear, como np.percentile) de um array já ordenado"""
+    positions = np.asarray(percents, dtype=np.float64) / 100 * (sorted_values.size - 1)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.ceil(positions).astype(np.intp)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (positions - lower)
+
+def describe(values):
+    """Média e percentis (a mediana é o percentil 50), ignorando valores indefinidos"""
+    # Uma ordenação serve para todos os percentis
+    values = np.sort(values[~np.isnan(values)])
+    if not values.size:
+        return {'media': 0.0, 'mediana': 0.0, 'percentis': {p: 0.0 for p in PERCENTIS}}
+    percentis = sorted_percentiles(values, PERCENTIS)
+    return {
+        'media': float(values.mean()),
+        'mediana': float(sorted_percentiles(values, [50])[0]),
+        'percentis': {p: float(v) for p, v in zip(PERCENTIS, percentis)}
+    }
+
+def by_category(codes, labels, per_capita, faixas, valid):
+    """Total, mediana per capita e histograma de faixas de cada categoria"""
+    labels = labels + [OUTRA_CATEGORIA]
+    n_faixas = len(FAIXAS_PER_CAPITA) + 1
+    totals = np.bincount(codes, minlength=len(labels))
+    valid_codes = codes[valid]
+    # Histograma 2D (categoria x faixa) numa única contagem
+    histograms = np.bincount(
+        valid_codes * n_faixas + faixas[valid], minlength=len(labels) * n_faixas
+    ).reshape(len(labels), n_faixas)
+
+    # Medianas por categoria com uma única ordenação: a chave categoria * CATEGORY_STRIDE + valor
+    # agrupa as categorias em sequência, cada uma já ordenada pela renda per capita
+    values = per_capita[valid]
+    keys = np.sort(valid_codes * CATEGORY_STRIDE + np.clip(values, 0, CATEGORY_STRIDE - 1))
+    counts = np.bincount(valid_codes, minlength=len(labels))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    result = []
+    for code, label in enumerate(labels):
+        if code == len(labels) - 1 and not totals[code]:
+            continue
+        n = counts[code]
+        if n:
+            group = keys[starts[code]:starts[code] + n] - code * CATEGORY_STRIDE
+            mediana = float(sorted_percentiles(group, [50])[0])
+        else:
+            mediana = 0.0
+        result.append({
+            'categoria': label,
+            'total': int(totals[code]),
+            'mediana_per_capita': mediana,
+            'histograma': histograms[code].tolist()
+        })
+    return result
+
+def compute_analytics(columns):
+    """Calcula todas as análises a partir dos arrays de load_columns()"""
+    renda = columns['renda']
+    membros = columns['membros']
+    despesas = columns['despesas']
+
+    per_capita = renda / np.where(membros > 0, membros, np.nan)
+    comprometimento = despesas / np.where(renda > 0, renda, np.nan)
+    valid = ~np.isnan(per_capita)
+    faixas = np.searchsorted(FAIXAS_PER_CAPITA, np.where(valid, per_capita, 0), side='right')
+
+    return {
+        'total': int(renda.size),
+        'renda': describe(renda),
+        'renda_per_capita': describe(per_capita),
+        'comprometimento': describe(comprometimento),
+        'faixas_per_capita': FAIXAS_PER_CAPITA_ROTULOS,
+        'histograma_per_capita': np.bincount(faixas[valid], minlength=len(FAIXAS_PER_CAPITA) + 1).tolist(),
+        'por_escolaridade': by_category(columns['escolaridade'], ESCOLARIDADES, per_capita, faixas, valid),
+        'por_moradia': by_category(columns['moradia'], SITUACOES_MORADIA, per_capita, faixas, valid)
+    }
@@ -2,13 +2,2643 @@ import flet as ft
 import sqlite3
 import hashlib
 import json
-from datetime import datetime
+import csv
+import re
+import random
+from datetime import datetime, timedelta, timezone
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors as pdf_colors
+import io
+import threading
+import asyncio
+import queue
+import time
+import logging
+import bisect
+import functools
+import itertools
+import zipfile
+import multiprocessing
+import atexit
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from contextlib import contextmanager
+import duplicidades_social
+import cache_pdf_social
+
+logger = logging.getLogger('programa_social')
+
+DB_PATH = 'programa_social.db'
+PDF_DIR = 'pdfs'
+
+# Conexões somente leitura mantidas abertas por Database (relatórios, lista, estatísticas),
+# compartilhadas por todas as sessões do processo
+READER_POOL_SIZE = 8
+
+# Segundos que uma conexão espera por um lock antes de falhar com "database is locked"
+BUSY_TIMEOUT = 10
+
+# Novas tentativas quando o banco continua ocupado (outro processo gravando), com espera
+# exponencial a partir de BUSY_BACKOFF segundos
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+# Máximo de gravações da fila do escritor reunidas num único commit
+WRITE_BATCH_MAX = 64
+
+# Ajustes aplicados a toda conexão aberta por Database
+DB_PRAGMAS = {
+    'synchronous': 'NORMAL',    # seguro em WAL: só o último commit pode se perder numa queda de energia
+    'cache_size': -16000,       # 16 MB de cache de páginas por conexão
+    'mmap_size': 268435456,     # leituras via mmap de até 256 MB
+    'temp_store': 'MEMORY',     # ordenações e índices temporários em memória
+}
+
+# Consultas a partir desta duração vão para o log junto com o EXPLAIN QUERY PLAN
+SLOW_QUERY_MS = 100
+
+# Threads do executor que atende as consultas e PDFs dos handlers async
+ASYNC_WORKERS = 8
+
+# Limites (ms) das faixas dos histogramas de latência; a última faixa é "acima de 5 s"
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Versão do layout da ficha e do relatório: aumente ao alterá-los para que o cache de PDFs
+# não devolva documentos no layout antigo
+PDF_LAYOUT_VERSAO = 1
+
+# Quantidade de inscrições buscadas por página na lista de gerenciamento
+PAGE_SIZE = 50
+
+# Cor do selo de cada status nos cards
+STATUS_COLORS = {
+    'Pendente': "orange",
+    'Aprovada': "green",
+    'Rejeitada': "red"
+}
+
+# Opção do filtro da lista que mostra as inscrições pendentes pela pontuação de vulnerabilidade
+FILA_PRIORIDADE = "Fila de Prioridade"
+
+# Ordenações da lista: rótulo -> (coluna, decrescente). Cada coluna tem um índice (coluna, id) que
+# entrega as linhas já na ordem e serve de cursor da paginação
+ORDENACOES = {
+    "Mais recentes": ('created_at', True),
+    "Mais antigas": ('created_at', False),
+    "Menor idade": ('idade', False),
+    "Maior idade": ('idade', True),
+    "Menor renda": ('renda_familiar', False),
+    "Maior renda": ('renda_familiar', True),
+    "Menor renda per capita": ('renda_per_capita', False),
+    "Maior renda per capita": ('renda_per_capita', True),
+}
+ORDENACAO_PADRAO = "Mais recentes"
+
+# Critérios de faixa do filtro da lista: chave do critério -> coluna. O valor é (mínimo, máximo),
+# inclusivos, com None no lado sem limite; a faixa de data usa dias AAAA-MM-DD
+FILTRO_FAIXAS = {
+    'idade': 'idade',
+    'renda': 'renda_familiar',
+    'renda_per_capita': 'renda_per_capita',
+    'data': 'created_at',
+}
+
+# Critérios de igualdade do filtro da lista (chave e coluna têm o mesmo nome)
+FILTRO_VALORES = ('escolaridade', 'situacao_moradia')
+
+# Opções de escolaridade e de situação de moradia do formulário e do filtro da lista
+ESCOLARIDADES = [
+    "Sem escolaridade", "Ensino Fundamental Incompleto", "Ensino Fundamental Completo",
+    "Ensino Médio Incompleto", "Ensino Médio Completo", "Ensino Superior Incompleto",
+    "Ensino Superior Completo", "Pós-graduação"
+]
+SITUACOES_MORADIA = ["Casa Própria", "Casa Alugada", "Casa Cedida", "Ocupação", "Situação de Rua", "Outro"]
+
+# Regras da pontuação de vulnerabilidade (coluna prioridade). O INSERT de cada inscrição já grava a
+# pontuação e um trigger a mantém nas edições; se as regras forem alteradas, um job em segundo plano
+# repontua as inscrições existentes depois da próxima abertura do banco.
+PRIORIDADE_REGRAS = {
+    # (até R$ por pessoa, pontos): vale a primeira faixa em que a renda per capita couber
+    'renda_per_capita': [[218, 40], [500, 25], [1000, 10]],
+    # Pontos por situação de moradia (as demais não pontuam)
+    'situacao_moradia': {"Situação de Rua": 40, "Ocupação": 30, "Casa Cedida": 10, "Casa Alugada": 5},
+    # Pontos por membro da família além do primeiro, até o máximo
+    'membros_familia': {'pontos_por_membro': 3, 'maximo': 15},
+}
+
+# Inscrições (faixa de ids) repontuadas por transação no job de repontuação
+PRIORIDADE_BATCH_ROWS = 20000
+
+# Período (dias) dos relatórios do histórico de status e percentis do tempo em cada status
+HISTORICO_DIAS = 30
+HISTORICO_PERCENTIS = (50, 75, 90, 95)
+
+# Faixa de duração (segundos) em que resumo_permanencia conta uma saída de status: minutos
+# abaixo de um dia e horas acima, a precisão que format_duration mostra
+PERMANENCIA_FAIXA = 'CASE WHEN {segundos} < 86400 THEN {segundos} / 60 * 60 ELSE {segundos} / 3600 * 3600 END'
+
+# Inscrições encerradas (já decididas) sem alteração há mais de ARQUIVO_IDADE_DIAS dias podem ir
+# para o banco de arquivo, movidas em lotes de ARQUIVO_BATCH_ROWS por transação
+ARQUIVO_STATUS = ('Aprovada', 'Rejeitada')
+ARQUIVO_IDADE_DIAS = 365
+ARQUIVO_BATCH_ROWS = 2000
+
+# Detecção de duplicatas: chaves preenchidas e pares gravados por transação, inscrições de cada
+# chave comparadas pela verificação do cadastro e pares mostrados por vez na tela de revisão
+DUPLICIDADE_BATCH_ROWS = 2000
+DUPLICIDADE_BLOCO_MAX = 1000
+DUPLICIDADE_PAGINA = 50
+
+# Linhas lidas do cursor por vez na exportação do relatório completo
+EXPORT_CHUNK_ROWS = 2000
+
+# Linhas por volume do relatório completo (0 = arquivo único)
+EXPORT_VOLUME_ROWS = 0
+
+# Inscrições gravadas por transação na importação de planilhas
+IMPORT_BATCH_ROWS = 50000
+
+# Inscrições lidas do banco e enviadas ao pool de processos por vez na geração de fichas em lote
+FICHAS_BATCH_ROWS = 256
+
+# Resumo por status mantido por triggers, lido pelo dashboard em vez de COUNT/AVG.
+# A renda é somada em centavos (inteiro) para que inserções e remoções não acumulem
+# erro de ponto flutuante e a verificação possa comparar valores exatos.
+RESUMO_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS resumo_inscricoes (
+        status TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        soma_renda_centavos INTEGER NOT NULL DEFAULT 0,
+        soma_membros INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_insert AFTER INSERT ON inscricoes
+    BEGIN
+        INSERT INTO resumo_inscricoes (status, total, soma_renda_centavos, soma_membros)
+        VALUES (NEW.status, 1, CAST(ROUND(NEW.renda_familiar * 100) AS INTEGER), NEW.membros_familia)
+        ON CONFLICT (status) DO UPDATE SET
+            total = total + 1,
+            soma_renda_centavos = soma_renda_centavos + excluded.soma_renda_centavos,
+            soma_membros = soma_membros + excluded.soma_membros;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_delete AFTER DELETE ON inscricoes
+    BEGIN
+        UPDATE resumo_inscricoes SET
+            total = total - 1,
+            soma_renda_centavos = soma_renda_centavos - CAST(ROUND(OLD.renda_familiar * 100) AS INTEGER),
+            soma_membros = soma_membros - OLD.membros_familia
+        WHERE status = OLD.status;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_resumo_update
+    AFTER UPDATE OF status, renda_familiar, membros_familia ON inscricoes
+    BEGIN
+        UPDATE resumo_inscricoes SET
+            total = total - 1,
+            soma_renda_centavos = soma_renda_centavos - CAST(ROUND(OLD.renda_familiar * 100) AS INTEGER),
+            soma_membros = soma_membros - OLD.membros_familia
+        WHERE status = OLD.status;
+        INSERT INTO resumo_inscricoes (status, total, soma_renda_centavos, soma_membros)
+        VALUES (NEW.status, 1, CAST(ROUND(NEW.renda_familiar * 100) AS INTEGER), NEW.membros_familia)
+        ON CONFLICT (status) DO UPDATE SET
+            total = total + 1,
+            soma_renda_centavos = soma_renda_centavos + excluded.soma_renda_centavos,
+            soma_membros = soma_membros + excluded.soma_membros;
+    END;
+'''
+
+def rebuild_resumo(conn, fix=True, commit=True):
+    """Recalcula o resumo a partir de inscricoes e retorna as divergências encontradas"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT status, COUNT(*), SUM(CAST(ROUND(renda_familiar * 100) AS INTEGER)), SUM(membros_familia)
+        FROM inscricoes
+        GROUP BY status
+    ''')
+    esperado = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+    cursor.execute('SELECT status, total, soma_renda_centavos, soma_membros FROM resumo_inscricoes')
+    atual = {row[0]: tuple(row[1:]) for row in cursor.fetchall() if any(row[1:])}
+
+    divergencias = []
+    for status in sorted(set(esperado) | set(atual), key=str):
+        if esperado.get(status) != atual.get(status):
+            divergencias.append({
+                'status': status,
+                'esperado': esperado.get(status, (0, 0, 0)),
+                'atual': atual.get(status, (0, 0, 0))
+            })
+
+    if fix and divergencias:
+        cursor.execute('DELETE FROM resumo_inscricoes')
+        cursor.executemany('''
+            INSERT INTO resumo_inscricoes (status, total, soma_renda_centavos, soma_membros)
+            VALUES (?, ?, ?, ?)
+        ''', [(status,) + valores for status, valores in esperado.items()])
+        if commit:
+            conn.commit()
+
+    return divergencias
+
+# Tabelas originais do aplicativo (bancos antigos já as possuem, por isso IF NOT EXISTS)
+BASE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        senha TEXT NOT NULL,
+        nome TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS inscricoes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome_completo TEXT NOT NULL,
+        idade INTEGER NOT NULL,
+        genero TEXT NOT NULL,
+        cpf TEXT,
+        endereco TEXT NOT NULL,
+        telefone TEXT,
+        email TEXT,
+        renda_familiar REAL NOT NULL,
+        membros_familia INTEGER NOT NULL,
+        despesas_mensais REAL NOT NULL,
+        escolaridade TEXT NOT NULL,
+        situacao_moradia TEXT NOT NULL,
+        observacoes TEXT,
+        status TEXT DEFAULT 'Pendente',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+# Colunas e tabela da detecção de duplicatas. Os CPFs já repetidos são marcados (a inscrição mais
+# nova aponta para a mais antiga em duplicado_de) antes de o CPF virar chave única das demais.
+DUPLICIDADE_SCHEMA = '''
+    ALTER TABLE inscricoes ADD COLUMN duplicado_de INTEGER;
+
+    ALTER TABLE inscricoes ADD COLUMN chave_nome TEXT;
+
+    ALTER TABLE inscricoes ADD COLUMN chave_endereco TEXT;
+
+    CREATE TABLE IF NOT EXISTS duplicidades (
+        inscricao_id INTEGER NOT NULL,
+        original_id INTEGER NOT NULL,
+        pontuacao REAL NOT NULL,
+        decisao TEXT,
+        usuario_id INTEGER,
+        detectado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        revisado_em TIMESTAMP,
+        PRIMARY KEY (inscricao_id, original_id)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_duplicidades_pendentes
+    ON duplicidades (pontuacao DESC, inscricao_id, original_id) WHERE decisao IS NULL;
+
+    INSERT INTO duplicidades (inscricao_id, original_id, pontuacao, decisao, revisado_em)
+    SELECT i.id, repetidos.original_id, 1.0, 'Duplicata', CURRENT_TIMESTAMP
+    FROM (
+        SELECT cpf_normalizado, MIN(id) AS original_id
+        FROM inscricoes
+        WHERE cpf_normalizado IS NOT NULL
+        GROUP BY cpf_normalizado
+        HAVING COUNT(*) > 1
+    ) repetidos
+    JOIN inscricoes i ON i.cpf_normalizado = repetidos.cpf_normalizado AND i.id > repetidos.original_id;
+
+    UPDATE inscricoes
+    SET duplicado_de = (SELECT d.original_id FROM duplicidades d WHERE d.inscricao_id = inscricoes.id)
+    WHERE id IN (SELECT inscricao_id FROM duplicidades);
+
+    DROP INDEX IF EXISTS idx_inscricoes_cpf_normalizado;
+
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_inscricoes_cpf_unico
+    ON inscricoes (cpf_normalizado) WHERE duplicado_de IS NULL;
+'''
+
+# Criados depois de calculadas as chaves: montar o índice de uma vez sai bem mais barato do
+# que mantê-lo a cada UPDATE do preenchimento
+DUPLICIDADE_INDICES = '''
+    CREATE INDEX IF NOT EXISTS idx_inscricoes_chave_nome
+    ON inscricoes (chave_nome);
+
+    CREATE INDEX IF NOT EXISTS idx_inscricoes_chave_endereco
+    ON inscricoes (chave_endereco);
+'''
+
+def migrate_resumo(conn):
+    """Cria o resumo por status e o preenche a partir das inscrições existentes"""
+    for statement in split_sql(RESUMO_SCHEMA):
+        conn.execute(statement)
+    rebuild_resumo(conn, commit=False)
+
+def migrate_duplicidade(conn):
+    """Cria a estrutura da detecção de duplicatas e calcula as chaves de todas as inscrições"""
+    for statement in split_sql(DUPLICIDADE_SCHEMA):
+        conn.execute(statement)
+    last_id = 0
+    while last_id is not None:
+        last_id = fill_duplicate_keys(conn, last_id)
+    for statement in split_sql(DUPLICIDADE_INDICES):
+        conn.execute(statement)
+
+# Migrações numeradas, aplicadas em ordem conforme o PRAGMA user_version do banco.
+# Nunca altere uma migração já publicada: acrescente uma nova ao final da lista.
+MIGRATIONS = [
+    (1, "Tabelas de usuários e inscrições", BASE_SCHEMA),
+    (2, "Resumo por status mantido por triggers", migrate_resumo),
+    (3, "Índices da lista de inscrições", '''
+        CREATE INDEX IF NOT EXISTS idx_inscricoes_created_at
+        ON inscricoes (created_at, id);
+
+        CREATE INDEX IF NOT EXISTS idx_inscricoes_status_created_at
+        ON inscricoes (status, created_at);
+    '''),
+    (4, "CPF normalizado (somente dígitos) e indexado", '''
+        ALTER TABLE inscricoes ADD COLUMN cpf_normalizado TEXT
+        GENERATED ALWAYS AS (
+            NULLIF(REPLACE(REPLACE(REPLACE(REPLACE(TRIM(cpf), '.', ''), '-', ''), '/', ''), ' ', ''), '')
+        ) VIRTUAL;
+
+        CREATE INDEX IF NOT EXISTS idx_inscricoes_cpf_normalizado
+        ON inscricoes (cpf_normalizado);
+    '''),
+    (5, "Busca textual (FTS5) em nome, endereço e observações", '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS inscricoes_fts USING fts5(
+            nome_completo, endereco, observacoes,
+            content='inscricoes', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_fts_insert AFTER INSERT ON inscricoes
+        BEGIN
+            INSERT INTO inscricoes_fts (rowid, nome_completo, endereco, observacoes)
+            VALUES (NEW.id, NEW.nome_completo, NEW.endereco, NEW.observacoes);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_fts_delete AFTER DELETE ON inscricoes
+        BEGIN
+            INSERT INTO inscricoes_fts (inscricoes_fts, rowid, nome_completo, endereco, observacoes)
+            VALUES ('delete', OLD.id, OLD.nome_completo, OLD.endereco, OLD.observacoes);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_fts_update
+        AFTER UPDATE OF nome_completo, endereco, observacoes ON inscricoes
+        BEGIN
+            INSERT INTO inscricoes_fts (inscricoes_fts, rowid, nome_completo, endereco, observacoes)
+            VALUES ('delete', OLD.id, OLD.nome_completo, OLD.endereco, OLD.observacoes);
+            INSERT INTO inscricoes_fts (rowid, nome_completo, endereco, observacoes)
+            VALUES (NEW.id, NEW.nome_completo, NEW.endereco, NEW.observacoes);
+        END;
+
+        INSERT INTO inscricoes_fts (inscricoes_fts) VALUES ('rebuild');
+    '''),
+    (6, "Contadores de versão dos dados das análises", '''
+        CREATE TABLE IF NOT EXISTS versao_dados (
+            nome TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL DEFAULT 0
+        );
+
+        INSERT OR IGNORE INTO versao_dados (nome) VALUES ('analises');
+
+        CREATE TRIGGER IF NOT EXISTS trg_versao_analises_insert AFTER INSERT ON inscricoes
+        BEGIN
+            UPDATE versao_dados SET valor = valor + 1 WHERE nome = 'analises';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_versao_analises_delete AFTER DELETE ON inscricoes
+        BEGIN
+            UPDATE versao_dados SET valor = valor + 1 WHERE nome = 'analises';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_versao_analises_update
+        AFTER UPDATE OF renda_familiar, membros_familia, despesas_mensais, escolaridade, situacao_moradia
+        ON inscricoes
+        BEGIN
+            UPDATE versao_dados SET valor = valor + 1 WHERE nome = 'analises';
+        END;
+    '''),
+    (7, "Pontuação de vulnerabilidade e fila de prioridade", '''
+        ALTER TABLE inscricoes ADD COLUMN prioridade INTEGER NOT NULL DEFAULT 0;
+
+        CREATE TABLE IF NOT EXISTS regras_prioridade (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            regras TEXT NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_inscricoes_status_prioridade
+        ON inscricoes (status, prioridade DESC, id);
+    '''),
+    (8, "Histórico de status (somente inserção)", '''
+        CREATE TABLE IF NOT EXISTS historico_status (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            inscricao_id INTEGER NOT NULL,
+            status_anterior TEXT,
+            status_novo TEXT NOT NULL,
+            usuario_id INTEGER,
+            segundos_no_status INTEGER,
+            alterado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_historico_inscricao
+        ON historico_status (inscricao_id, alterado_em);
+
+        CREATE INDEX IF NOT EXISTS idx_historico_status_novo
+        ON historico_status (status_novo, alterado_em);
+
+        CREATE INDEX IF NOT EXISTS idx_historico_status_anterior
+        ON historico_status (status_anterior, alterado_em, segundos_no_status);
+
+        CREATE INDEX IF NOT EXISTS idx_historico_usuario
+        ON historico_status (usuario_id, alterado_em);
+
+        CREATE TRIGGER IF NOT EXISTS trg_historico_sem_update BEFORE UPDATE ON historico_status
+        BEGIN
+            SELECT RAISE(ABORT, 'historico_status é somente inserção');
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_historico_sem_delete BEFORE DELETE ON historico_status
+        BEGIN
+            SELECT RAISE(ABORT, 'historico_status é somente inserção');
+        END;
+    '''),
+    (9, "Detecção de duplicatas (CPF único e chaves de nome e endereço)", migrate_duplicidade),
+    (10, "Renda per capita e índices das ordenações da lista", '''
+        ALTER TABLE inscricoes ADD COLUMN renda_per_capita REAL
+        GENERATED ALWAYS AS (renda_familiar / MAX(membros_familia, 1)) VIRTUAL;
+
+        CREATE INDEX IF NOT EXISTS idx_inscricoes_idade
+        ON inscricoes (idade, id);
+
+        CREATE INDEX IF NOT EXISTS idx_inscricoes_renda
+        ON inscricoes (renda_familiar, id);
+
+        CREATE INDEX IF NOT EXISTS idx_inscricoes_renda_per_capita
+        ON inscricoes (renda_per_capita, id);
+    '''),
+    (11, "Resumo mensal do tempo no status, mantido por trigger", '''
+        CREATE TABLE IF NOT EXISTS resumo_permanencia (
+            status TEXT NOT NULL,
+            mes TEXT NOT NULL,
+            faixa INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (status, mes, faixa)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_permanencia AFTER INSERT ON historico_status
+        WHEN NEW.status_anterior IS NOT NULL AND NEW.segundos_no_status IS NOT NULL
+        BEGIN
+            INSERT INTO resumo_permanencia (status, mes, faixa, total)
+            VALUES (NEW.status_anterior, substr(NEW.alterado_em, 1, 7), {faixa}, 1)
+            ON CONFLICT (status, mes, faixa) DO UPDATE SET total = total + 1;
+        END;
+
+        INSERT INTO resumo_permanencia (status, mes, faixa, total)
+        SELECT status_anterior, substr(alterado_em, 1, 7), {faixa_historico}, COUNT(*)
+        FROM historico_status
+        WHERE status_anterior IS NOT NULL AND segundos_no_status IS NOT NULL
+        GROUP BY 1, 2, 3;
+    '''.format(
+        faixa=PERMANENCIA_FAIXA.format(segundos='NEW.segundos_no_status'),
+        faixa_historico=PERMANENCIA_FAIXA.format(segundos='segundos_no_status')
+    )),
+    # Chave do relatório completo no cache de PDFs. Valor aleatório em vez de contador: um banco
+    # restaurado de backup e alterado de outro jeito não repete uma versão já usada como chave
+    (12, "Versão do relatório completo, trocada por triggers", '''
+        INSERT OR IGNORE INTO versao_dados (nome, valor) VALUES ('relatorio', random());
+
+        CREATE TRIGGER IF NOT EXISTS trg_versao_relatorio_insert AFTER INSERT ON inscricoes
+        BEGIN
+            UPDATE versao_dados SET valor = random() WHERE nome = 'relatorio';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_versao_relatorio_delete AFTER DELETE ON inscricoes
+        BEGIN
+            UPDATE versao_dados SET valor = random() WHERE nome = 'relatorio';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_versao_relatorio_update
+        AFTER UPDATE OF nome_completo, idade, renda_familiar, status, created_at ON inscricoes
+        BEGIN
+            UPDATE versao_dados SET valor = random() WHERE nome = 'relatorio';
+        END;
+    '''),
+]
+
+def split_sql(script):
+    """Divide um script SQL em comandos completos (respeitando corpos de triggers)"""
+    statements = []
+    buffer = ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ''
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+def run_migrations(conn):
+    """Aplica as migrações pendentes, cada uma em sua própria transação"""
+    cursor = conn.cursor()
+    current = cursor.execute('PRAGMA user_version').fetchone()[0]
+    applied = []
+
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        cursor.execute('BEGIN')
+        try:
+            if callable(migration):
+                migration(conn)
+            else:
+                for statement in split_sql(migration):
+                    cursor.execute(statement)
+            cursor.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append((version, description))
+        logger.info("Migração %s aplicada: %s", version, description)
+
+    return applied
+
+SQL_LOGIN = '''
+    SELECT id, nome FROM usuarios
+    WHERE email = ? AND senha = ?
+'''
+
+SQL_INSERT_USUARIO = '''
+    INSERT INTO usuarios (nome, email, senha)
+    VALUES (?, ?, ?)
+'''
+
+# Mudança de status das inscrições que atendem a {where}; as que já estão no status ficam de fora
+SQL_UPDATE_STATUS = '''
+    UPDATE inscricoes
+    SET status = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE status IS NOT ? AND {where}
+'''
+
+# Uma linha de histórico por inscrição que vai mudar, com o tempo que ela passou no status
+# anterior (desde a última mudança ou, na primeira, desde o cadastro)
+SQL_HISTORICO_STATUS = '''
+    INSERT INTO historico_status (inscricao_id, status_anterior, status_novo, usuario_id, segundos_no_status)
+    SELECT id, status, ?, ?, CAST(ROUND((julianday('now') - julianday(COALESCE(
+        (SELECT MAX(h.alterado_em) FROM historico_status h WHERE h.inscricao_id = inscricoes.id),
+        created_at
+    ))) * 86400) AS INTEGER)
+    FROM inscricoes
+    WHERE status IS NOT ? AND {where}
+'''
+
+SQL_HISTORICO_POR_DIA = '''
+    SELECT substr(alterado_em, 1, 10) AS dia, COUNT(*)
+    FROM historico_status
+    WHERE status_novo = ? AND alterado_em >= ? AND alterado_em < date(?, '+1 day')
+    GROUP BY dia
+    ORDER BY dia
+'''
+
+# Quantas saídas do status caíram em cada faixa de duração no intervalo: os meses inteiros vêm do
+# resumo mensal e só os dias das pontas são lidos do histórico (pelo índice que já cobre a duração)
+SQL_HISTORICO_PERMANENCIA = f'''
+    SELECT faixa, SUM(total)
+    FROM (
+        SELECT faixa, total
+        FROM resumo_permanencia
+        WHERE status = :status AND mes >= :mes_de AND mes <= :mes_ate
+        UNION ALL
+        SELECT {PERMANENCIA_FAIXA.format(segundos='segundos_no_status')}, 1
+        FROM historico_status
+        WHERE status_anterior = :status AND alterado_em >= :de AND alterado_em < :inicio_meses
+          AND segundos_no_status IS NOT NULL
+        UNION ALL
+        SELECT {PERMANENCIA_FAIXA.format(segundos='segundos_no_status')}, 1
+        FROM historico_status
+        WHERE status_anterior = :status AND alterado_em >= :fim_meses AND alterado_em < date(:ate, '+1 day')
+          AND segundos_no_status IS NOT NULL
+    )
+    GROUP BY faixa
+    ORDER BY faixa
+'''
+
+SQL_HISTORICO_POR_USUARIO = '''
+    SELECT status_novo, COUNT(*)
+    FROM historico_status
+    WHERE usuario_id = ? AND alterado_em >= ? AND alterado_em < date(?, '+1 day')
+    GROUP BY status_novo
+'''
+
+SQL_HISTORICO_INSCRICAO = '''
+    SELECT h.alterado_em, h.status_anterior, h.status_novo,
+           (SELECT u.nome FROM usuarios u WHERE u.id = h.usuario_id), h.segundos_no_status
+    FROM historico_status h
+    WHERE h.inscricao_id = ?
+    ORDER BY h.alterado_em DESC
+    LIMIT ?
+'''
+
+# Colunas originais de inscricoes, na ordem em que as telas e os PDFs as leem por posição.
+# Colunas acrescentadas por migrações (como cpf_normalizado) ficam de fora de propósito.
+INSCRICAO_COLUMN_NAMES = [
+    'id', 'nome_completo', 'idade', 'genero', 'cpf', 'endereco', 'telefone', 'email',
+    'renda_familiar', 'membros_familia', 'despesas_mensais', 'escolaridade', 'situacao_moradia',
+    'observacoes', 'status', 'created_at', 'updated_at'
+]
+
+INSCRICAO_COLUMNS = ', '.join(INSCRICAO_COLUMN_NAMES)
+
+SQL_INSCRICAO_POR_ID = f'SELECT {INSCRICAO_COLUMNS} FROM inscricoes WHERE id = ?'
+
+SQL_EXPORT_TODAS = f'SELECT {INSCRICAO_COLUMNS} FROM inscricoes ORDER BY created_at DESC'
+
+# CPF normalizado das inscrições arquivadas: a mesma expressão da coluna gerada cpf_normalizado
+# (migração 4), indexada no arquivo, que não tem a coluna
+ARQUIVO_CPF = "NULLIF(REPLACE(REPLACE(REPLACE(REPLACE(TRIM(cpf), '.', ''), '-', ''), '/', ''), ' ', ''), '')"
+
+# Banco de arquivo, anexado como "arquivo" a toda conexão de Database. O id é o da tabela principal
+# (AUTOINCREMENT: nunca reaproveitado), então as duas partes nunca têm ids em comum.
+ARQUIVO_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS arquivo.inscricoes (
+        id INTEGER PRIMARY KEY,
+        nome_completo TEXT NOT NULL,
+        idade INTEGER NOT NULL,
+        genero TEXT NOT NULL,
+        cpf TEXT,
+        endereco TEXT NOT NULL,
+        telefone TEXT,
+        email TEXT,
+        renda_familiar REAL NOT NULL,
+        membros_familia INTEGER NOT NULL,
+        despesas_mensais REAL NOT NULL,
+        escolaridade TEXT NOT NULL,
+        situacao_moradia TEXT NOT NULL,
+        observacoes TEXT,
+        status TEXT,
+        created_at TIMESTAMP,
+        updated_at TIMESTAMP,
+        prioridade INTEGER NOT NULL DEFAULT 0,
+        arquivado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS arquivo.idx_arquivo_created_at
+    ON inscricoes (created_at, id);
+
+    CREATE INDEX IF NOT EXISTS arquivo.idx_arquivo_status_created_at
+    ON inscricoes (status, created_at);
+
+    CREATE INDEX IF NOT EXISTS arquivo.idx_arquivo_cpf
+    ON inscricoes ({ARQUIVO_CPF});
+'''
+
+ARQUIVO_COLUMNS = INSCRICAO_COLUMNS + ', prioridade'
+
+# Inscrições ativas e arquivadas juntas, para relatórios que precisam do histórico completo.
+# TEMP: criada em cada conexão depois do ATTACH (views do banco principal não veem o arquivo).
+SQL_VIEW_TODAS = f'''
+    CREATE TEMP VIEW IF NOT EXISTS inscricoes_todas AS
+    SELECT {ARQUIVO_COLUMNS}, 0 AS arquivada FROM main.inscricoes
+    UNION ALL
+    SELECT {ARQUIVO_COLUMNS}, 1 AS arquivada FROM arquivo.inscricoes
+'''
+
+SQL_EXPORT_COM_ARQUIVO = f'SELECT {INSCRICAO_COLUMNS} FROM inscricoes_todas ORDER BY created_at DESC'
+
+# O intervalo de id conduz o plano (+status evita o índice de status, que obrigaria a ordenar
+# todas as encerradas a cada lote)
+SQL_ARQUIVO_CANDIDATAS = f'''
+    SELECT id FROM main.inscricoes
+    WHERE id > ? AND +status IN ({', '.join('?' for _ in ARQUIVO_STATUS)}) AND updated_at < ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+# Cópia do lote para o arquivo (OR REPLACE: atualiza uma cópia deixada por execução interrompida)
+SQL_ARQUIVO_COPIA = f'''
+    INSERT OR REPLACE INTO arquivo.inscricoes ({ARQUIVO_COLUMNS})
+    SELECT {ARQUIVO_COLUMNS} FROM main.inscricoes
+    WHERE id IN (SELECT value FROM json_each(?))
+'''
+
+# Remove da tabela principal só as linhas cuja cópia no arquivo ainda está igual (status e
+# updated_at): uma mudança de status entre a cópia e a remoção mantém a inscrição ativa
+SQL_ARQUIVO_REMOCAO = '''
+    DELETE FROM main.inscricoes
+    WHERE id IN (
+        SELECT a.id FROM arquivo.inscricoes a
+        JOIN main.inscricoes m ON m.id = a.id
+        WHERE a.id IN (SELECT value FROM json_each(?))
+          AND m.status IS a.status AND m.updated_at IS a.updated_at
+    )
+'''
+
+# Descarta do arquivo as cópias das inscrições que continuaram ativas
+SQL_ARQUIVO_DESCARTE = '''
+    DELETE FROM arquivo.inscricoes
+    WHERE id IN (SELECT value FROM json_each(?)) AND id IN (SELECT id FROM main.inscricoes)
+'''
+
+# Inscrições ainda sem chaves de duplicidade (cadastradas por fora do app ou antes da migração 9)
+SQL_DUPLICIDADE_SEM_CHAVES = '''
+    SELECT id, nome_completo, endereco FROM inscricoes
+    WHERE chave_nome IS NULL AND id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+
+SQL_DUPLICIDADE_CHAVES = 'UPDATE inscricoes SET chave_nome = ?, chave_endereco = ? WHERE id = ?'
+
+# Busca pelo CPF no índice único (só inscrições não marcadas como duplicata) e no índice de CPF
+# do arquivo: um CPF arquivado continua inscrito. Uma duplicata arquivada tem o CPF da original,
+# então encontrá-la recusa o mesmo CPF que a original recusaria.
+SQL_DUPLICIDADE_CPF = f'''
+    SELECT id, nome_completo FROM main.inscricoes
+    WHERE cpf_normalizado = ?1 AND duplicado_de IS NULL
+    UNION ALL
+    SELECT id, nome_completo FROM arquivo.inscricoes
+    WHERE {ARQUIVO_CPF} = ?1
+'''
+
+SQL_DUPLICIDADE_CPFS = f'''
+    SELECT cpf_normalizado, id FROM main.inscricoes
+    WHERE cpf_normalizado IN (SELECT value FROM json_each(?1)) AND duplicado_de IS NULL
+    UNION ALL
+    SELECT {ARQUIVO_CPF}, id FROM arquivo.inscricoes
+    WHERE {ARQUIVO_CPF} IN (SELECT value FROM json_each(?1))
+'''
+
+# Inscrições do mesmo bloco ({chave}: chave_nome ou chave_endereco), as mais recentes primeiro
+SQL_DUPLICIDADE_BLOCO = '''
+    SELECT id, nome_completo, endereco FROM inscricoes
+    WHERE {chave} = ? AND duplicado_de IS NULL
+    ORDER BY id DESC
+    LIMIT ?
+'''
+
+# Todas as inscrições agrupadas por bloco, percorrendo o índice da chave
+SQL_DUPLICIDADE_BLOCOS = '''
+    SELECT id, nome_completo, endereco, {chave} FROM inscricoes
+    WHERE {chave} > '' AND duplicado_de IS NULL
+    ORDER BY {chave}, id
+'''
+
+# OR IGNORE: um par já revisado (ou já pendente) não volta à fila
+SQL_DUPLICIDADE_PAR = '''
+    INSERT OR IGNORE INTO duplicidades (inscricao_id, original_id, pontuacao)
+    VALUES (?, ?, ?)
+'''
+
+SQL_DUPLICIDADES_PENDENTES_TOTAL = 'SELECT COUNT(*) FROM duplicidades WHERE decisao IS NULL'
+
+# CROSS JOIN fixa a ordem: percorre os pares pendentes pelo índice parcial e busca cada inscrição
+# pelo id (senão o planejador pode preferir varrer inscricoes pelo índice de CPF)
+SQL_DUPLICIDADES_PENDENTES = '''
+    SELECT d.inscricao_id, d.original_id, d.pontuacao,
+           n.nome_completo, n.cpf, n.endereco, n.idade, n.status, n.created_at,
+           o.nome_completo, o.cpf, o.endereco, o.idade, o.status, o.created_at
+    FROM duplicidades d
+    CROSS JOIN inscricoes n ON n.id = d.inscricao_id
+    CROSS JOIN inscricoes o ON o.id = d.original_id
+    WHERE d.decisao IS NULL AND n.duplicado_de IS NULL
+    ORDER BY d.pontuacao DESC, d.inscricao_id, d.original_id
+    LIMIT ?
+'''
+
+SQL_DUPLICIDADE_DECISAO = '''
+    UPDATE duplicidades
+    SET decisao = ?, usuario_id = ?, revisado_em = CURRENT_TIMESTAMP
+    WHERE inscricao_id = ? AND original_id = ? AND decisao IS NULL
+'''
+
+SQL_DUPLICIDADE_MARCA = 'UPDATE inscricoes SET duplicado_de = ? WHERE id = ? AND duplicado_de IS NULL'
+
+# Colunas lidas pela lista de gerenciamento: só o que o card mostra
+LIST_COLUMN_NAMES = [
+    'id', 'nome_completo', 'idade', 'genero', 'renda_familiar', 'membros_familia', 'status', 'created_at',
+    'prioridade', 'renda_per_capita'
+]
+
+class Inscricao:
+    """Uma linha de inscricoes com acesso por nome de coluna.
+    
+    Usa __slots__ (sem __dict__ por objeto) para manter listas grandes compactas. Só as
+    colunas selecionadas pela consulta ficam preenchidas; ler outra levanta AttributeError.
+    """
+
+    __slots__ = tuple(INSCRICAO_COLUMN_NAMES) + ('prioridade', 'renda_per_capita')
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        """row_factory do sqlite3: preenche os campos pelos nomes das colunas da consulta"""
+        inscricao = cls.__new__(cls)
+        for column, value in zip(cursor.description, row):
+            setattr(inscricao, column[0], value)
+        return inscricao
+
+    def __repr__(self):
+        return f"Inscricao(id={getattr(self, 'id', None)}, nome_completo={getattr(self, 'nome_completo', None)!r})"
+
+def inscricao_cursor(conn):
+    """Cursor cujas linhas são objetos Inscricao"""
+    cursor = conn.cursor()
+    cursor.row_factory = Inscricao.from_row
+    return cursor
+
+def fetch_inscricao(conn, inscricao_id):
+    """Inscrição completa pelo id, ou None"""
+    return inscricao_cursor(conn).execute(SQL_INSCRICAO_POR_ID, (inscricao_id,)).fetchone()
+
+# Peso de cada coluna do índice textual no bm25 (nome, endereço, observações)
+FTS_WEIGHTS = (10.0, 3.0, 1.0)
+
+def build_fts_query(text):
+    """Converte o texto digitado numa expressão MATCH do FTS5 (todas as palavras, por prefixo)"""
+    tokens = re.findall(r'\w+', text or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def filter_status(status_filter):
+    """Status das inscrições de um filtro da lista (a fila de prioridade mostra as pendentes)"""
+    return 'Pendente' if status_filter == FILA_PRIORIDADE else status_filter
+
+def sort_order(criterios=None):
+    """(coluna, decrescente) da ordenação escolhida nos critérios da lista"""
+    ordem = (criterios or {}).get('ordem') or ORDENACAO_PADRAO
+    if ordem not in ORDENACOES:
+        raise ValueError(f"Ordenação desconhecida: {ordem}")
+    return ORDENACOES[ordem]
+
+def build_criteria(criterios=None, prefix='', indexed=None):
+    """Condições WHERE dos critérios do filtro da lista; retorna (condições, parâmetros).
+    
+    `indexed` é a coluna do índice que conduz a consulta: as demais colunas levam o + unário, que
+    impede o planejador de trocar esse índice por outro que obrigaria a ordenar o resultado. Sem
+    ele (mudança de status em massa) o planejador escolhe livremente.
+    """
+    criterios = criterios or {}
+    desconhecidos = set(criterios) - set(FILTRO_FAIXAS) - set(FILTRO_VALORES) - {'ordem'}
+    if desconhecidos:
+        raise ValueError(f"Critério de filtro desconhecido: {', '.join(sorted(desconhecidos))}")
+
+    def ref(column):
+        return f'{prefix}{column}' if indexed in (None, column) else f'+{prefix}{column}'
+
+    def day(value, dias=0):
+        try:
+            return (datetime.strptime(value, '%Y-%m-%d') + timedelta(days=dias)).strftime('%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"Data inválida: {value} (use AAAA-MM-DD)")
+
+    where = []
+    params = []
+    for key, column in FILTRO_FAIXAS.items():
+        low, high = (None if value == '' else value for value in criterios.get(key) or (None, None))
+        upper = '<='
+        if column == 'created_at':
+            # Dias inteiros: o limite superior vai até o fim do dia final
+            if low is not None:
+                low = day(low)
+            if high is not None:
+                high = day(high, 1)
+            upper = '<'
+        if low is not None and high is not None and (low >= high if upper == '<' else low > high):
+            raise ValueError(f"Faixa de {key} inválida: mínimo maior que o máximo")
+        if low is not None:
+            where.append(f'{ref(column)} >= ?')
+            params.append(low)
+        if high is not None:
+            where.append(f'{ref(column)} {upper} ?')
+            params.append(high)
+    for column in FILTRO_VALORES:
+        value = criterios.get(column)
+        if value:
+            where.append(f'{ref(column)} = ?')
+            params.append(value)
+    return where, params
+
+def build_page_query(status_filter="Todos", after=None, limit=PAGE_SIZE, search=None, criterios=None):
+    """Monta a consulta de uma página da lista.
+    
+    Sem busca, pagina pelo cursor (coluna da ordenação, id), ou (prioridade, id) na fila de
+    prioridade. Com busca textual, ordena por relevância (bm25) e o cursor é a quantidade de linhas
+    já carregadas. Os critérios (faixas, categorias e ordenação, ver build_criteria) valem nos três
+    casos; a ordenação escolhida só não se aplica à fila nem à busca.
+    """
+    match = build_fts_query(search)
+    if match:
+        columns = ', '.join(f'i.{column}' for column in LIST_COLUMN_NAMES)
+        sql = f'''SELECT {columns} FROM inscricoes_fts
+            JOIN inscricoes i ON i.id = inscricoes_fts.rowid
+            WHERE inscricoes_fts MATCH ?'''
+        params = [match]
+        if status_filter != "Todos":
+            sql += ' AND i.status = ?'
+            params.append(filter_status(status_filter))
+        where, where_params = build_criteria(criterios, 'i.', indexed='rowid')
+        for condition in where:
+            sql += f' AND {condition}'
+        params.extend(where_params)
+        sql += f' ORDER BY bm25(inscricoes_fts, {", ".join(map(str, FTS_WEIGHTS))}), i.id LIMIT ? OFFSET ?'
+        params.extend([limit, after or 0])
+        return sql, params
+
+    if status_filter == FILA_PRIORIDADE:
+        # Maior pontuação primeiro; no empate, a inscrição mais antiga. O cursor não cabe numa
+        # comparação de tuplas (ordens opostas), então o intervalo em prioridade usa o índice
+        # e o OR só filtra as linhas da pontuação do cursor
+        where, params = build_criteria(criterios, indexed='prioridade')
+        sql = f'SELECT {", ".join(LIST_COLUMN_NAMES)} FROM inscricoes WHERE status = ?'
+        params = ['Pendente'] + params
+        for condition in where:
+            sql += f' AND {condition}'
+        if after is not None:
+            sql += ' AND prioridade <= ? AND (prioridade < ? OR id > ?)'
+            params.extend([after[0], after[0], after[1]])
+        sql += ' ORDER BY prioridade DESC, id LIMIT ?'
+        params.append(limit)
+        return sql, params
+
+    # O índice da coluna da ordenação conduz a consulta: faixa nessa coluna, cursor e ORDER BY
+    # saem dele, e os demais critérios só filtram as linhas percorridas
+    column, descending = sort_order(criterios)
+    where = []
+    params = []
+
+    if status_filter != "Todos":
+        # Na ordenação por data o índice (status, created_at) atende também o status
+        where.append('status = ?' if column == 'created_at' else '+status = ?')
+        params.append(status_filter)
+    criteria_where, criteria_params = build_criteria(criterios, indexed=column)
+    where.extend(criteria_where)
+    params.extend(criteria_params)
+    if after is not None:
+        where.append(f'({column}, id) {"<" if descending else ">"} (?, ?)')
+        params.extend(after)
+
+    sql = f'SELECT {", ".join(LIST_COLUMN_NAMES)} FROM inscricoes'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    direction = ' DESC' if descending else ''
+    sql += f' ORDER BY {column}{direction}, id{direction} LIMIT ?'
+    params.append(limit)
+    return sql, params
+
+def page_cursor(inscricao, status_filter="Todos", criterios=None):
+    """Cursor da página seguinte a partir da última inscrição carregada (fora da busca textual)"""
+    if status_filter == FILA_PRIORIDADE:
+        return (inscricao.prioridade, inscricao.id)
+    return (getattr(inscricao, sort_order(criterios)[0]), inscricao.id)
+
+def build_status_filter(ids=None, status_filter="Todos", search=None, criterios=None):
+    """Condição WHERE de uma mudança de status em massa: as inscrições ids, ou todas as do filtro da lista"""
+    if ids is not None:
+        # Os ids vão num único parâmetro JSON: sem limite de variáveis e com um só plano
+        return 'id IN (SELECT value FROM json_each(?))', [json.dumps(sorted(ids))]
+
+    where = ['1']
+    params = []
+    if status_filter != "Todos":
+        where.append('status = ?')
+        params.append(filter_status(status_filter))
+    match = build_fts_query(search)
+    if match:
+        where.append('id IN (SELECT rowid FROM inscricoes_fts WHERE inscricoes_fts MATCH ?)')
+        params.append(match)
+    criteria_where, criteria_params = build_criteria(criterios)
+    where.extend(criteria_where)
+    params.extend(criteria_params)
+    return ' AND '.join(where), params
+
+def change_status(conn, new_status, where_sql, where_params=(), usuario_id=None):
+    """Muda o status das inscrições da condição e registra cada mudança em historico_status.
+    
+    As duas instruções rodam na transação de conn; retorna quantas inscrições mudaram.
+    """
+    where_params = list(where_params)
+    conn.execute(SQL_HISTORICO_STATUS.format(where=where_sql), [new_status, usuario_id, new_status] + where_params)
+    return conn.execute(SQL_UPDATE_STATUS.format(where=where_sql), [new_status, new_status] + where_params).rowcount
+
+def history_range(dias=HISTORICO_DIAS):
+    """Datas (AAAA-MM-DD, UTC como CURRENT_TIMESTAMP) do início e do fim dos últimos `dias` dias"""
+    hoje = datetime.now(timezone.utc).date()
+    return (hoje - timedelta(days=dias - 1)).isoformat(), hoje.isoformat()
+
+def daily_status_counts(conn, status, de, ate):
+    """Quantas inscrições passaram para o status em cada dia do intervalo: [(dia, total)]"""
+    return conn.execute(SQL_HISTORICO_POR_DIA, (status, de, ate)).fetchall()
+
+def permanencia_params(status, de, ate):
+    """Parâmetros de SQL_HISTORICO_PERMANENCIA: os meses inteiros do intervalo e as pontas em dias"""
+    inicio = datetime.strptime(de, '%Y-%m-%d').date()
+    fim = datetime.strptime(ate, '%Y-%m-%d').date() + timedelta(days=1)
+    # Primeiro dia do primeiro mês inteiro e primeiro dia depois do último mês inteiro
+    inicio_meses = inicio if inicio.day == 1 else (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    fim_meses = fim.replace(day=1)
+    mes_de, mes_ate = inicio_meses.strftime('%Y-%m'), (fim_meses - timedelta(days=1)).strftime('%Y-%m')
+    if fim_meses <= inicio_meses:
+        # Nenhum mês inteiro: o intervalo todo sai do histórico e o resumo não entra
+        inicio_meses = fim_meses = fim
+        mes_de, mes_ate = '', ''
+    return {
+        'status': status, 'de': de, 'ate': ate,
+        'mes_de': mes_de, 'mes_ate': mes_ate,
+        'inicio_meses': inicio_meses.isoformat(),
+        'fim_meses': fim_meses.isoformat()
+    }
+
+def time_in_status_percentiles(conn, status, de, ate, percents=HISTORICO_PERCENTIS):
+    """Percentis (segundos) do tempo no status das inscrições que saíram dele no intervalo.
+    
+    Contados por faixa de duração (PERMANENCIA_FAIXA), sem ordenar as linhas do histórico: cada
+    percentil é o início da faixa em que ele cai, com a mesma precisão de format_duration.
+    """
+    faixas = conn.execute(SQL_HISTORICO_PERMANENCIA, permanencia_params(status, de, ate)).fetchall()
+    total = sum(count for _, count in faixas)
+    if not total:
+        return {'total': 0, 'percentis': {}}
+    percentis = {}
+    acumulado = 0
+    pendentes = sorted((min(total - 1, int(p / 100 * total)), p) for p in percents)
+    for faixa, count in faixas:
+        acumulado += count
+        while pendentes and pendentes[0][0] < acumulado:
+            percentis[pendentes.pop(0)[1]] = faixa
+    return {'total': total, 'percentis': {p: percentis[p] for p in percents}}
+
+def format_duration(seconds):
+    """Duração legível: dias e horas, ou horas e minutos"""
+    if seconds is None:
+        return "-"
+    dias, resto = divmod(int(seconds), 86400)
+    if dias:
+        return f"{dias}d {resto // 3600}h"
+    return f"{resto // 3600}h {resto % 3600 // 60}min"
+
+def app_queries():
+    """Consultas do aplicativo cujo plano de execução deve usar índices"""
+    cursor_exemplo = ('2024-01-01 00:00:00', 1)
+    queries = [
+        ("login", SQL_LOGIN, ('admin@programa.gov.br', '')),
+        ("inscrição por id", SQL_INSCRICAO_POR_ID, (1,)),
+        ("exportação completa", SQL_EXPORT_TODAS, ()),
+        ("exportação com arquivo", SQL_EXPORT_COM_ARQUIVO, ()),
+        ("candidatas ao arquivo", SQL_ARQUIVO_CANDIDATAS, (0, *ARQUIVO_STATUS, '2024-01-01', ARQUIVO_BATCH_ROWS)),
+        ("cópia para o arquivo", SQL_ARQUIVO_COPIA, ('[1, 2]',)),
+        ("remoção das arquivadas", SQL_ARQUIVO_REMOCAO, ('[1, 2]',)),
+    ]
+    for status in ("Todos", "Pendente", FILA_PRIORIDADE):
+        exemplo = (50, 1) if status == FILA_PRIORIDADE else cursor_exemplo
+        queries.append((f"lista ({status}), primeira página",) + build_page_query(status, None))
+        queries.append((f"lista ({status}), página seguinte",) + build_page_query(status, exemplo))
+    # Lista com critérios: cada ordenação, com e sem status, sem critérios e com todos eles
+    # (a faixa na coluna da ordenação usa o índice; as demais só filtram)
+    criterios_exemplo = {
+        'idade': (18, 60), 'renda': (0, 5000), 'renda_per_capita': (None, 800),
+        'data': ('2024-01-01', '2024-12-31'), 'escolaridade': "Ensino Médio Completo",
+        'situacao_moradia': "Casa Alugada"
+    }
+    valores_exemplo = {'created_at': cursor_exemplo[0], 'idade': 30, 'renda_familiar': 1000.0, 'renda_per_capita': 300.0}
+    for ordem, (coluna, _) in ORDENACOES.items():
+        for status in ("Todos", "Pendente"):
+            for descricao, criterios in (("sem critérios", {}), ("todos os critérios", criterios_exemplo)):
+                criterios = dict(criterios, ordem=ordem)
+                nome = f"lista ({status}, {ordem}, {descricao})"
+                queries.append((f"{nome}, primeira página",) + build_page_query(status, None, criterios=criterios))
+                queries.append((f"{nome}, página seguinte",) + build_page_query(
+                    status, (valores_exemplo[coluna], 1), criterios=criterios))
+    queries.append((f"lista ({FILA_PRIORIDADE}, todos os critérios)",) + build_page_query(
+        FILA_PRIORIDADE, (50, 1), criterios=criterios_exemplo))
+    where_sql, params = build_fichas_query("Aprovada", "2024-01-01", "2024-12-31")
+    queries.append(("fichas em lote", f'SELECT {INSCRICAO_COLUMNS} ' + where_sql + ' ORDER BY created_at, id', params))
+    for nome, (where_sql, where_params) in (
+        ("selecionadas", build_status_filter([1, 2, 3])),
+        ("filtro", build_status_filter(None, "Pendente", "joao")),
+        ("critérios", build_status_filter(None, "Pendente", None, {'idade': (18, 25), 'escolaridade': "Pós-graduação"}))
+    ):
+        queries.append((f"status em massa ({nome})", SQL_UPDATE_STATUS.format(where=where_sql),
+                        ["Aprovada", "Aprovada"] + where_params))
+        queries.append((f"histórico do status em massa ({nome})", SQL_HISTORICO_STATUS.format(where=where_sql),
+                        ["Aprovada", 1, "Aprovada"] + where_params))
+    queries.append(("status por id", SQL_UPDATE_STATUS.format(where='id = ?'), ("Aprovada", "Aprovada", 1)))
+    # Relatórios do histórico: o agrupamento por dia e o das faixas do resumo só envolvem o intervalo
+    queries.append(("aprovações por dia", SQL_HISTORICO_POR_DIA, ("Aprovada", "2024-01-01", "2024-01-31"), True))
+    queries.append(("tempo no status", SQL_HISTORICO_PERMANENCIA,
+                    permanencia_params("Pendente", "2024-01-10", "2024-03-20"), True))
+    queries.append(("mudanças por usuário", SQL_HISTORICO_POR_USUARIO, (1, "2024-01-01", "2024-01-31"), True))
+    queries.append(("histórico da inscrição", SQL_HISTORICO_INSCRICAO, (1, 10)))
+    # Duplicidades: o CPF pelo índice único; cada chave pelo seu índice, inclusive na busca completa
+    queries.append(("CPF já inscrito", SQL_DUPLICIDADE_CPF, ('12345678900',)))
+    queries.append(("CPFs do lote importado", SQL_DUPLICIDADE_CPFS, ('["12345678900"]',)))
+    queries.append(("inscrições sem chaves de duplicidade", SQL_DUPLICIDADE_SEM_CHAVES, (0, DUPLICIDADE_BATCH_ROWS)))
+    for chave, exemplo in (('chave_nome', 'MR SLV SNTS'), ('chave_endereco', 'FLRS 123')):
+        queries.append((f"bloco de duplicidade ({chave})", SQL_DUPLICIDADE_BLOCO.format(chave=chave),
+                        (exemplo, DUPLICIDADE_BLOCO_MAX)))
+        queries.append((f"busca de duplicidades ({chave})", SQL_DUPLICIDADE_BLOCOS.format(chave=chave), ()))
+    queries.append(("duplicidades pendentes", SQL_DUPLICIDADES_PENDENTES, (DUPLICIDADE_PAGINA,)))
+    queries.append(("total de duplicidades pendentes", SQL_DUPLICIDADES_PENDENTES_TOTAL, ()))
+    queries.append(("decisão de duplicidade", SQL_DUPLICIDADE_DECISAO, ('Distintas', 1, 2, 1)))
+    # Busca textual: o índice é o FTS5; a ordenação por relevância só envolve as linhas encontradas
+    queries.append(("busca textual",) + build_page_query("Pendente", None, search="joao silva") + (True,))
+    queries.append(("busca textual com critérios",) + build_page_query(
+        "Pendente", None, search="joao silva", criterios=criterios_exemplo) + (True,))
+    return queries
+
+def check_query_plans(conn):
+    """Roda EXPLAIN QUERY PLAN nas consultas do app e retorna as que varrem a tabela toda"""
+    problemas = []
+    for nome, sql, params, *opcoes in app_queries():
+        ordena_resultado = bool(opcoes and opcoes[0])
+        plano = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+        for passo in plano:
+            # SCAN (subquery-N) percorre o resultado de uma subconsulta, cujos passos vêm no mesmo plano
+            varredura = passo.startswith('SCAN ') and 'INDEX' not in passo and not passo.startswith('SCAN (subquery')
+            ordenacao = 'USE TEMP B-TREE' in passo and not ordena_resultado
+            if varredura or ordenacao:
+                problemas.append((nome, passo))
+    return problemas
+
+# Trigger que mantém a pontuação ao editar uma inscrição, recriado a partir de PRIORIDADE_REGRAS por
+# apply_prioridade_regras(). Não há trigger de INSERT: o próprio INSERT calcula a pontuação
+# (inscricao_insert_sql), sem um segundo UPDATE em cada linha nova.
+PRIORIDADE_TRIGGERS = '''
+    DROP TRIGGER IF EXISTS trg_prioridade_insert;
+
+    DROP TRIGGER IF EXISTS trg_prioridade_update;
+
+    CREATE TRIGGER trg_prioridade_update
+    AFTER UPDATE OF renda_familiar, membros_familia, situacao_moradia ON inscricoes
+    BEGIN
+        UPDATE inscricoes SET prioridade = {expressao} WHERE id = NEW.id;
+    END;
+'''
+
+def sql_literal(value):
+    """Texto como literal SQL (triggers não aceitam parâmetros)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def prioridade_expression(regras=PRIORIDADE_REGRAS):
+    """Expressão SQL da pontuação de vulnerabilidade de uma linha de inscricoes"""
+    renda = ' '.join(
+        f'WHEN renda_familiar <= {float(limite)!r} * membros_familia THEN {int(pontos)}'
+        for limite, pontos in regras['renda_per_capita']
+    )
+    moradia = ' '.join(
+        f'WHEN {sql_literal(situacao)} THEN {int(pontos)}'
+        for situacao, pontos in regras['situacao_moradia'].items()
+    )
+    membros = regras['membros_familia']
+    return (
+        f'(CASE WHEN membros_familia <= 0 THEN 0 {renda} ELSE 0 END)'
+        f' + (CASE situacao_moradia {moradia} ELSE 0 END)'
+        f' + MIN(MAX(membros_familia - 1, 0) * {int(membros["pontos_por_membro"])}, {int(membros["maximo"])})'
+    )
+
+def inscricao_insert_sql(columns, regras=PRIORIDADE_REGRAS):
+    """INSERT de uma inscrição com um parâmetro por coluna que grava também a pontuação de vulnerabilidade"""
+    valores = ', '.join(f'? AS {column}' for column in columns)
+    return (
+        f'INSERT INTO inscricoes ({", ".join(columns)}, prioridade) '
+        f'SELECT *, {prioridade_expression(regras)} FROM (SELECT {valores})'
+    )
+
+def prioridade_signature(regras=PRIORIDADE_REGRAS):
+    """Regras serializadas como ficam em regras_prioridade (comparadas para saber se mudaram)"""
+    return json.dumps(regras, sort_keys=True, ensure_ascii=False)
+
+def apply_prioridade_regras(conn, regras=PRIORIDADE_REGRAS):
+    """Recria o trigger da pontuação se ele não corresponde às regras.
+    
+    Deve rodar dentro de uma transação. Não repontua as inscrições existentes (isso é feito por
+    rescore_prioridade, em segundo plano); retorna True se as pontuações gravadas seguem regras antigas.
+    """
+    statements = split_sql(PRIORIDADE_TRIGGERS.format(expressao=prioridade_expression(regras)))
+    esperados = {statement.rstrip(';') for statement in statements if statement.startswith('CREATE')}
+    instalados = {row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_prioridade_%'"
+    )}
+    if instalados != esperados:
+        for statement in statements:
+            conn.execute(statement)
+
+    row = conn.execute('SELECT regras FROM regras_prioridade WHERE id = 1').fetchone()
+    if row and row[0] == prioridade_signature(regras):
+        return False
+    if row is None and not conn.execute('SELECT 1 FROM inscricoes LIMIT 1').fetchone():
+        # Banco novo: não há pontuação antiga a refazer
+        conn.execute('INSERT INTO regras_prioridade (id, regras) VALUES (1, ?)', (prioridade_signature(regras),))
+        return False
+    return True
+
+def rescore_prioridade(db, regras=PRIORIDADE_REGRAS, batch_rows=PRIORIDADE_BATCH_ROWS, progress=None):
+    """Repontua todas as inscrições com as regras, uma faixa de batch_rows ids por transação.
+    
+    As gravações do app seguem entre as transações; as regras só são registradas como aplicadas
+    no fim, de modo que um job interrompido volta a ser agendado. Retorna quantas inscrições
+    tiveram a pontuação alterada.
+    """
+    expressao = prioridade_expression(regras)
+    with db.read() as conn:
+        max_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM main.inscricoes').fetchone()[0]
+    updated = 0
+    last_id = 0
+    while last_id < max_id:
+        with db.write() as conn:
+            updated += conn.execute(
+                f'UPDATE inscricoes SET prioridade = {expressao} '
+                f'WHERE id > ? AND id <= ? AND prioridade != {expressao}',
+                (last_id, last_id + batch_rows)
+            ).rowcount
+        last_id += batch_rows
+        if progress:
+            progress(min(last_id / max_id, 0.99))
+    with db.write() as conn:
+        conn.execute('INSERT OR REPLACE INTO regras_prioridade (id, regras) VALUES (1, ?)', (prioridade_signature(regras),))
+        # Em bancos já analisados, sem estatísticas do índice novo o planejador o preferiria ao de
+        # (status, created_at) na lista por status
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            conn.execute('ANALYZE idx_inscricoes_status_prioridade')
+    logger.info("Regras de prioridade aplicadas: %d inscrições repontuadas", updated)
+    if progress:
+        progress(1.0)
+    return updated
+
+def archive_path(path):
+    """Caminho do banco de arquivo de um banco principal: programa_social_arquivo.db"""
+    base, ext = os.path.splitext(path)
+    return f"{base}_arquivo{ext or '.db'}"
+
+def archive_inscricoes(db, idade_dias=ARQUIVO_IDADE_DIAS, batch_rows=ARQUIVO_BATCH_ROWS, progress=None):
+    """Move para o banco de arquivo as inscrições encerradas sem alteração há mais de idade_dias.
+    
+    Cada lote é copiado numa transação e removido da tabela principal em outra: em WAL, uma
+    transação com bancos anexados não é atômica entre eles, e assim uma interrupção deixa no
+    máximo uma cópia repetida (resolvida na próxima execução), nunca uma inscrição perdida.
+    Retorna quantas inscrições foram arquivadas.
+    """
+    limite = (datetime.now(timezone.utc) - timedelta(days=idade_dias)).strftime('%Y-%m-%d %H:%M:%S')
+    moved = 0
+    last_id = 0
+    while True:
+        with db.write() as conn:
+            ids = [row[0] for row in conn.execute(
+                SQL_ARQUIVO_CANDIDATAS, (last_id, *ARQUIVO_STATUS, limite, batch_rows)
+            )]
+            if not ids:
+                break
+            lote = json.dumps(ids)
+            conn.execute(SQL_ARQUIVO_COPIA, (lote,))
+        with db.write() as conn:
+            moved += conn.execute(SQL_ARQUIVO_REMOCAO, (lote,)).rowcount
+            conn.execute(SQL_ARQUIVO_DESCARTE, (lote,))
+        last_id = ids[-1]
+        if progress:
+            progress(moved)
+    return moved
+
+def fill_duplicate_keys(conn, after_id=0, batch_rows=DUPLICIDADE_BATCH_ROWS):
+    """Calcula as chaves de duplicidade do próximo lote (id > after_id) de inscrições sem elas.
+    
+    Retorna o último id do lote, de onde parte o lote seguinte, ou None quando não há mais.
+    """
+    rows = conn.execute(SQL_DUPLICIDADE_SEM_CHAVES, (after_id, batch_rows)).fetchall()
+    conn.executemany(SQL_DUPLICIDADE_CHAVES, [
+        duplicidades_social.duplicate_keys(nome, endereco) + (inscricao_id,)
+        for inscricao_id, nome, endereco in rows
+    ])
+    return rows[-1][0] if rows else None
+
+def find_duplicates(conn, nome, endereco, excluir_id=None, limiar=duplicidades_social.LIMIAR):
+    """Inscrições parecidas com (nome, endereço), lidas pelo índice de cada chave de bloco.
+    
+    Compara no máximo DUPLICIDADE_BLOCO_MAX inscrições por chave (as mais recentes). Só as
+    inscrições ativas: as arquivadas já foram decididas e não têm chaves de bloco.
+    Retorna [(id, nome, pontuação)], da maior pontuação para a menor.
+    """
+    perfil = duplicidades_social.Perfil(excluir_id, nome, endereco)
+    chaves = zip(('chave_nome', 'chave_endereco'), duplicidades_social.duplicate_keys(nome, endereco))
+    encontradas = {}
+    for coluna, chave in chaves:
+        if not chave:
+            continue
+        for inscricao_id, outro_nome, outro_endereco in conn.execute(
+            SQL_DUPLICIDADE_BLOCO.format(chave=coluna), (chave, DUPLICIDADE_BLOCO_MAX)
+        ):
+            if inscricao_id == excluir_id or inscricao_id in encontradas:
+                continue
+            outro = duplicidades_social.Perfil(inscricao_id, outro_nome, outro_endereco)
+            encontradas[inscricao_id] = (outro_nome, duplicidades_social.score(perfil, outro, limiar))
+    return sorted(
+        ((inscricao_id, outro_nome, pontuacao)
+         for inscricao_id, (outro_nome, pontuacao) in encontradas.items() if pontuacao >= limiar),
+        key=lambda candidata: -candidata[2]
+    )
+
+def insert_inscricao(conn, params):
+    """Grava uma inscrição (parâmetros de parse_inscricao) e registra as possíveis duplicatas.
+    
+    Recusa com ValueError um CPF que já pertence a outra inscrição, ativa ou arquivada.
+    Retorna as possíveis duplicatas por nome e endereço, como find_duplicates().
+    """
+    values = dict(zip(INSCRICAO_INSERT_COLUMNS, params))
+    cpf = duplicidades_social.normalize_cpf(values['cpf'])
+    if cpf:
+        existente = conn.execute(SQL_DUPLICIDADE_CPF, (cpf,)).fetchone()
+        if existente:
+            raise ValueError(f"CPF já inscrito na inscrição #{existente[0]} ({existente[1]})")
+    inscricao_id = conn.execute(SQL_INSERT_INSCRICAO, params).lastrowid
+    candidatas = find_duplicates(conn, values['nome_completo'], values['endereco'], inscricao_id)
+    conn.executemany(SQL_DUPLICIDADE_PAR, [
+        (inscricao_id, original_id, round(pontuacao, 3)) for original_id, _, pontuacao in candidatas
+    ])
+    return candidatas
+
+def detect_duplicates(db, janela=duplicidades_social.JANELA, progress=None):
+    """Procura possíveis duplicatas em todas as inscrições ativas, bloco a bloco, e grava os pares novos.
+    
+    Primeiro preenche as chaves que faltam; depois percorre os blocos de chave_nome (ordenados
+    pelo endereço) e os de chave_endereco (ordenados pelo nome), comparando cada inscrição só
+    com as `janela` vizinhas. Retorna (pares novos, segundos).
+    """
+    started = time.perf_counter()
+    last_id = 0
+    while last_id is not None:
+        with db.write() as conn:
+            last_id = fill_duplicate_keys(conn, last_id)
+    with db.read() as conn:
+        total = conn.execute('SELECT COALESCE(SUM(total), 0) FROM resumo_inscricoes').fetchone()[0]
+
+    novos = 0
+    pares = []
+
+    def flush():
+        nonlocal novos
+        if pares:
+            with db.write() as conn:
+                novos += conn.executemany(SQL_DUPLICIDADE_PAR, pares).rowcount
+            pares.clear()
+
+    lidas = 0
+    passadas = (('chave_nome', duplicidades_social.by_address), ('chave_endereco', duplicidades_social.by_name))
+    for chave, ordem in passadas:
+        with db.read() as conn:
+            cursor = conn.execute(SQL_DUPLICIDADE_BLOCOS.format(chave=chave))
+            for _, rows in itertools.groupby(iter_rows(cursor, DUPLICIDADE_BATCH_ROWS), key=lambda row: row[3]):
+                rows = list(rows)
+                lidas += len(rows)
+                if len(rows) > 1:
+                    bloco = [duplicidades_social.Perfil(*row[:3]) for row in rows]
+                    pares.extend(duplicidades_social.block_pairs(bloco, ordem, janela))
+                if len(pares) >= DUPLICIDADE_BATCH_ROWS:
+                    flush()
+                if progress and lidas % DUPLICIDADE_BATCH_ROWS < len(rows):
+                    progress(min(lidas / max(2 * total, 1), 0.99))
+    flush()
+    if progress:
+        progress(1.0)
+    return novos, time.perf_counter() - started
+
+def resolve_duplicate(conn, inscricao_id, original_id, duplicata, usuario_id=None):
+    """Registra a decisão da revisão de um par; retorna False se o par já tinha sido decidido.
+    
+    Uma duplicata confirmada passa a apontar para a original (duplicado_de) e, se ainda
+    pendente, é rejeitada (com registro no histórico de status).
+    """
+    decisao = 'Duplicata' if duplicata else 'Distintas'
+    if not conn.execute(SQL_DUPLICIDADE_DECISAO, (decisao, usuario_id, inscricao_id, original_id)).rowcount:
+        return False
+    if duplicata:
+        conn.execute(SQL_DUPLICIDADE_MARCA, (original_id, inscricao_id))
+        change_status(conn, 'Rejeitada', "id = ? AND status = 'Pendente'", [inscricao_id], usuario_id)
+    return True
+
+def init_schema(conn):
+    """Atualiza o esquema do banco, as regras de prioridade e cria o usuário admin padrão.
+    
+    Retorna True se as inscrições precisam ser repontuadas (rescore_prioridade).
+    """
+    run_migrations(conn)
+    cursor = conn.cursor()
+
+    cursor.execute('BEGIN')
+    try:
+        prioridade_pendente = apply_prioridade_regras(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Criar usuário admin padrão se não existir
+    cursor.execute('SELECT COUNT(*) FROM usuarios WHERE email = ?', ('admin@programa.gov.br',))
+    if cursor.fetchone()[0] == 0:
+        senha_hash = hashlib.sha256('admin123'.encode()).hexdigest()
+        cursor.execute('''
+            INSERT INTO usuarios (email, senha, nome) 
+            VALUES (?, ?, ?)
+        ''', ('admin@programa.gov.br', senha_hash, 'Administrador'))
+    
+    conn.commit()
+    return prioridade_pendente
+
+class Metrics:
+    """Histogramas de latência e contagem de linhas por consulta, handler e job"""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, name, seconds, rows=None):
+        elapsed_ms = seconds * 1000
+        with self.lock:
+            serie = self.series.get(name)
+            if serie is None:
+                serie = self.series[name] = {
+                    'contagem': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'linhas': 0,
+                    'histograma': [0] * (len(self.buckets_ms) + 1)
+                }
+            serie['contagem'] += 1
+            serie['total_ms'] += elapsed_ms
+            serie['max_ms'] = max(serie['max_ms'], elapsed_ms)
+            if rows:
+                serie['linhas'] += rows
+            serie['histograma'][bisect.bisect_left(self.buckets_ms, elapsed_ms)] += 1
+
+    def add_rows(self, name, rows):
+        with self.lock:
+            if name in self.series:
+                self.series[name]['linhas'] += rows
+
+    def snapshot(self):
+        """Cópia das séries, com a média e os limites dos histogramas"""
+        with self.lock:
+            series = {name: dict(serie, histograma=list(serie['histograma'])) for name, serie in self.series.items()}
+        for serie in series.values():
+            serie['media_ms'] = serie['total_ms'] / serie['contagem']
+        return {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'limites_ms': list(self.buckets_ms) + ['inf'],
+            'series': series
+        }
+
+    def dump(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+        return filename
+
+METRICS = Metrics()
+
+def statement_name(sql):
+    """Nome da série de uma instrução SQL: o texto com espaços normalizados"""
+    return 'sql: ' + ' '.join(sql.split())[:120]
+
+def log_slow_query(conn, sql, params, elapsed, executions=None):
+    """Registra uma consulta lenta junto com o seu plano de execução.
+    
+    Num executemany, elapsed é a média por execução e executions o tamanho do lote.
+    """
+    plan = []
+    if sql.split(None, 1)[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'):
+        try:
+            # Cursor comum: o EXPLAIN não entra nas métricas
+            plan = [row[3] for row in sqlite3.Cursor(conn).execute('EXPLAIN QUERY PLAN ' + sql, params)]
+        except sqlite3.Error:
+            pass
+    lote = f" por execução, lote de {executions}" if executions else ''
+    logger.warning("Consulta lenta (%.1f ms%s): %s | plano: %s",
+                   elapsed * 1000, lote, ' '.join(sql.split()), '; '.join(plan) or '-')
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor que mede cada instrução e conta as linhas lidas"""
+
+    metric = None
+
+    def execute(self, sql, params=()):
+        return self._timed(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        if not isinstance(seq_of_params, (list, tuple)):
+            seq_of_params = list(seq_of_params)
+        return self._timed(super().executemany, sql, seq_of_params, executions=len(seq_of_params))
+
+    def _timed(self, run, sql, params, executions=None):
+        started = time.perf_counter()
+        try:
+            return run(sql, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metric = statement_name(sql)
+            METRICS.observe(self.metric, elapsed, self.rowcount if self.rowcount > 0 else None)
+            # Um lote é lento pela média de cada execução, não pela soma delas
+            if executions is None and elapsed * 1000 >= SLOW_QUERY_MS:
+                log_slow_query(self.connection, sql, params, elapsed)
+            elif executions and elapsed * 1000 / executions >= SLOW_QUERY_MS:
+                log_slow_query(self.connection, sql, params[0], elapsed / executions, executions)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None and self.metric:
+            METRICS.add_rows(self.metric, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if self.metric:
+            METRICS.add_rows(self.metric, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if self.metric:
+            METRICS.add_rows(self.metric, len(rows))
+        return rows
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Conexão cujas instruções passam todas por InstrumentedCursor"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+def instrumented(func):
+    """Mede a duração de um handler da interface (síncrono ou async)"""
+    name = 'handler: ' + func.__name__
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                METRICS.observe(name, time.perf_counter() - started)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            METRICS.observe(name, elapsed)
+            logger.debug("%s em %.1f ms", func.__name__, elapsed * 1000)
+    return wrapper
+
+def is_busy_error(error):
+    """SQLITE_BUSY/SQLITE_LOCKED chegam como OperationalError com esta mensagem"""
+    message = str(error)
+    return isinstance(error, sqlite3.OperationalError) and ('locked' in message or 'busy' in message)
+
+def retry_busy(func, *args):
+    """Executa func repetindo com espera exponencial enquanto o banco estiver ocupado"""
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            return func(*args)
+        except sqlite3.OperationalError as ex:
+            if not is_busy_error(ex) or attempt == BUSY_RETRIES:
+                raise
+            delay = BUSY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+            logger.warning("Banco ocupado; nova tentativa em %.0f ms", delay * 1000)
+            time.sleep(delay)
+
+class Database:
+    """Conexões do app com o SQLite em modo WAL, compartilhadas por todas as sessões.
+    
+    Leituras usam um pool limitado de conexões somente leitura, que não bloqueiam nem
+    são bloqueadas pelas gravações. Gravações curtas entram na fila do escritor, que as
+    agrupa numa única transação (group commit); blocos longos usam write().
+    """
+
+    def __init__(self, path=DB_PATH, readers=READER_POOL_SIZE):
+        self.path = path
+        self.write_lock = threading.RLock()
+        self.archive_path = archive_path(path)
+        self.writer = self._connect()
+        self.writer.execute('PRAGMA journal_mode = WAL')
+        self.writer.execute('PRAGMA arquivo.journal_mode = WAL')
+        # Regras de prioridade alteradas: a repontuação fica para um job (schedule_prioridade_rescore)
+        self.prioridade_pendente = init_schema(self.writer)
+        for statement in split_sql(ARQUIVO_SCHEMA):
+            self.writer.execute(statement)
+        self.writer.commit()
+        self.readers = queue.Queue()
+        for _ in range(readers):
+            self.readers.put(self._connect(readonly=True))
+        # Conexão que só consulta PRAGMA data_version: como nunca grava, o valor muda a
+        # cada commit de qualquer conexão, inclusive de outros processos
+        self.version_conn = self._connect(readonly=True)
+        self.version_lock = threading.Lock()
+        self.write_count = 0
+        self.cache = {}
+        self.cache_lock = threading.Lock()
+        self.write_queue = queue.Queue()
+        self.writer_thread = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+        self.writer_thread.start()
+
+    def _connect(self, readonly=False):
+        # urllib.request (http, ssl, email) fica fora do import do módulo: o banco abre depois do login pintado
+        from urllib.request import pathname2url
+
+        uri = 'file:' + pathname2url(os.path.abspath(self.path))
+        if readonly:
+            uri += '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=BUSY_TIMEOUT,
+                               factory=InstrumentedConnection)
+        for pragma, value in DB_PRAGMAS.items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        # O arquivo é criado pela conexão escritora, a primeira a ser aberta
+        archive_uri = 'file:' + pathname2url(os.path.abspath(self.archive_path))
+        if readonly:
+            archive_uri += '?mode=ro'
+        conn.execute('ATTACH DATABASE ? AS arquivo', (archive_uri,))
+        conn.execute(SQL_VIEW_TODAS)
+        return conn
+
+    @contextmanager
+    def read(self):
+        """Empresta uma conexão somente leitura do pool"""
+        conn = self.readers.get()
+        try:
+            yield conn
+        finally:
+            self.readers.put(conn)
+
+    @contextmanager
+    def write(self):
+        """Executa um bloco de gravação numa transação da conexão escritora.
+        
+        Para importações e manutenção; dentro do bloco não chame run_write(), que espera o mesmo lock.
+        """
+        with self.write_lock:
+            retry_busy(self.writer.execute, 'BEGIN IMMEDIATE')
+            try:
+                yield self.writer
+                self.writer.commit()
+            except BaseException:
+                self.writer.rollback()
+                raise
+            finally:
+                self.write_count += 1
+
+    def run_write(self, func, *args):
+        """Enfileira func(conn, *args) para o escritor e aguarda o commit; retorna o resultado"""
+        future = Future()
+        self.write_queue.put((func, args, future))
+        return future.result()
+
+    def execute_write(self, sql, params=()):
+        """Executa uma instrução de gravação pela fila do escritor; retorna as linhas afetadas"""
+        return self.run_write(lambda conn: conn.execute(sql, params).rowcount)
+
+    def data_version(self):
+        """Versão dos dados: muda a cada commit, deste ou de outro processo"""
+        with self.version_lock:
+            version = self.version_conn.execute('PRAGMA data_version').fetchone()[0]
+        return version, self.write_count
+
+    def data_counter(self, name):
+        """Contador de versao_dados: muda só quando os triggers da migração 6 o incrementam"""
+        with self.version_lock:
+            rows = self.version_conn.execute('SELECT valor FROM versao_dados WHERE nome = ?', (name,)).fetchall()
+        return rows[0][0] if rows else None
+
+    def cached(self, key, compute, version=None):
+        """Resultado de compute() reaproveitado enquanto a versão dos dados não mudar.
+        
+        Sem version, qualquer commit invalida o resultado; com version (de data_counter, por
+        exemplo), só uma mudança nesse valor.
+        """
+        started = time.perf_counter()
+        # A versão é lida antes do cálculo: um commit durante o cálculo invalida o resultado
+        if version is None:
+            version = self.data_version()
+        with self.cache_lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] == version:
+                METRICS.observe('cache: acerto', time.perf_counter() - started)
+                return entry[1]
+        value = compute()
+        with self.cache_lock:
+            self.cache[key] = (version, value)
+        METRICS.observe('cache: falta', time.perf_counter() - started)
+        return value
+
+    def _writer_loop(self):
+        while True:
+            item = self.write_queue.get()
+            if item is None:
+                return
+            # Junta as gravações que chegaram enquanto o lote anterior era gravado
+            batch = [item]
+            while len(batch) < WRITE_BATCH_MAX:
+                try:
+                    item = self.write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.write_queue.put(None)
+                    break
+                batch.append(item)
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        """Grava um lote numa transação; cada item tem seu savepoint e falha sozinho"""
+        results = []
+        started = time.perf_counter()
+        try:
+            with self.write_lock:
+                retry_busy(self.writer.execute, 'BEGIN IMMEDIATE')
+                try:
+                    for func, args, future in batch:
+                        self.writer.execute('SAVEPOINT gravacao')
+                        try:
+                            results.append((future, func(self.writer, *args), None))
+                        except Exception as ex:
+                            self.writer.execute('ROLLBACK TO gravacao')
+                            results.append((future, None, ex))
+                        self.writer.execute('RELEASE gravacao')
+                    retry_busy(self.writer.commit)
+                except BaseException:
+                    self.writer.rollback()
+                    raise
+                finally:
+                    self.write_count += 1
+        except Exception as ex:
+            for _, _, future in batch:
+                future.set_exception(ex)
+            return
+        # Latência do lote e, em "linhas", quantas gravações couberam em cada commit
+        METRICS.observe('escritor: lote', time.perf_counter() - started, len(batch))
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        self.write_queue.put(None)
+        self.writer_thread.join()
+        while not self.readers.empty():
+            self.readers.get().close()
+        self.version_conn.close()
+        # Fechada por último, a conexão escritora faz o checkpoint e remove o -wal
+        with self.write_lock:
+            self.writer.close()
+
+DATABASES = {}
+DATABASES_LOCK = threading.Lock()
+
+def get_database(path=DB_PATH):
+    """Database único do processo para o arquivo; as sessões do modo web o compartilham"""
+    key = os.path.abspath(path)
+    with DATABASES_LOCK:
+        if key not in DATABASES:
+            DATABASES[key] = Database(path)
+        return DATABASES[key]
+
+PDF_CACHES = {}
+PDF_CACHES_LOCK = threading.Lock()
+
+def get_pdf_cache(directory=PDF_DIR):
+    """Cache de PDFs único do processo para o diretório (um só manifesto por diretório)"""
+    key = os.path.abspath(directory)
+    with PDF_CACHES_LOCK:
+        if key not in PDF_CACHES:
+            PDF_CACHES[key] = cache_pdf_social.CachePDF(directory)
+            # Os usos registrados só na memória vão para o manifesto na saída do processo
+            atexit.register(PDF_CACHES[key].flush)
+        return PDF_CACHES[key]
+
+def render_ficha_pdf(inscricao, filename, progress=None):
+    """Renderiza a ficha de inscrição em PDF e retorna o caminho do arquivo"""
+    # reportlab só é importado quando o primeiro PDF é gerado, fora da abertura do app
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors as pdf_colors
+
+    doc = SimpleDocTemplate(filename, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Título
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1
+    )
+    story.append(Paragraph("PROGRAMA SOCIAL - FICHA DE INSCRIÇÃO", title_style))
+    
+    # Dados da inscrição
+    data = [
+        ['Campo', 'Informação'],
+        ['Nome Completo', inscricao.nome_completo],
+        ['Idade', f"{inscricao.idade} anos"],
+        ['Gênero', inscricao.genero],
+        ['CPF', inscricao.cpf or 'Não informado'],
+        ['Endereço', inscricao.endereco],
+        ['Telefone', inscricao.telefone or 'Não informado'],
+        ['Email', inscricao.email or 'Não informado'],
+        ['Renda Familiar', f"R$ {inscricao.renda_familiar:.2f}"],
+        ['Membros da Família', str(inscricao.membros_familia)],
+        ['Despesas Mensais', f"R$ {inscricao.despesas_mensais:.2f}"],
+        ['Escolaridade', inscricao.escolaridade],
+        ['Situacao de Moradia', inscricao.situacao_moradia],
+        ['Observacoes', inscricao.observacoes or 'Nenhuma'],
+        ['Status', inscricao.status],
+        ['Data de Cadastro', inscricao.created_at]
+    ]
+    
+    table = Table(data, colWidths=[2*inch, 4*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), pdf_colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), pdf_colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), pdf_colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, pdf_colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ]))
+    
+    story.append(table)
+    story.append(Spacer(1, 20))
+    
+    # Rodapé
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=8,
+        alignment=1
+    )
+    story.append(Paragraph(f"Documento gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}", footer_style))
+    
+    if progress:
+        doc.setProgressCallBack(build_progress_callback(progress))
+    doc.build(story)
+    return filename
+
+RELATORIO_HEADER = ['ID', 'Nome', 'Idade', 'Renda Familiar', 'Status', 'Data Cadastro']
+
+# Largura das colunas do relatório, em polegadas
+RELATORIO_COL_WIDTHS = [0.5, 2, 0.7, 1, 1, 1]
+
+# Altura (pontos) do cabeçalho e das linhas da tabela do relatório: entrelinha de 12 com 3 de
+# padding em cima e embaixo (12 embaixo do cabeçalho), as medidas do Table do reportlab
+RELATORIO_HEADER_HEIGHT = 27
+RELATORIO_ROW_HEIGHT = 18
+
+# Margem das páginas do relatório (pontos): a do SimpleDocTemplate (72) mais o padding do frame (6)
+RELATORIO_MARGEM = 78
+
+def relatorio_row(inscricao):
+    """Converte uma inscrição em uma linha da tabela do relatório completo"""
+    return [
+        str(inscricao.id),
+        inscricao.nome_completo[:25] + '...' if len(inscricao.nome_completo) > 25 else inscricao.nome_completo,
+        str(inscricao.idade),
+        f"R$ {inscricao.renda_familiar:.2f}",
+        inscricao.status,
+        inscricao.created_at[:10]
+    ]
+
+@functools.lru_cache(maxsize=4096)
+def relatorio_text_width(value):
+    """Metade da largura de um texto das linhas do relatório (Helvetica 8), para centralizá-lo"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(value, 'Helvetica', 8) / 2
+
+def draw_relatorio_table(canv, rows, x, top):
+    """Desenha direto no canvas um segmento da tabela do relatório (cabeçalho e linhas) com o topo
+    em top; retorna a altura ocupada"""
+    from reportlab.lib import colors as pdf_colors
+    from reportlab.lib.units import inch
+
+    edges = [x]
+    for width in RELATORIO_COL_WIDTHS:
+        edges.append(edges[-1] + width * inch)
+    centers = [(left + right) / 2 for left, right in zip(edges, edges[1:])]
+    header_bottom = top - RELATORIO_HEADER_HEIGHT
+    bottom = header_bottom - RELATORIO_ROW_HEIGHT * len(rows)
+
+    canv.setFillColor(pdf_colors.grey)
+    canv.rect(x, header_bottom, edges[-1] - x, RELATORIO_HEADER_HEIGHT, stroke=0, fill=1)
+    if rows:
+        canv.setFillColor(pdf_colors.beige)
+        canv.rect(x, bottom, edges[-1] - x, header_bottom - bottom, stroke=0, fill=1)
+
+    # Texto centralizado na coluna, na linha de base do alinhamento BOTTOM do Table
+    canv.setFillColor(pdf_colors.whitesmoke)
+    canv.setFont('Helvetica-Bold', 10)
+    for center, text in zip(centers, RELATORIO_HEADER):
+        canv.drawCentredString(center, header_bottom + 14, text)
+    # Um objeto de texto por coluna, com a entrelinha igual à altura da linha: textLine desce
+    # uma linha sem escrever coordenadas, e a posição só é corrigida (Td) quando a largura do
+    # valor muda, o que nas colunas de data, idade, id e renda é raro
+    for column, center in enumerate(centers):
+        text = canv.beginText(center, header_bottom - RELATORIO_ROW_HEIGHT + 7)
+        text.setFillColor(pdf_colors.black)
+        text.setFont('Helvetica', 8, RELATORIO_ROW_HEIGHT)
+        line_x = center
+        for row in rows:
+            x = center - relatorio_text_width(row[column])
+            if x != line_x:
+                text.moveCursor(x - line_x, 0)
+                line_x = x
+            text.textLine(row[column])
+        canv.drawText(text)
+
+    canv.setStrokeColor(pdf_colors.black)
+    canv.setLineWidth(1)
+    canv.grid(edges, [bottom + RELATORIO_ROW_HEIGHT * i for i in range(len(rows) + 1)] + [top])
+    return top - bottom
+
+def iter_rows(cursor, chunk_rows):
+    """Percorre o cursor em blocos com fetchmany"""
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield from rows
+
+def export_relatorio_streaming(conn, filename_base, volume_rows=0, chunk_rows=EXPORT_CHUNK_ROWS, progress=None,
+                               com_arquivo=False):
+    """Exporta o relatório completo lendo o cursor em blocos, com memória limitada.
+    
+    Cada página é desenhada direto no canvas com as linhas que cabem nela (cabeçalho repetido) e
+    fechada em seguida: só as linhas da página atual e o bloco do fetchmany ficam em memória.
+    Com volume_rows > 0 o relatório é dividido em volumes numerados de até volume_rows linhas.
+    Com com_arquivo, inclui as inscrições arquivadas (view inscricoes_todas).
+    Retorna a lista de arquivos gerados.
+    """
+    from reportlab import rl_config
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.platypus import Paragraph
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    total = conn.execute('SELECT COALESCE(SUM(total), 0) FROM resumo_inscricoes').fetchone()[0]
+    if com_arquivo:
+        total += conn.execute('SELECT COUNT(*) FROM arquivo.inscricoes').fetchone()[0]
+    cursor = inscricao_cursor(conn)
+    cursor.execute(SQL_EXPORT_COM_ARQUIVO if com_arquivo else SQL_EXPORT_TODAS)
+    rows = iter_rows(cursor, chunk_rows)
+    
+    volume_rows = volume_rows if volume_rows and volume_rows > 0 else max(total, 1)
+    volumes = max(-(-total // volume_rows), 1)
+    generated_at = datetime.now()
+    done = 0
+    filenames = []
+    
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1
+    )
+    footer_style = ParagraphStyle(
+        'Footer',
+        parent=styles['Normal'],
+        fontSize=8,
+        alignment=1
+    )
+    
+    # Páginas só comprimidas, sem a codificação ASCII85 por cima (sem o acelerador C do reportlab
+    # ela custa quase tanto quanto desenhar a página)
+    rl_config.useA85 = 0
+    page_width, page_height = letter
+    width = page_width - 2 * RELATORIO_MARGEM
+    top, bottom = page_height - RELATORIO_MARGEM, RELATORIO_MARGEM
+    table_x = (page_width - sum(RELATORIO_COL_WIDTHS) * inch) / 2
+    
+    def draw(canv, flowable, y):
+        """Desenha um parágrafo com o topo em y; retorna a altura dele"""
+        height = flowable.wrapOn(canv, width, y - bottom)[1]
+        flowable.drawOn(canv, RELATORIO_MARGEM, y - height)
+        return height
+    
+    for volume in range(1, volumes + 1):
+        filename = f"{filename_base}.pdf" if volumes == 1 else f"{filename_base}_vol{volume:03d}.pdf"
+        canv = Canvas(filename, pagesize=letter)
+        
+        if volumes == 1:
+            subtitle = Paragraph(f"Total de Inscrições: {total}", styles['Normal'])
+        else:
+            first = (volume - 1) * volume_rows + 1
+            last = min(volume * volume_rows, total)
+            subtitle = Paragraph(
+                f"Total de Inscrições: {total} - Volume {volume} de {volumes} (inscrições {first} a {last})",
+                styles['Normal']
+            )
+        y = top
+        y -= draw(canv, Paragraph("PROGRAMA SOCIAL - RELATÓRIO COMPLETO", title_style), y) + title_style.spaceAfter
+        y -= draw(canv, subtitle, y) + 20
+        
+        remaining = volume_rows
+        while remaining > 0:
+            capacity = max(int((y - bottom - RELATORIO_HEADER_HEIGHT) // RELATORIO_ROW_HEIGHT), 1)
+            segment = [relatorio_row(inscricao) for inscricao in itertools.islice(rows, min(capacity, remaining))]
+            if not segment:
+                break
+            y -= draw_relatorio_table(canv, segment, table_x, y)
+            remaining -= len(segment)
+            done += len(segment)
+            if progress:
+                progress(min(done / max(total, 1), 0.99))
+            if remaining > 0 and len(segment) == capacity:
+                canv.showPage()
+                y = top
+        
+        footer = Paragraph(f"Relatório gerado em {generated_at.strftime('%d/%m/%Y às %H:%M')}", footer_style)
+        y -= 20
+        if y - footer.wrapOn(canv, width, page_height)[1] < bottom:
+            canv.showPage()
+            y = top
+        draw(canv, footer, y)
+        canv.save()
+        filenames.append(filename)
+    
+    if progress:
+        progress(1.0)
+    return filenames
+
+SQL_RELATORIO_VERSAO = "SELECT valor FROM versao_dados WHERE nome = 'relatorio'"
+
+# Retrato do arquivo para o relatório com as arquivadas: a cópia de um lote (arquivado_em novo)
+# e o descarte de cópias mudam o arquivo sem passar pelos triggers de inscricoes
+SQL_RELATORIO_ARQUIVO = 'SELECT COUNT(*), MAX(arquivado_em) FROM arquivo.inscricoes'
+
+def relatorio_cache_key(conn, volume_rows=0, com_arquivo=False):
+    """Chave do relatório completo no cache de PDFs, sem ler as inscrições.
+    
+    Parte da versão 'relatorio' de versao_dados, trocada pelos triggers da migração 12 sempre que
+    uma inscrição entra, sai ou muda uma coluna que o relatório mostra; com o arquivo, entram
+    também a contagem e o último arquivamento das inscrições arquivadas.
+    """
+    partes = [PDF_LAYOUT_VERSAO, max(volume_rows or 0, 0), bool(com_arquivo), conn.execute(SQL_RELATORIO_VERSAO).fetchone()[0]]
+    if com_arquivo:
+        partes.extend(conn.execute(SQL_RELATORIO_ARQUIVO).fetchone())
+    return 'relatorio:' + hashlib.sha256(repr(tuple(partes)).encode()).hexdigest()
+
+def export_relatorio_cached(conn, cache, filename_base, volume_rows=0, progress=None, com_arquivo=False):
+    """Relatório completo pelo cache de PDFs: sem mudança nos dados, os arquivos da exportação anterior.
+    
+    Retorna (arquivos, veio do cache).
+    """
+    # Chave e renderização no mesmo retrato do banco: o arquivo gravado corresponde à chave
+    own_transaction = not conn.in_transaction
+    if own_transaction:
+        conn.execute('BEGIN')
+        conn.execute('SELECT 1 FROM resumo_inscricoes LIMIT 1').fetchall()
+    try:
+        chave = relatorio_cache_key(conn, volume_rows, com_arquivo)
+        filenames = cache.get(chave)
+        if filenames:
+            if progress:
+                progress(1.0)
+            return filenames, True
+        filenames = export_relatorio_streaming(conn, filename_base, volume_rows, progress=progress,
+                                               com_arquivo=com_arquivo)
+    finally:
+        if own_transaction:
+            conn.commit()
+    cache.put(chave, filenames)
+    return filenames, False
+
+def ficha_filename(inscricao):
+    """Nome do arquivo da ficha de uma inscrição, com o início da sua chave no cache de PDFs.
+    
+    Cada versão da ficha vai para outro arquivo: gerar a ficha de uma inscrição alterada não
+    sobrescreve o arquivo que outra entrada do cache (ou um leitor de PDF aberto) ainda usa.
+    """
+    digest = ficha_cache_key(inscricao).split(':', 1)[1][:12]
+    return f"inscricao_{inscricao.id}_{inscricao.nome_completo.replace(' ', '_')}_{digest}.pdf"
+
+def ficha_cache_key(inscricao):
+    """Chave da ficha no cache de PDFs: hash de todas as colunas que ela mostra (inclusive id e updated_at)"""
+    valores = tuple(getattr(inscricao, column) for column in INSCRICAO_COLUMN_NAMES)
+    return 'ficha:' + hashlib.sha256(repr((PDF_LAYOUT_VERSAO, valores)).encode()).hexdigest()
+
+def ficha_pdf_cached(inscricao, cache, progress=None):
+    """Caminho da ficha da inscrição, renderizada só se os dados mudaram desde a última geração"""
+    chave = ficha_cache_key(inscricao)
+    filenames = cache.get(chave)
+    if filenames:
+        return filenames[0]
+    os.makedirs(cache.directory, exist_ok=True)
+    filename = os.path.join(cache.directory, ficha_filename(inscricao))
+    render_ficha_pdf(inscricao, filename, progress)
+    cache.put(chave, [filename])
+    return filename
+
+def _render_ficha_worker(task):
+    """Renderiza uma ficha num processo do pool; sem destino, devolve os bytes do PDF"""
+    inscricao, filename = task
+    if filename:
+        render_ficha_pdf(inscricao, filename)
+        return ficha_filename(inscricao), None
+    buffer = io.BytesIO()
+    render_ficha_pdf(inscricao, buffer)
+    return ficha_filename(inscricao), buffer.getvalue()
+
+def build_fichas_query(status=None, date_from=None, date_to=None):
+    """Monta a consulta das inscrições de um lote de fichas (datas no formato AAAA-MM-DD)"""
+    where = []
+    params = []
+    if status and status != "Todos":
+        where.append('status = ?')
+        params.append(status)
+    if date_from:
+        where.append('created_at >= ?')
+        params.append(datetime.strptime(date_from, '%Y-%m-%d').strftime('%Y-%m-%d'))
+    if date_to:
+        # Inclui o dia final inteiro
+        end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+        where.append('created_at < ?')
+        params.append(end.strftime('%Y-%m-%d'))
+    sql = 'FROM inscricoes'
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    return sql, params
+
+def generate_fichas_lote(conn, status=None, date_from=None, date_to=None, zip_path=None,
+                         workers=None, progress=None, cache=None):
+    """Gera em paralelo, num pool de processos, a ficha de cada inscrição do filtro.
+    
+    As fichas passam pelo cache de PDFs (por padrão o de PDF_DIR): as que já estão nele são
+    reaproveitadas e as novas são registradas no manifesto, em vez de sobrescrever arquivos que
+    ele aponta. Com zip_path, vão direto para um arquivo .zip (as novas sem passar pelo disco).
+    Retorna (quantidade, segundos, destino).
+    """
+    cache = cache or get_pdf_cache(PDF_DIR)
+    where_sql, params = build_fichas_query(status, date_from, date_to)
+    total = conn.execute('SELECT COUNT(*) ' + where_sql, params).fetchone()[0]
+    cursor = inscricao_cursor(conn)
+    cursor.execute(f'SELECT {INSCRICAO_COLUMNS} ' + where_sql + ' ORDER BY created_at, id', params)
+    
+    os.makedirs(cache.directory, exist_ok=True)
+    archive = zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) if zip_path else None
+    done = 0
+    reused = 0
+    start = time.perf_counter()
+    
+    # spawn: o processo principal tem threads do Flet, e fork com threads ativas não é seguro
+    executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                   mp_context=multiprocessing.get_context('spawn'))
+    try:
+        while True:
+            rows = cursor.fetchmany(FICHAS_BATCH_ROWS)
+            if not rows:
+                break
+            chaves = [ficha_cache_key(row) for row in rows]
+            cached = cache.get_many(chaves)
+            tasks = []
+            pending = []
+            for row, chave in zip(rows, chaves):
+                if chave in cached:
+                    if archive:
+                        archive.write(cached[chave][0], ficha_filename(row))
+                    reused += 1
+                    continue
+                tasks.append((row, None if archive else os.path.join(cache.directory, ficha_filename(row))))
+                pending.append(chave)
+            rendered = []
+            for chave, task, (name, content) in zip(pending, tasks,
+                                                     executor.map(_render_ficha_worker, tasks, chunksize=8)):
+                if archive:
+                    archive.writestr(name, content)
+                else:
+                    rendered.append((chave, [task[1]]))
+            if rendered:
+                cache.put_many(rendered)
+            done += len(rows)
+            if progress:
+                progress(min(done / max(total, 1), 0.99))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        if archive:
+            archive.close()
+    
+    if reused:
+        logger.info("Fichas em lote: %d de %d reaproveitadas do cache de PDFs", reused, done)
+    if progress:
+        progress(1.0)
+    return done, time.perf_counter() - start, zip_path or cache.directory
+
+# Colunas gravadas a partir do formulário ou de uma importação, na ordem do INSERT
+INSCRICAO_FIELDS = [
+    'nome_completo', 'idade', 'genero', 'cpf', 'endereco', 'telefone', 'email',
+    'renda_familiar', 'membros_familia', 'despesas_mensais', 'escolaridade',
+    'situacao_moradia', 'observacoes'
+]
+
+REQUIRED_FIELDS = [
+    'nome_completo', 'idade', 'genero', 'endereco', 
+    'renda_familiar', 'membros_familia', 'despesas_mensais', 
+    'escolaridade', 'situacao_moradia'
+]
+
+# Colunas do INSERT: os campos e as chaves de duplicidade calculadas a partir deles
+INSCRICAO_INSERT_COLUMNS = INSCRICAO_FIELDS + ['chave_nome', 'chave_endereco']
+
+SQL_INSERT_INSCRICAO = inscricao_insert_sql(INSCRICAO_INSERT_COLUMNS)
+
+# Lote da importação, carregado numa tabela temporária da conexão escritora (sem índices nem
+# triggers) e levado a inscricoes por um único INSERT ... SELECT; linha é a posição no lote
+SQL_IMPORTACAO_LOTE = f'''
+    CREATE TEMP TABLE IF NOT EXISTS importacao_lote (
+        linha INTEGER PRIMARY KEY, {', '.join(INSCRICAO_INSERT_COLUMNS)}
+    )
+'''
+
+SQL_IMPORTACAO_CARGA = f'''
+    INSERT INTO temp.importacao_lote VALUES (?, {', '.join('?' for _ in INSCRICAO_INSERT_COLUMNS)})
+'''
+
+# {filtro}: vazio para o lote inteiro ou 'WHERE linha = ?' para gravar linha a linha
+SQL_IMPORTACAO_INSERT = f'''
+    INSERT INTO main.inscricoes ({', '.join(INSCRICAO_INSERT_COLUMNS)}, prioridade)
+    SELECT {', '.join(INSCRICAO_INSERT_COLUMNS)}, {prioridade_expression()}
+    FROM temp.importacao_lote {{filtro}}
+    ORDER BY linha
+'''
+
+# Triggers de INSERT em inscricoes removidos durante o INSERT ... SELECT de um lote e recriados na
+# mesma transação, com o comando que faz o mesmo trabalho de uma vez para as inscrições do lote
+# (id maior que o último antes dele)
+IMPORTACAO_TRIGGERS = {
+    'trg_resumo_insert': '''
+        INSERT INTO resumo_inscricoes (status, total, soma_renda_centavos, soma_membros)
+        SELECT status, COUNT(*), SUM(CAST(ROUND(renda_familiar * 100) AS INTEGER)), SUM(membros_familia)
+        FROM main.inscricoes WHERE id > ?
+        GROUP BY status
+        ON CONFLICT (status) DO UPDATE SET
+            total = total + excluded.total,
+            soma_renda_centavos = soma_renda_centavos + excluded.soma_renda_centavos,
+            soma_membros = soma_membros + excluded.soma_membros
+    ''',
+    'trg_fts_insert': '''
+        INSERT INTO inscricoes_fts (rowid, nome_completo, endereco, observacoes)
+        SELECT id, nome_completo, endereco, observacoes FROM main.inscricoes WHERE id > ?
+    ''',
+    'trg_versao_analises_insert': '''
+        UPDATE versao_dados SET valor = valor + 1
+        WHERE nome = 'analises' AND EXISTS (SELECT 1 FROM main.inscricoes WHERE id > ?)
+    ''',
+    'trg_versao_relatorio_insert': '''
+        UPDATE versao_dados SET valor = random()
+        WHERE nome = 'relatorio' AND EXISTS (SELECT 1 FROM main.inscricoes WHERE id > ?)
+    ''',
+}
+
+def parse_money(value):
+    """Converte valores como 'R$ 1.234,56', '1234,56' ou '1234.56' em float"""
+    value = str(value).replace('R$', '').strip()
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    return float(value)
+
+def parse_inscricao(values):
+    """Valida um dicionário de campos e devolve a tupla de parâmetros do INSERT.
+    
+    Aplica as mesmas regras de campos obrigatórios do formulário; levanta ValueError.
+    As chaves de duplicidade vão no fim da tupla (INSCRICAO_INSERT_COLUMNS).
+    """
+    for field in REQUIRED_FIELDS:
+        value = values.get(field)
+        if value is None or not str(value).strip():
+            raise ValueError(f"Campo '{field}' é obrigatório")
+    
+    def optional(field):
+        value = values.get(field)
+        if value is None:
+            return None
+        value = str(value).strip()
+        return value or None
+    
+    try:
+        idade = int(values['idade'])
+        membros = int(values['membros_familia'])
+    except (TypeError, ValueError):
+        raise ValueError("Idade e membros da família devem ser números inteiros")
+    try:
+        renda = parse_money(values['renda_familiar'])
+        despesas = parse_money(values['despesas_mensais'])
+    except ValueError:
+        raise ValueError("Renda familiar e despesas mensais devem ser valores numéricos")
+    
+    nome = str(values['nome_completo']).strip()
+    endereco = str(values['endereco']).strip()
+    return (
+        nome,
+        idade,
+        str(values['genero']).strip(),
+        optional('cpf'),
+        endereco,
+        optional('telefone'),
+        optional('email'),
+        renda,
+        membros,
+        despesas,
+        str(values['escolaridade']).strip(),
+        str(values['situacao_moradia']).strip(),
+        optional('observacoes')
+    ) + duplicidades_social.duplicate_keys(nome, endereco)
+
+def read_json_array(text, block_size=65536):
+    """Elementos de um array JSON (o texto logo após o '['), decodificados um a um em blocos de texto"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    count = 0
+    while True:
+        # Espaços e a vírgula entre os elementos
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos == len(buffer):
+            buffer, pos = text.read(block_size), 0
+            if not buffer:
+                raise ValueError("Array JSON sem o ']' final")
+            continue
+        if buffer[pos] == ']':
+            return
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as ex:
+                more = text.read(block_size)
+                if not more:
+                    raise ValueError(f"JSON inválido depois do elemento {count} do array: {ex.msg}")
+            else:
+                # Um número no fim do bloco pode continuar no próximo
+                if end < len(buffer):
+                    break
+                more = text.read(block_size)
+                if not more:
+                    break
+            buffer, pos = buffer[pos:] + more, 0
+        count += 1
+        yield element
+        pos = end
+
+def read_import_file(path):
+    """Lê um arquivo CSV, JSON (array de objetos) ou JSON Lines registro a registro, sem carregá-lo inteiro.
+    
+    Produz (número da linha, ou do elemento no array JSON, dicionário de campos, posição em bytes no arquivo).
+    """
+    raw = open(path, 'rb')
+    text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        if path.lower().endswith(('.jsonl', '.ndjson', '.json')):
+            start = text.read(1)
+            while start.isspace():
+                start = text.read(1)
+            if start == '[':
+                for number, element in enumerate(read_json_array(text), start=1):
+                    if not isinstance(element, dict):
+                        element = {'_erro': "Cada elemento do array deve ser um objeto JSON", '_linha': element}
+                    yield number, element, raw.tell()
+                return
+            text.seek(0)
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as ex:
+                    record = {'_erro': f"JSON inválido: {ex.msg}", '_linha': line.strip()}
+                if not isinstance(record, dict):
+                    record = {'_erro': "Cada linha deve ser um objeto JSON", '_linha': line.strip()}
+                yield number, record, raw.tell()
+        else:
+            # Planilhas brasileiras costumam exportar CSV separado por ponto e vírgula
+            sample = text.read(8192)
+            text.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            reader = csv.DictReader(text, dialect=dialect)
+            for record in reader:
+                yield reader.line_num, record, raw.tell()
+    finally:
+        text.close()
+
+def insert_import_batch(conn, rows, reject):
+    """Grava um lote validado da importação: [(número da linha, registro, parâmetros do INSERT)].
+    
+    O lote vai para a tabela temporária e dela para inscricoes num único INSERT ... SELECT, com os
+    triggers de IMPORTACAO_TRIGGERS trocados pelos seus comandos de lote. Se o banco recusar alguma
+    linha (restrição violada), o lote é gravado linha a linha e só as recusadas vão para reject().
+    Retorna quantas inscrições foram gravadas.
+    """
+    conn.execute(SQL_IMPORTACAO_LOTE)
+    conn.execute('DELETE FROM temp.importacao_lote')
+    conn.executemany(SQL_IMPORTACAO_CARGA, [(linha,) + params for linha, (_, _, params) in enumerate(rows)])
+    last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM main.inscricoes').fetchone()[0]
+    triggers = conn.execute(
+        f"SELECT name, sql FROM main.sqlite_master WHERE type = 'trigger' "
+        f"AND name IN ({', '.join('?' for _ in IMPORTACAO_TRIGGERS)})", tuple(IMPORTACAO_TRIGGERS)
+    ).fetchall()
+    for name, _ in triggers:
+        conn.execute(f'DROP TRIGGER main.{name}')
+    try:
+        inserted = conn.execute(SQL_IMPORTACAO_INSERT.format(filtro='')).rowcount
+    except sqlite3.IntegrityError:
+        # Só o comando que falhou é desfeito; a transação do lote continua
+        inserted = 0
+        insert_row = SQL_IMPORTACAO_INSERT.format(filtro='WHERE linha = ?')
+        for linha, (number, record, _) in enumerate(rows):
+            try:
+                inserted += conn.execute(insert_row, (linha,)).rowcount
+            except sqlite3.IntegrityError as ex:
+                reject(number, record, f"Recusada pelo banco: {ex}")
+    for name, sql in triggers:
+        conn.execute(IMPORTACAO_TRIGGERS[name], (last_id,))
+        conn.execute(sql)
+    conn.execute('DELETE FROM temp.importacao_lote')
+    return inserted
+
+def import_inscricoes(db, path, errors_path=None, batch_size=IMPORT_BATCH_ROWS, progress=None):
+    """Importa inscrições de CSV, JSON ou JSON Lines em lotes (insert_import_batch).
+    
+    Cada lote é gravado numa única transação de db.write(); linhas rejeitadas vão para errors_path
+    (CSV com o número da linha, o motivo e os dados originais). Um CPF já inscrito (ou repetido no
+    arquivo) rejeita a linha; as duplicatas por nome e endereço ficam para a busca de duplicidades.
+    Retorna (importadas, rejeitadas, segundos).
+    """
+    total_bytes = max(os.path.getsize(path), 1)
+    errors_path = errors_path or os.path.splitext(path)[0] + '_erros.csv'
+    errors_file = None
+    errors_writer = None
+    imported = rejected = 0
+    batch = []
+    cpfs_lote = {}
+    cpf_index = INSCRICAO_INSERT_COLUMNS.index('cpf')
+    start = time.perf_counter()
+    
+    def reject(number, record, message):
+        nonlocal rejected, errors_file, errors_writer
+        rejected += 1
+        if errors_writer is None:
+            errors_file = open(errors_path, 'w', encoding='utf-8', newline='')
+            errors_writer = csv.writer(errors_file)
+            errors_writer.writerow(['linha', 'erro', 'dados'])
+        errors_writer.writerow([number, message, json.dumps(record, ensure_ascii=False)])
+    
+    def flush():
+        nonlocal imported
+        if not batch:
+            return
+        cpfs = [duplicidades_social.normalize_cpf(params[cpf_index]) for _, _, params in batch]
+        with db.write() as conn:
+            # Uma consulta ao índice único de CPF por lote
+            inscritos = dict(conn.execute(SQL_DUPLICIDADE_CPFS, (json.dumps([cpf for cpf in cpfs if cpf]),)))
+            rows = []
+            for row, cpf in zip(batch, cpfs):
+                if cpf in inscritos:
+                    reject(row[0], row[1], f"CPF já inscrito na inscrição #{inscritos[cpf]}")
+                else:
+                    rows.append(row)
+            imported += insert_import_batch(conn, rows, reject)
+        batch.clear()
+        cpfs_lote.clear()
+    
+    try:
+        for number, record, position in read_import_file(path):
+            try:
+                if '_erro' in record:
+                    raise ValueError(record['_erro'])
+                params = parse_inscricao(record)
+                cpf = duplicidades_social.normalize_cpf(params[cpf_index])
+                if cpf in cpfs_lote:
+                    raise ValueError(f"CPF repetido no arquivo (linha {cpfs_lote[cpf]})")
+                if cpf:
+                    cpfs_lote[cpf] = number
+                batch.append((number, record, params))
+            except ValueError as ex:
+                reject(number, record, str(ex))
+            
+            if len(batch) >= batch_size:
+                flush()
+                if progress:
+                    progress(min(position / total_bytes, 0.99))
+        flush()
+    finally:
+        if errors_file:
+            errors_file.close()
+    
+    if progress:
+        progress(1.0)
+    return imported, rejected, time.perf_counter() - start
+
+def build_progress_callback(progress):
+    """Converte os eventos de progresso do reportlab em uma fração de 0 a 1"""
+    state = {'flowables': 1}
+
+    def on_progress(event, value):
+        if event == 'SIZE_EST':
+            state['flowables'] = max(value, 1)
+        elif event == 'PROGRESS':
+            progress(value / state['flowables'])
+        elif event == 'FINISHED':
+            progress(1.0)
+
+    return on_progress
+
+class JobCancelado(Exception):
+    """Levantada dentro de um job quando o usuário o cancela"""
+
+class Job:
+    """Uma tarefa em segundo plano na fila de jobs"""
+
+    def __init__(self, key, descricao):
+        self.key = key
+        self.descricao = descricao
+        self.progress = 0.0
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.on_progress = None
+
+    def report(self, fraction):
+        """Registra o avanço do job; interrompe-o se foi cancelado"""
+        if self.cancel_event.is_set():
+            raise JobCancelado(self.descricao)
+        if fraction - self.progress >= 0.01 or fraction >= 1.0:
+            self.progress = fraction
+            if self.on_progress:
+                self.on_progress(self)
+
+class JobQueue:
+    """Fila de tarefas longas (PDFs, importações) executada por um pool de threads, fora dos handlers da interface"""
+
+    def __init__(self, max_workers=2, on_change=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.on_change = on_change
+
+    def submit(self, key, descricao, run, on_finish):
+        """Agenda run(job); retorna None se já existe um job com a mesma chave"""
+        with self.lock:
+            if key in self.jobs:
+                return None
+            job = Job(key, descricao)
+            job.on_progress = self.notify
+            self.jobs[key] = job
+            job.future = self.executor.submit(self._run, job, run, on_finish)
+        self.notify(job)
+        return job
+
+    def cancel(self, key):
+        """Cancela um job na fila ou em andamento"""
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is None:
+                return
+            job.cancel_event.set()
+            # Se ainda não começou, sai da fila imediatamente
+            if job.future.cancel():
+                del self.jobs[key]
+        self.notify(job)
+
+    def active_jobs(self):
+        with self.lock:
+            return list(self.jobs.values())
+
+    def notify(self, job):
+        if self.on_change:
+            self.on_change(job)
+
+    def _run(self, job, run, on_finish):
+        result = error = None
+        started = time.perf_counter()
+        try:
+            result = run(job)
+        except Exception as ex:
+            error = ex
+        finally:
+            METRICS.observe(f"job: {job.key[0]}", time.perf_counter() - started)
+            with self.lock:
+                self.jobs.pop(job.key, None)
+        self.notify(job)
+        on_finish(job, result, error)
 
 class ProgramaSocialApp:
     def __init__(self, page: ft.Page):
@@ -16,58 +2646,69 @@ class ProgramaSocialApp:
         self.current_user = None
         self.current_view = "login"
         self.inscricoes_data = []
-        self.init_database()
+        self.list_filter = "Todos"
+        self.list_search = None
+        self.list_criterios = None
+        self.list_cursor = None
+        self.list_exhausted = True
+        self.list_lock = threading.Lock()
+        self.list_cards = {}
+        self.list_checkboxes = {}
+        self.list_selected = set()
+        self.list_select_all = False
+        self.jobs = JobQueue(max_workers=2, on_change=self.on_jobs_change)
+        self.jobs_panel_rows = {}
+        self.jobs_panel_updated = 0.0
+        self.jobs_panel_lock = threading.Lock()
         self.setup_page()
+        self.init_database()
         
     def init_database(self):
-        """Inicializa o banco de dados SQLite"""
-        self.conn = sqlite3.connect('programa_social.db', check_same_thread=False)
-        cursor = self.conn.cursor()
-        
-        # Tabela de usuários (administradores)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
-                senha TEXT NOT NULL,
-                nome TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Tabela de inscrições
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inscricoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome_completo TEXT NOT NULL,
-                idade INTEGER NOT NULL,
-                genero TEXT NOT NULL,
-                cpf TEXT,
-                endereco TEXT NOT NULL,
-                telefone TEXT,
-                email TEXT,
-                renda_familiar REAL NOT NULL,
-                membros_familia INTEGER NOT NULL,
-                despesas_mensais REAL NOT NULL,
-                escolaridade TEXT NOT NULL,
-                situacao_moradia TEXT NOT NULL,
-                observacoes TEXT,
-                status TEXT DEFAULT 'Pendente',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Criar usuário admin padrão se não existir
-        cursor.execute('SELECT COUNT(*) FROM usuarios WHERE email = ?', ('admin@programa.gov.br',))
-        if cursor.fetchone()[0] == 0:
-            senha_hash = hashlib.sha256('admin123'.encode()).hexdigest()
-            cursor.execute('''
-                INSERT INTO usuarios (email, senha, nome) 
-                VALUES (?, ?, ?)
-            ''', ('admin@programa.gov.br', senha_hash, 'Administrador'))
-        
-        self.conn.commit()
+        """Abre o banco numa thread, depois de pintar o login: as migrações e a verificação do
+        esquema não atrasam a primeira tela"""
+        self.database = Future()
+
+        def open_database():
+            try:
+                self.database.set_result(get_database(DB_PATH))
+            except Exception as ex:
+                logger.exception("Erro ao abrir o banco %s", DB_PATH)
+                self.database.set_exception(ex)
+                return
+            self.schedule_prioridade_rescore()
+
+        threading.Thread(target=open_database, name='db-abertura', daemon=True).start()
+
+    def schedule_prioridade_rescore(self):
+        """Agenda a repontuação das inscrições se as regras de prioridade mudaram (uma vez por processo)"""
+        db = self.db
+        with db.cache_lock:
+            if not db.prioridade_pendente:
+                return
+            db.prioridade_pendente = False
+
+        def on_finish(job, result, error):
+            if error is not None:
+                # Regras ainda não registradas como aplicadas: a próxima sessão agenda de novo
+                db.prioridade_pendente = True
+                if not isinstance(error, JobCancelado):
+                    logger.error("Erro na repontuação da fila de prioridade: %s", error)
+                return
+            if self.current_user:
+                self.show_snackbar(f"Fila de prioridade atualizada com as novas regras ({result} inscrições repontuadas)", "green")
+
+        self.jobs.submit(('prioridade',), "Repontuação da fila de prioridade",
+                         lambda job: rescore_prioridade(db, progress=job.report), on_finish)
+
+    @property
+    def db(self):
+        """Database do app; até a abertura terminar, quem o usa (o primeiro login) espera por ela"""
+        return self.database.result()
+
+    @db.setter
+    def db(self, db):
+        self.database = Future()
+        self.database.set_result(db)
     
     def setup_page(self):
         """Configurações iniciais da página"""
@@ -75,6 +2716,9 @@ class ProgramaSocialApp:
         self.page.theme_mode = ft.ThemeMode.LIGHT
         self.page.padding = 20
         self.page.scroll = ft.ScrollMode.AUTO
+        self.create_jobs_panel()
+        self.import_picker = ft.FilePicker(on_result=self.on_import_file_picked)
+        self.page.overlay.append(self.import_picker)
         self.show_login()
     
     def show_login(self):
@@ -185,6 +2829,7 @@ class ProgramaSocialApp:
         )
         self.page.update()
     
+    @instrumented
     def login_click(self, e):
         """Processa o login do usuário"""
         email = self.email_field.value
@@ -194,15 +2839,10 @@ class ProgramaSocialApp:
             self.show_snackbar("Por favor, preencha todos os campos", "red")
             return
         
-        cursor = self.conn.cursor()
         senha_hash = hashlib.sha256(senha.encode()).hexdigest()
         
-        cursor.execute('''
-            SELECT id, nome FROM usuarios 
-            WHERE email = ? AND senha = ?
-        ''', (email, senha_hash))
-        
-        user = cursor.fetchone()
+        with self.db.read() as conn:
+            user = conn.execute(SQL_LOGIN, (email, senha_hash)).fetchone()
         
         if user:
             self.current_user = {"id": user[0], "nome": user[1], "email": email}
@@ -210,39 +2850,38 @@ class ProgramaSocialApp:
         else:
             self.show_snackbar("Email ou senha incorretos", "red")
     
+    @instrumented
     def register_click(self, e):
         """Processa o cadastro de novo usuário"""
         nome = self.reg_nome.value
         email = self.reg_email.value
         senha = self.reg_senha.value
-        confirma = self.reg_confirma_senha.value
-        
-        if not all([nome, email, senha, confirma]):
-            self.show_snackbar("Por favor, preencha todos os campos", "red")
-            return
-        
-        if senha != confirma:
-            self.show_snackbar("As senhas não coincidem", "red")
-            return
         
-        if len(senha) < 6:
-            self.show_snackbar("A senha deve ter pelo menos 6 caracteres", "red")
+        erro = self.validate_registration(nome, email, senha, self.reg_confirma_senha.value)
+        if erro:
+            self.show_snackbar(erro, "red")
             return
         
-        cursor = self.conn.cursor()
         senha_hash = hashlib.sha256(senha.encode()).hexdigest()
         
         try:
-            cursor.execute('''
-                INSERT INTO usuarios (nome, email, senha) 
-                VALUES (?, ?, ?)
-            ''', (nome, email, senha_hash))
-            self.conn.commit()
+            self.db.execute_write(SQL_INSERT_USUARIO, (nome, email, senha_hash))
             self.show_snackbar("Usuário cadastrado com sucesso!", "green")
             self.show_login()
         except sqlite3.IntegrityError:
             self.show_snackbar("Este email já está cadastrado", "red")
     
+    def validate_registration(self, nome, email, senha, confirma):
+        """Retorna a mensagem de erro do cadastro, ou None se os dados forem válidos"""
+        if not all([nome, email, senha, confirma]):
+            return "Por favor, preencha todos os campos"
+        if senha != confirma:
+            return "As senhas não coincidem"
+        if len(senha) < 6:
+            return "A senha deve ter pelo menos 6 caracteres"
+        return None
+    
+    @instrumented
     def show_dashboard(self):
         """Exibe o dashboard principal"""
         self.page.clean()
@@ -289,6 +2928,12 @@ class ProgramaSocialApp:
                     "assessment",
                     "Gerar relatórios em PDF",
                     self.show_relatorios
+                ),
+                self.create_nav_card(
+                    "Duplicidades",
+                    "content_copy",
+                    "Revisar possíveis duplicatas",
+                    self.show_duplicidades
                 )
             ],
             alignment=ft.MainAxisAlignment.CENTER,
@@ -324,9 +2969,9 @@ class ProgramaSocialApp:
                 )
             )
             self.page.update()
-            print("Dashboard carregado com sucesso!")
+            logger.debug("Dashboard carregado")
         except Exception as e:
-            print(f"Erro ao carregar dashboard: {e}")
+            logger.exception("Erro ao carregar dashboard")
             self.show_snackbar(f"Erro ao carregar dashboard: {e}", "red")
             self.page.update()
     
@@ -373,29 +3018,33 @@ class ProgramaSocialApp:
             )
         )
     
+    @instrumented
     def get_statistics(self):
-        """Obtém estatísticas das inscrições"""
-        cursor = self.conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM inscricoes')
-        total = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM inscricoes WHERE status = ?', ('Pendente',))
-        pendentes = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM inscricoes WHERE status = ?', ('Aprovada',))
-        aprovadas = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM inscricoes WHERE status = ?', ('Rejeitada',))
-        rejeitadas = cursor.fetchone()[0]
-        
+        """Obtém estatísticas das inscrições (do cache enquanto o banco não mudar)"""
+        # Cópia: quem chama pode acrescentar chaves ao dicionário
+        return dict(self.db.cached('estatisticas', self.compute_statistics))
+    
+    def compute_statistics(self):
+        """Calcula as estatísticas a partir do resumo"""
+        # Lê o resumo mantido por triggers (uma linha por status)
+        with self.db.read() as conn:
+            rows = conn.execute('SELECT status, total, soma_renda_centavos, soma_membros FROM resumo_inscricoes').fetchall()
+        resumo = {row[0]: row[1:] for row in rows}
+
+        total = sum(valores[0] for valores in resumo.values())
+        soma_renda = sum(valores[1] for valores in resumo.values()) / 100
+        soma_membros = sum(valores[2] for valores in resumo.values())
+
         return {
             'total': total,
-            'pendentes': pendentes,
-            'aprovadas': aprovadas,
-            'rejeitadas': rejeitadas
+            'pendentes': resumo.get('Pendente', (0,))[0],
+            'aprovadas': resumo.get('Aprovada', (0,))[0],
+            'rejeitadas': resumo.get('Rejeitada', (0,))[0],
+            'soma_renda': soma_renda,
+            'soma_membros': soma_membros
         }
     
+    @instrumented
     def show_inscricao_form(self, e=None):
         """Exibe o formulário de inscrição"""
         self.page.clean()
@@ -449,28 +3098,12 @@ class ProgramaSocialApp:
             'escolaridade': ft.Dropdown(
                 label="Escolaridade *",
                 width=250,
-                options=[
-                    ft.dropdown.Option("Sem escolaridade"),
-                    ft.dropdown.Option("Ensino Fundamental Incompleto"),
-                    ft.dropdown.Option("Ensino Fundamental Completo"),
-                    ft.dropdown.Option("Ensino Médio Incompleto"),
-                    ft.dropdown.Option("Ensino Médio Completo"),
-                    ft.dropdown.Option("Ensino Superior Incompleto"),
-                    ft.dropdown.Option("Ensino Superior Completo"),
-                    ft.dropdown.Option("Pós-graduação")
-                ]
+                options=[ft.dropdown.Option(opcao) for opcao in ESCOLARIDADES]
             ),
             'situacao_moradia': ft.Dropdown(
                 label="Situação de Moradia *",
                 width=250,
-                options=[
-                    ft.dropdown.Option("Casa Própria"),
-                    ft.dropdown.Option("Casa Alugada"),
-                    ft.dropdown.Option("Casa Cedida"),
-                    ft.dropdown.Option("Ocupação"),
-                    ft.dropdown.Option("Situação de Rua"),
-                    ft.dropdown.Option("Outro")
-                ]
+                options=[ft.dropdown.Option(opcao) for opcao in SITUACOES_MORADIA]
             ),
             'observacoes': ft.TextField(
                 label="Observações Adicionais",
@@ -547,52 +3180,39 @@ class ProgramaSocialApp:
         self.page.add(form_content)
         self.page.update()
     
+    @instrumented
     def save_inscricao(self, e):
         """Salva a inscrição no banco de dados"""
         # Validação dos campos obrigatórios
-        required_fields = [
-            'nome_completo', 'idade', 'genero', 'endereco', 
-            'renda_familiar', 'membros_familia', 'despesas_mensais', 
-            'escolaridade', 'situacao_moradia'
-        ]
-        
-        for field in required_fields:
+        for field in REQUIRED_FIELDS:
             if not self.form_fields[field].value:
                 self.show_snackbar(f"Campo '{self.form_fields[field].label}' é obrigatório", "red")
                 return
         
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                INSERT INTO inscricoes (
-                    nome_completo, idade, genero, cpf, endereco, telefone, email,
-                    renda_familiar, membros_familia, despesas_mensais, escolaridade,
-                    situacao_moradia, observacoes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.form_fields['nome_completo'].value,
-                int(self.form_fields['idade'].value),
-                self.form_fields['genero'].value,
-                self.form_fields['cpf'].value,
-                self.form_fields['endereco'].value,
-                self.form_fields['telefone'].value,
-                self.form_fields['email'].value,
-                float(self.form_fields['renda_familiar'].value.replace('R$ ', '').replace(',', '.')),
-                int(self.form_fields['membros_familia'].value),
-                float(self.form_fields['despesas_mensais'].value.replace('R$ ', '').replace(',', '.')),
-                self.form_fields['escolaridade'].value,
-                self.form_fields['situacao_moradia'].value,
-                self.form_fields['observacoes'].value
-            ))
-            self.conn.commit()
+            values = {field: self.form_fields[field].value for field in INSCRICAO_FIELDS}
+            candidatas = self.db.run_write(insert_inscricao, parse_inscricao(values))
             
-            self.show_snackbar("Inscrição salva com sucesso!", "green")
+            self.show_saved_message(candidatas)
             self.clear_form()
             self.show_dashboard()
             
         except Exception as ex:
             self.show_snackbar(f"Erro ao salvar: {str(ex)}", "red")
     
+    def show_saved_message(self, candidatas):
+        """Confirma o cadastro, avisando se ele parece duplicar outra inscrição"""
+        if not candidatas:
+            self.show_snackbar("Inscrição salva com sucesso!", "green")
+            return
+        inscricao_id, nome, pontuacao = candidatas[0]
+        outras = f" e mais {len(candidatas) - 1}" if len(candidatas) > 1 else ""
+        self.show_snackbar(
+            f"Inscrição salva. Possível duplicata de #{inscricao_id} ({nome}, {pontuacao:.0%}){outras}: "
+            "confira em Duplicidades",
+            "orange"
+        )
+    
     def clear_form(self, e=None):
         """Limpa todos os campos do formulário"""
         for field in self.form_fields.values():
@@ -601,6 +3221,7 @@ class ProgramaSocialApp:
                 field.value = None
         self.page.update()
     
+    @instrumented
     def show_inscricoes_list(self, e=None):
         """Exibe a lista de inscrições"""
         self.page.clean()
@@ -631,97 +3252,269 @@ class ProgramaSocialApp:
                 ft.dropdown.Option("Todos"),
                 ft.dropdown.Option("Pendente"),
                 ft.dropdown.Option("Aprovada"),
-                ft.dropdown.Option("Rejeitada")
+                ft.dropdown.Option("Rejeitada"),
+                ft.dropdown.Option(FILA_PRIORIDADE)
             ],
             value="Todos",
             on_change=self.filter_inscricoes
         )
         
+        self.search_field = ft.TextField(
+            label="Buscar nome, endereço ou observações",
+            prefix_icon="search",
+            width=320,
+            on_submit=self.filter_inscricoes
+        )
+        
         filters_row = ft.Row([
             self.status_filter,
+            self.search_field,
             ft.ElevatedButton(
                 text="Exportar Todas (PDF)",
                 on_click=self.export_all_pdf,
                 icon="picture_as_pdf"
+            ),
+            ft.ElevatedButton(
+                text="Importar Planilha",
+                on_click=lambda _: self.import_picker.pick_files(
+                    dialog_title="Importar inscrições (CSV ou JSON Lines)",
+                    allowed_extensions=["csv", "jsonl", "ndjson", "json"]
+                ),
+                icon="upload_file"
             )
         ], spacing=20)
         
-        # Lista de inscrições
-        self.inscricoes_column = ft.Column(spacing=10, scroll=ft.ScrollMode.AUTO, expand=True)
+        # Critérios adicionais: faixas (campo vazio = sem limite), categorias e ordenação
+        self.range_fields = {
+            'idade': (self.criteria_field("Idade mín."), self.criteria_field("Idade máx.")),
+            'renda': (self.criteria_field("Renda mín."), self.criteria_field("Renda máx.")),
+            'renda_per_capita': (self.criteria_field("Per capita mín."), self.criteria_field("Per capita máx.")),
+            'data': (self.criteria_field("De (AAAA-MM-DD)", 150), self.criteria_field("Até (AAAA-MM-DD)", 150))
+        }
+        self.value_fields = {
+            'escolaridade': self.criteria_dropdown("Escolaridade", ESCOLARIDADES),
+            'situacao_moradia': self.criteria_dropdown("Situação de Moradia", SITUACOES_MORADIA)
+        }
+        self.order_filter = ft.Dropdown(
+            label="Ordenar por",
+            width=220,
+            options=[ft.dropdown.Option(ordem) for ordem in ORDENACOES],
+            value=ORDENACAO_PADRAO,
+            on_change=self.filter_inscricoes
+        )
+        
+        criteria_row = ft.Row([
+            *(field for pair in self.range_fields.values() for field in pair),
+            *self.value_fields.values(),
+            self.order_filter,
+            ft.TextButton("Limpar critérios", on_click=self.clear_criterios, icon="filter_alt_off")
+        ], spacing=10, wrap=True)
+        
+        # Ações em massa: seleção pelos cards ou de todas as inscrições do filtro atual
+        self.select_all_checkbox = ft.Checkbox(
+            label="Selecionar todas do filtro",
+            value=False,
+            on_change=self.toggle_select_all
+        )
+        self.selection_text = ft.Text("Nenhuma inscrição selecionada", size=12, color="grey")
+        self.bulk_status = ft.Dropdown(
+            label="Novo status",
+            width=160,
+            options=[
+                ft.dropdown.Option("Pendente"),
+                ft.dropdown.Option("Aprovada"),
+                ft.dropdown.Option("Rejeitada")
+            ]
+        )
+        
+        bulk_row = ft.Row([
+            self.select_all_checkbox,
+            self.selection_text,
+            self.bulk_status,
+            ft.ElevatedButton(
+                text="Aplicar às Selecionadas",
+                on_click=self.apply_bulk_status,
+                icon="done_all"
+            )
+        ], spacing=20)
         
+        # Lista de inscrições (construída sob demanda pelo cliente, página a página)
+        self.inscricoes_list = ft.ListView(
+            spacing=10,
+            height=600,
+            on_scroll=self.on_inscricoes_scroll,
+            on_scroll_interval=100
+        )
+
         self.page.add(
             ft.Column([
                 header,
                 ft.Divider(height=20),
                 filters_row,
+                criteria_row,
+                bulk_row,
                 ft.Divider(height=20),
-                self.inscricoes_column
+                self.inscricoes_list
             ], expand=True)
         )
-        
+
         self.load_inscricoes()
         self.page.update()
+
+    def criteria_field(self, label, width=110):
+        """Campo de um limite de faixa dos critérios da lista"""
+        return ft.TextField(label=label, width=width, on_submit=self.filter_inscricoes)
     
-    def load_inscricoes(self, status_filter="Todos"):
-        """Carrega as inscrições do banco de dados"""
-        cursor = self.conn.cursor()
-        
-        if status_filter == "Todos":
-            cursor.execute('''
-                SELECT * FROM inscricoes 
-                ORDER BY created_at DESC
-            ''')
-        else:
-            cursor.execute('''
-                SELECT * FROM inscricoes 
-                WHERE status = ?
-                ORDER BY created_at DESC
-            ''', (status_filter,))
-        
-        inscricoes = cursor.fetchall()
-        self.inscricoes_column.controls.clear()
-        
-        if not inscricoes:
-            self.inscricoes_column.controls.append(
-                ft.Text("Nenhuma inscrição encontrada", size=16, color="grey")
-            )
-        else:
-            for inscricao in inscricoes:
-                self.inscricoes_column.controls.append(
-                    self.create_inscricao_card(inscricao)
+    def criteria_dropdown(self, label, opcoes):
+        """Filtro por categoria da lista; "Todas" não restringe"""
+        return ft.Dropdown(
+            label=label,
+            width=250,
+            options=[ft.dropdown.Option("Todas")] + [ft.dropdown.Option(opcao) for opcao in opcoes],
+            value="Todas",
+            on_change=self.filter_inscricoes
+        )
+    
+    def read_criterios(self):
+        """Critérios da lista a partir dos campos da tela (ver build_criteria); levanta ValueError"""
+        conversores = {'idade': int, 'renda': parse_money, 'renda_per_capita': parse_money, 'data': str}
+        criterios = {'ordem': self.order_filter.value or ORDENACAO_PADRAO}
+        for key, fields in self.range_fields.items():
+            faixa = []
+            for field in fields:
+                value = (field.value or '').strip()
+                try:
+                    faixa.append(conversores[key](value) if value else None)
+                except ValueError:
+                    raise ValueError(f"Valor inválido em '{field.label}': {value}")
+            if faixa != [None, None]:
+                criterios[key] = tuple(faixa)
+        for key, field in self.value_fields.items():
+            if field.value and field.value != "Todas":
+                criterios[key] = field.value
+        # Valida datas e faixas antes de recarregar a lista
+        build_criteria(criterios)
+        return criterios
+    
+    def clear_criterios(self, e):
+        """Limpa os critérios adicionais e recarrega a lista"""
+        for fields in self.range_fields.values():
+            for field in fields:
+                field.value = ""
+        for field in self.value_fields.values():
+            field.value = "Todas"
+        self.order_filter.value = ORDENACAO_PADRAO
+        self.reload_inscricoes()
+    
+    @instrumented
+    def load_inscricoes(self, status_filter="Todos", search=None, criterios=None):
+        """Reinicia a lista e carrega a primeira página de inscrições"""
+        # Espera a carga de uma rolagem em andamento e mantém o lock até a primeira página: uma
+        # rolagem no meio não pode tomar o lugar dela e deixar a lista vazia
+        with self.list_lock:
+            self.list_filter = status_filter
+            self.list_search = search
+            self.list_criterios = criterios
+            self.list_cursor = None
+            self.list_exhausted = False
+            self.list_cards.clear()
+            self.inscricoes_list.controls.clear()
+            self.clear_selection()
+
+            self.load_page()
+
+            if not self.inscricoes_list.controls:
+                self.inscricoes_list.controls.append(
+                    ft.Text("Nenhuma inscrição encontrada", size=16, color="grey")
                 )
-        
         self.page.update()
-        print(f"Inscrições carregadas: {len(inscricoes)}")
+
+    def fetch_inscricoes_page(self, status_filter="Todos", after=None, limit=PAGE_SIZE, search=None, criterios=None):
+        """Busca uma página de inscrições a partir do cursor da lista"""
+        with self.db.read() as conn:
+            return inscricao_cursor(conn).execute(
+                *build_page_query(status_filter, after, limit, search, criterios)
+            ).fetchall()
+
+    @instrumented
+    def load_next_page(self):
+        """Acrescenta a próxima página de inscrições ao final da lista"""
+        # Eventos de rolagem chegam em paralelo; só uma carga por vez (a que já está em
+        # andamento traz a página)
+        if not self.list_lock.acquire(blocking=False):
+            return
+        try:
+            self.load_page()
+        finally:
+            self.list_lock.release()
+
+    def load_page(self):
+        """Busca e acrescenta a página seguinte ao cursor da lista (com list_lock adquirido)"""
+        if self.list_exhausted:
+            return
+        inscricoes = self.fetch_inscricoes_page(
+            self.list_filter, self.list_cursor, PAGE_SIZE, self.list_search, self.list_criterios
+        )
+        self.append_inscricoes_page(inscricoes)
+
+    def append_inscricoes_page(self, inscricoes):
+        """Cria os cards de uma página e avança o cursor da lista (com list_lock adquirido)"""
+        for inscricao in inscricoes:
+            card = self.create_inscricao_card(inscricao)
+            self.list_cards[inscricao.id] = card
+            self.inscricoes_list.controls.append(card)
+
+        if len(inscricoes) < PAGE_SIZE:
+            self.list_exhausted = True
+        if build_fts_query(self.list_search):
+            self.list_cursor = (self.list_cursor or 0) + len(inscricoes)
+        elif inscricoes:
+            self.list_cursor = page_cursor(inscricoes[-1], self.list_filter, self.list_criterios)
+
+        logger.debug("Inscrições carregadas: %d (total na lista: %d)", len(inscricoes), len(self.inscricoes_list.controls))
+
+    def on_inscricoes_scroll(self, e):
+        """Carrega a próxima página quando a rolagem se aproxima do fim"""
+        if self.list_exhausted or e.max_scroll_extent is None:
+            return
+        if e.pixels >= e.max_scroll_extent - 300:
+            self.load_next_page()
+            self.inscricoes_list.update()
     
     def create_inscricao_card(self, inscricao):
         """Cria um card para cada inscrição"""
-        id_inscricao, nome, idade, genero, cpf, endereco, telefone, email, renda, membros, despesas, escolaridade, moradia, obs, status, created_at, updated_at = inscricao
+        id_inscricao, nome, idade, genero = inscricao.id, inscricao.nome_completo, inscricao.idade, inscricao.genero
+        renda, membros, status, created_at = inscricao.renda_familiar, inscricao.membros_familia, inscricao.status, inscricao.created_at
+        
+        status_badge = ft.Container(
+            content=ft.Text(status, color="white", size=12, weight=ft.FontWeight.BOLD),
+            bgcolor=STATUS_COLORS.get(status, "grey"),
+            padding=ft.padding.symmetric(horizontal=10, vertical=5),
+            border_radius=15
+        )
         
-        # Cor do status
-        status_color = {
-            'Pendente': "orange",
-            'Aprovada': "green",
-            'Rejeitada': "red"
-        }.get(status, "grey")
+        checkbox = ft.Checkbox(
+            value=self.list_select_all or id_inscricao in self.list_selected,
+            disabled=self.list_select_all,
+            on_change=lambda e, id=id_inscricao: self.toggle_selection(id, e.control.value)
+        )
+        self.list_checkboxes[id_inscricao] = checkbox
         
         return ft.Card(
+            data=status_badge,
             content=ft.Container(
                 content=ft.Column([
                     ft.Row([
+                        checkbox,
                         ft.Column([
                             ft.Text(nome, size=16, weight=ft.FontWeight.BOLD),
                             ft.Text(f"Idade: {idade} anos | {genero}", size=12, color="grey"),
                             ft.Text(f"Renda Familiar: R$ {renda:.2f}", size=12),
-                            ft.Text(f"Membros da Família: {membros}", size=12)
+                            ft.Text(f"Membros da Família: {membros} | Per capita: R$ {inscricao.renda_per_capita:.2f}", size=12),
+                            ft.Text(f"Prioridade: {inscricao.prioridade} pontos", size=12, color="blue")
                         ], expand=True),
                         ft.Column([
-                            ft.Container(
-                                content=ft.Text(status, color="white", size=12, weight=ft.FontWeight.BOLD),
-                                bgcolor=status_color,
-                                padding=ft.padding.symmetric(horizontal=10, vertical=5),
-                                border_radius=15
-                            ),
+                            status_badge,
                             ft.Text(f"Cadastrado em: {created_at[:10]}", size=10, color="grey")
                         ])
                     ]),
@@ -757,40 +3550,55 @@ class ProgramaSocialApp:
             )
         )
     
+    def get_inscricao(self, inscricao_id):
+        """Lê a inscrição completa pelo id"""
+        with self.db.read() as conn:
+            return fetch_inscricao(conn, inscricao_id)
+    
+    @instrumented
     def show_inscricao_details(self, inscricao_id):
         """Exibe os detalhes completos de uma inscrição"""
-        print(f"Tentando mostrar detalhes para inscrição ID: {inscricao_id}")
-        cursor = self.conn.cursor()
         try:
-            cursor.execute('SELECT * FROM inscricoes WHERE id = ?', (inscricao_id,))
-            inscricao = cursor.fetchone()
+            inscricao = self.get_inscricao(inscricao_id)
             
             if not inscricao:
                 self.show_snackbar("Inscrição não encontrada", "red")
-                print(f"Inscrição ID {inscricao_id} não encontrada.")
+                logger.warning("Inscrição ID %s não encontrada", inscricao_id)
                 return
             
+            historico = [
+                ft.Text(
+                    f"{alterado_em}: {anterior or '-'} → {novo} ({nome or 'sistema'}; "
+                    f"{format_duration(segundos)} em {anterior or '-'})",
+                    size=12
+                )
+                for alterado_em, anterior, novo, nome, segundos in self.get_status_history(inscricao_id)
+            ] or [ft.Text("Nenhuma mudança de status registrada", size=12, color="grey")]
+            
             # Criar dialog com detalhes
             details_content = ft.Column([
                 ft.Text("Detalhes da Inscrição", size=20, weight=ft.FontWeight.BOLD),
                 ft.Divider(),
-                ft.Text(f"Nome: {inscricao[1]}", size=14),
-                ft.Text(f"Idade: {inscricao[2]} anos", size=14),
-                ft.Text(f"Gênero: {inscricao[3]}", size=14),
-                ft.Text(f"CPF: {inscricao[4] or 'Não informado'}", size=14),
-                ft.Text(f"Endereço: {inscricao[5]}", size=14),
-                ft.Text(f"Telefone: {inscricao[6] or 'Não informado'}", size=14),
-                ft.Text(f"Email: {inscricao[7] or 'Não informado'}", size=14),
+                ft.Text(f"Nome: {inscricao.nome_completo}", size=14),
+                ft.Text(f"Idade: {inscricao.idade} anos", size=14),
+                ft.Text(f"Gênero: {inscricao.genero}", size=14),
+                ft.Text(f"CPF: {inscricao.cpf or 'Não informado'}", size=14),
+                ft.Text(f"Endereço: {inscricao.endereco}", size=14),
+                ft.Text(f"Telefone: {inscricao.telefone or 'Não informado'}", size=14),
+                ft.Text(f"Email: {inscricao.email or 'Não informado'}", size=14),
+                ft.Divider(),
+                ft.Text(f"Renda Familiar: R$ {inscricao.renda_familiar:.2f}", size=14),
+                ft.Text(f"Membros da Família: {inscricao.membros_familia}", size=14),
+                ft.Text(f"Despesas Mensais: R$ {inscricao.despesas_mensais:.2f}", size=14),
+                ft.Text(f"Escolaridade: {inscricao.escolaridade}", size=14),
+                ft.Text(f"Situação de Moradia: {inscricao.situacao_moradia}", size=14),
                 ft.Divider(),
-                ft.Text(f"Renda Familiar: R$ {inscricao[8]:.2f}", size=14),
-                ft.Text(f"Membros da Família: {inscricao[9]}", size=14),
-                ft.Text(f"Despesas Mensais: R$ {inscricao[10]:.2f}", size=14),
-                ft.Text(f"Escolaridade: {inscricao[11]}", size=14),
-                ft.Text(f"Situação de Moradia: {inscricao[12]}", size=14),
+                ft.Text(f"Observações: {inscricao.observacoes or 'Nenhuma'}", size=14),
+                ft.Text(f"Status: {inscricao.status}", size=14, weight=ft.FontWeight.BOLD),
+                ft.Text(f"Cadastrado em: {inscricao.created_at}", size=12, color="grey"),
                 ft.Divider(),
-                ft.Text(f"Observações: {inscricao[13] or 'Nenhuma'}", size=14),
-                ft.Text(f"Status: {inscricao[14]}", size=14, weight=ft.FontWeight.BOLD),
-                ft.Text(f"Cadastrado em: {inscricao[15]}", size=12, color="grey")
+                ft.Text("Histórico de Status", size=14, weight=ft.FontWeight.BOLD),
+                *historico
             ], scroll=ft.ScrollMode.AUTO, height=400)
             
             dialog = ft.AlertDialog(
@@ -804,191 +3612,451 @@ class ProgramaSocialApp:
             self.page.dialog = dialog
             dialog.open = True
             self.page.update()
-            print(f"Detalhes da inscrição ID {inscricao_id} exibidos com sucesso.")
         except Exception as ex:
             self.show_snackbar(f"Erro ao exibir detalhes: {str(ex)}", "red")
-            print(f"Erro ao exibir detalhes da inscrição ID {inscricao_id}: {ex}")
+            logger.exception("Erro ao exibir detalhes da inscrição ID %s", inscricao_id)
+    
+    def current_user_id(self):
+        """Id do usuário logado, gravado no histórico de status"""
+        return self.current_user['id'] if self.current_user else None
+    
+    def get_status_history(self, inscricao_id, limit=10):
+        """Últimas mudanças de status da inscrição: (quando, de, para, usuário, segundos no status anterior)"""
+        with self.db.read() as conn:
+            return conn.execute(SQL_HISTORICO_INSCRICAO, (inscricao_id, limit)).fetchall()
     
+    @instrumented
     def update_status(self, inscricao_id, new_status):
-        """Atualiza o status de uma inscrição"""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE inscricoes 
-            SET status = ?, updated_at = CURRENT_TIMESTAMP 
-            WHERE id = ?
-        ''', (new_status, inscricao_id))
-        self.conn.commit()
+        """Atualiza o status de uma inscrição (e o histórico, na mesma transação)"""
+        try:
+            self.db.run_write(change_status, new_status, 'id = ?', [inscricao_id], self.current_user_id())
+        except Exception as ex:
+            # Banco ocupado ou gravação recusada: o card continua com o status anterior
+            self.show_snackbar(f"Erro ao atualizar status: {str(ex)}", "red")
+            logger.exception("Erro ao atualizar status da inscrição ID %s", inscricao_id)
+            return
         
+        self.patch_inscricao_card(inscricao_id, new_status)
         self.show_snackbar(f"Status atualizado para: {new_status}", "green")
-        self.load_inscricoes(self.status_filter.value if hasattr(self, 'status_filter') else "Todos")
+    
+    def patch_inscricao_card(self, inscricao_id, new_status):
+        """Atualiza só o card alterado, sem recarregar a lista"""
+        with self.list_lock:
+            card = self.list_cards.get(inscricao_id)
+            if card is None:
+                return
+            
+            if self.list_filter == "Todos" or filter_status(self.list_filter) == new_status:
+                badge = card.data
+                badge.content.value = new_status
+                badge.bgcolor = STATUS_COLORS.get(new_status, "grey")
+                badge.update()
+                return
+            
+            # Saiu do filtro ativo: remove o card
+            del self.list_cards[inscricao_id]
+            self.list_checkboxes.pop(inscricao_id, None)
+            self.list_selected.discard(inscricao_id)
+            self.inscricoes_list.controls.remove(card)
+            if build_fts_query(self.list_search) and self.list_cursor:
+                # Na busca o cursor é um deslocamento; a linha removida deixa de contar
+                self.list_cursor -= 1
+            if not self.inscricoes_list.controls:
+                self.inscricoes_list.controls.append(
+                    ft.Text("Nenhuma inscrição encontrada", size=16, color="grey")
+                )
+        self.inscricoes_list.update()
+    
+    def clear_selection(self):
+        """Esvazia a seleção de inscrições (a lista foi recarregada ou o filtro mudou)"""
+        self.list_checkboxes.clear()
+        self.list_selected.clear()
+        self.list_select_all = False
+        self.select_all_checkbox.value = False
+        self.selection_text.value = "Nenhuma inscrição selecionada"
+    
+    def update_selection_text(self):
+        """Mostra quantas inscrições estão selecionadas"""
+        if self.list_select_all:
+            self.selection_text.value = "Todas as inscrições do filtro selecionadas"
+        elif self.list_selected:
+            self.selection_text.value = f"{len(self.list_selected)} inscrições selecionadas"
+        else:
+            self.selection_text.value = "Nenhuma inscrição selecionada"
+        self.selection_text.update()
+    
+    def toggle_selection(self, inscricao_id, checked):
+        """Marca ou desmarca uma inscrição pelo checkbox do card"""
+        if checked:
+            self.list_selected.add(inscricao_id)
+        else:
+            self.list_selected.discard(inscricao_id)
+        self.update_selection_text()
+    
+    def toggle_select_all(self, e):
+        """Seleciona todas as inscrições do filtro, inclusive as que ainda não foram carregadas"""
+        with self.list_lock:
+            self.list_select_all = bool(e.control.value)
+            self.list_selected.clear()
+            for checkbox in self.list_checkboxes.values():
+                checkbox.value = self.list_select_all
+                checkbox.disabled = self.list_select_all
+        self.update_selection_text()
+        self.inscricoes_list.update()
+    
+    def prepare_bulk_status(self):
+        """Valida a ação em massa e monta a condição; retorna (status, where, params) ou None"""
+        new_status = self.bulk_status.value
+        if not new_status:
+            self.show_snackbar("Escolha o novo status", "orange")
+            return None
+        with self.list_lock:
+            if not self.list_select_all and not self.list_selected:
+                self.show_snackbar("Nenhuma inscrição selecionada", "orange")
+                return None
+            ids = None if self.list_select_all else set(self.list_selected)
+            where_sql, params = build_status_filter(ids, self.list_filter, self.list_search, self.list_criterios)
+        return new_status, where_sql, params
+    
+    @instrumented
+    def apply_bulk_status(self, e):
+        """Aplica o novo status às inscrições selecionadas com um único UPDATE"""
+        bulk = self.prepare_bulk_status()
+        if bulk is None:
+            return
+        new_status, where_sql, params = bulk
+        try:
+            updated = self.db.run_write(change_status, new_status, where_sql, params, self.current_user_id())
+        except Exception as ex:
+            # Banco ocupado ou gravação recusada: a transação desfaz tudo e a seleção continua na tela
+            self.show_snackbar(f"Erro ao atualizar status: {str(ex)}", "red")
+            logger.exception("Erro ao aplicar o status %s em massa", new_status)
+            return
+        self.finish_bulk_status(new_status, updated)
+    
+    def finish_bulk_status(self, new_status, updated):
+        """Recarrega a lista uma vez após a ação em massa e informa quantas mudaram"""
+        self.reload_inscricoes()
+        self.show_snackbar(f"{updated} inscrições atualizadas para: {new_status}", "green")
     
     def filter_inscricoes(self, e):
-        """Filtra inscrições por status"""
-        self.load_inscricoes(e.control.value)
+        """Filtra inscrições por status, texto de busca e critérios"""
+        self.reload_inscricoes()
+    
+    def reload_inscricoes(self):
+        """Recarrega a lista com os filtros atuais da tela"""
+        if not hasattr(self, 'status_filter'):
+            return
+        try:
+            criterios = self.read_criterios()
+        except ValueError as ex:
+            self.show_snackbar(str(ex), "orange")
+            return
+        self.load_inscricoes(self.status_filter.value, self.search_field.value, criterios)
     
     def refresh_inscricoes(self, e):
         """Atualiza a lista de inscrições"""
-        self.load_inscricoes(self.status_filter.value if hasattr(self, 'status_filter') else "Todos")
+        self.reload_inscricoes()
         self.show_snackbar("Lista atualizada", "blue")
     
+    @instrumented
+    def get_duplicate_pairs(self, limit=DUPLICIDADE_PAGINA):
+        """Total de pares pendentes de revisão e os `limit` de maior pontuação"""
+        with self.db.read() as conn:
+            total = conn.execute(SQL_DUPLICIDADES_PENDENTES_TOTAL).fetchone()[0]
+            return total, conn.execute(SQL_DUPLICIDADES_PENDENTES, (limit,)).fetchall()
+    
+    @instrumented
+    def show_duplicidades(self, e=None):
+        """Exibe os pares de possíveis duplicatas pendentes de revisão"""
+        self.page.clean()
+        self.current_view = "duplicidades"
+        
+        header = ft.Row([
+            ft.IconButton(
+                icon="arrow_back",
+                tooltip="Voltar",
+                on_click=lambda _: self.show_dashboard()
+            ),
+            ft.Text("Revisão de Duplicidades", size=24, weight=ft.FontWeight.BOLD),
+            ft.ElevatedButton(
+                text="Buscar Duplicidades",
+                on_click=self.start_duplicate_detection,
+                icon="search"
+            )
+        ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
+        
+        total, pares = self.get_duplicate_pairs()
+        self.duplicidades_total = total
+        self.duplicidades_text = ft.Text(f"{total} pares pendentes de revisão", size=14, color="grey")
+        self.duplicidades_cards = {}
+        self.duplicidades_list = ft.Column(scroll=ft.ScrollMode.AUTO, expand=True, spacing=10)
+        for par in pares:
+            card = self.create_duplicidade_card(par)
+            self.duplicidades_cards[(par[0], par[1])] = card
+            self.duplicidades_list.controls.append(card)
+        if not pares:
+            self.duplicidades_list.controls.append(
+                ft.Text("Nenhuma possível duplicata pendente", size=16, color="grey")
+            )
+        
+        self.page.add(
+            ft.Column([
+                header,
+                ft.Divider(),
+                self.duplicidades_text,
+                self.duplicidades_list
+            ], expand=True)
+        )
+        self.page.update()
+    
+    def create_duplicidade_card(self, par):
+        """Card com as duas inscrições de um par lado a lado e as ações da revisão"""
+        inscricao_id, original_id, pontuacao = par[:3]
+        
+        def resumo(titulo, inscricao_id, nome, cpf, endereco, idade, status, created_at):
+            return ft.Column([
+                ft.Text(f"{titulo} #{inscricao_id}", size=12, color="grey"),
+                ft.Text(nome, size=16, weight=ft.FontWeight.BOLD),
+                ft.Text(f"CPF: {cpf or 'Não informado'} | Idade: {idade} anos", size=12),
+                ft.Text(endereco, size=12),
+                ft.Text(f"{status} | Cadastrado em: {created_at[:10]}", size=12, color=STATUS_COLORS.get(status, "grey"))
+            ], expand=True)
+        
+        return ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Text(f"Semelhança: {pontuacao:.0%}", size=14, weight=ft.FontWeight.BOLD, color="orange"),
+                    ft.Row([
+                        resumo("Inscrição", inscricao_id, *par[3:9]),
+                        resumo("Original", original_id, *par[9:15])
+                    ], vertical_alignment=ft.CrossAxisAlignment.START),
+                    ft.Divider(height=10),
+                    ft.Row([
+                        ft.ElevatedButton(
+                            text="É duplicata",
+                            on_click=lambda e: self.resolve_duplicidade(inscricao_id, original_id, True),
+                            icon="check",
+                            height=35,
+                            bgcolor="red",
+                            color="white"
+                        ),
+                        ft.ElevatedButton(
+                            text="Não é duplicata",
+                            on_click=lambda e: self.resolve_duplicidade(inscricao_id, original_id, False),
+                            icon="close",
+                            height=35
+                        ),
+                        ft.ElevatedButton(
+                            text="Ver Detalhes",
+                            on_click=lambda e: self.show_inscricao_details(inscricao_id),
+                            icon="visibility",
+                            height=35
+                        )
+                    ], spacing=10)
+                ]),
+                padding=20
+            )
+        )
+    
+    @instrumented
+    def resolve_duplicidade(self, inscricao_id, original_id, duplicata):
+        """Grava a decisão sobre um par e o tira da tela"""
+        decidido = self.db.run_write(
+            resolve_duplicate, inscricao_id, original_id, duplicata, self.current_user_id()
+        )
+        self.finish_duplicidade(inscricao_id, original_id, duplicata, decidido)
+    
+    def finish_duplicidade(self, inscricao_id, original_id, duplicata, decidido):
+        """Remove o card do par decidido e informa o resultado"""
+        card = self.duplicidades_cards.pop((inscricao_id, original_id), None)
+        if card is not None:
+            self.duplicidades_list.controls.remove(card)
+            self.duplicidades_total -= 1
+            self.duplicidades_text.value = f"{self.duplicidades_total} pares pendentes de revisão"
+            self.page.update()
+        if not decidido:
+            self.show_snackbar("Este par já foi revisado por outro atendente", "orange")
+        elif duplicata:
+            self.show_snackbar(f"Inscrição #{inscricao_id} marcada como duplicata de #{original_id}", "green")
+        else:
+            self.show_snackbar("Par marcado como inscrições distintas", "green")
+    
+    @instrumented
+    def start_duplicate_detection(self, e):
+        """Agenda a busca de duplicidades em todas as inscrições em segundo plano"""
+        def on_finish(job, result, error):
+            if isinstance(error, JobCancelado):
+                self.show_snackbar("Busca de duplicidades cancelada (pares já gravados foram mantidos)", "grey")
+                return
+            if error is not None:
+                self.show_snackbar(f"Erro na busca de duplicidades: {str(error)}", "red")
+                logger.error("Erro na busca de duplicidades: %s", error)
+                return
+            novos, seconds = result
+            self.show_snackbar(f"{novos} novos pares de possíveis duplicatas em {seconds:.1f}s", "green")
+            if self.current_view == "duplicidades":
+                self.show_duplicidades()
+        
+        job = self.jobs.submit(
+            ('duplicidades',),
+            "Busca de duplicidades",
+            lambda job: detect_duplicates(self.db, progress=job.report),
+            on_finish
+        )
+        if job is None:
+            self.show_snackbar("A busca de duplicidades já está em andamento", "orange")
+    
     def generate_pdf(self, inscricao_id):
-        """Gera PDF para uma inscrição específica"""
-        print(f"Tentando gerar PDF para inscrição ID: {inscricao_id}")
-        cursor = self.conn.cursor()
+        """Agenda a geração do PDF de uma inscrição em segundo plano"""
         try:
-            cursor.execute('SELECT * FROM inscricoes WHERE id = ?', (inscricao_id,))
-            inscricao = cursor.fetchone()
+            inscricao = self.get_inscricao(inscricao_id)
             
             if not inscricao:
                 self.show_snackbar("Inscrição não encontrada", "red")
-                print(f"Inscrição ID {inscricao_id} não encontrada para PDF.")
+                logger.warning("Inscrição ID %s não encontrada para PDF", inscricao_id)
                 return
             
-            # Criar diretório se não existir
-            os.makedirs('pdfs', exist_ok=True)
-            
-            filename = f"pdfs/inscricao_{inscricao_id}_{inscricao[1].replace(' ', '_')}.pdf"
-            doc = SimpleDocTemplate(filename, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1
-            )
-            story.append(Paragraph("PROGRAMA SOCIAL - FICHA DE INSCRIÇÃO", title_style))
-            
-            # Dados da inscrição
-            data = [
-                ['Campo', 'Informação'],
-                ['Nome Completo', inscricao[1]],
-                ['Idade', f"{inscricao[2]} anos"],
-                ['Gênero', inscricao[3]],
-                ['CPF', inscricao[4] or 'Não informado'],
-                ['Endereço', inscricao[5]],
-                ['Telefone', inscricao[6] or 'Não informado'],
-                ['Email', inscricao[7] or 'Não informado'],
-                ['Renda Familiar', f"R$ {inscricao[8]:.2f}"],
-                ['Membros da Família', str(inscricao[9])],
-                ['Despesas Mensais', f"R$ {inscricao[10]:.2f}"],
-                ['Escolaridade', inscricao[11]],
-                ['Situacao de Moradia', inscricao[12]],
-                ['Observacoes', inscricao[13] or 'Nenhuma'],
-                ['Status', inscricao[14]],
-                ['Data de Cadastro', inscricao[15]]
-            ]
-            
-            table = Table(data, colWidths=[2*inch, 4*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), pdf_colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), pdf_colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), pdf_colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, pdf_colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 20))
-            
-            # Rodapé
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                alignment=1
-            )
-            story.append(Paragraph(f"Documento gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}", footer_style))
-            
-            doc.build(story)
-            self.show_snackbar(f"PDF gerado: {filename}", "green")
-            print(f"PDF gerado com sucesso: {filename}")
+            self.submit_ficha_job(inscricao)
             
         except Exception as ex:
             self.show_snackbar(f"Erro ao gerar PDF: {str(ex)}", "red")
-            print(f"Erro ao gerar PDF para inscrição ID {inscricao_id}: {ex}")
+            logger.exception("Erro ao gerar PDF para inscrição ID %s", inscricao_id)
     
-    def export_all_pdf(self, e):
-        """Exporta todas as inscrições para PDF"""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM inscricoes ORDER BY created_at DESC')
-        inscricoes = cursor.fetchall()
+    def submit_ficha_job(self, inscricao):
+        """Coloca na fila de jobs a geração da ficha de uma inscrição já lida"""
+        # Criar diretório se não existir
+        os.makedirs(PDF_DIR, exist_ok=True)
         
-        if not inscricoes:
+        # Ficha sem alterações desde a última geração: o arquivo já está em PDF_DIR
+        cache = get_pdf_cache(PDF_DIR)
+        cached = cache.get(ficha_cache_key(inscricao))
+        if cached:
+            self.show_snackbar(f"PDF gerado: {cached[0]} (sem alterações desde a última geração)", "green")
+            return
+        
+        job = self.jobs.submit(
+            ('ficha', inscricao.id),
+            f"Ficha de {inscricao.nome_completo}",
+            lambda job: ficha_pdf_cached(inscricao, cache, job.report),
+            self.on_pdf_job_finished
+        )
+        if job is None:
+            self.show_snackbar("O PDF desta inscrição já está sendo gerado", "orange")
+    
+    @instrumented
+    def export_all_pdf(self, e):
+        """Agenda a exportação de todas as inscrições para PDF em segundo plano"""
+        if self.get_statistics()['total'] == 0:
             self.show_snackbar("Nenhuma inscrição para exportar", "orange")
             return
         
-        try:
-            os.makedirs('pdfs', exist_ok=True)
-            filename = f"pdfs/relatorio_completo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            doc = SimpleDocTemplate(filename, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-            
-            # Título
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1
-            )
-            story.append(Paragraph("PROGRAMA SOCIAL - RELATÓRIO COMPLETO", title_style))
-            story.append(Paragraph(f"Total de Inscrições: {len(inscricoes)}", styles['Normal']))
-            story.append(Spacer(1, 20))
-            
-            # Tabela resumo
-            data = [['ID', 'Nome', 'Idade', 'Renda Familiar', 'Status', 'Data Cadastro']]
-            
-            for inscricao in inscricoes:
-                data.append([
-                    str(inscricao[0]),
-                    inscricao[1][:25] + '...' if len(inscricao[1]) > 25 else inscricao[1],
-                    str(inscricao[2]),
-                    f"R$ {inscricao[8]:.2f}",
-                    inscricao[14],
-                    inscricao[15][:10]
-                ])
-            
-            table = Table(data, colWidths=[0.5*inch, 2*inch, 0.7*inch, 1*inch, 1*inch, 1*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), pdf_colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), pdf_colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), pdf_colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, pdf_colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 20))
-            
-            # Rodapé
-            footer_style = ParagraphStyle(
-                'Footer',
-                parent=styles['Normal'],
-                fontSize=8,
-                alignment=1
-            )
-            story.append(Paragraph(f"Relatório gerado em {datetime.now().strftime('%d/%m/%Y às %H:%M')}", footer_style))
-            
-            doc.build(story)
-            self.show_snackbar(f"Relatório exportado: {filename}", "green")
+        os.makedirs(PDF_DIR, exist_ok=True)
+        filename_base = f"{PDF_DIR}/relatorio_completo_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        def render(job):
+            # Leitor do pool: a exportação não bloqueia as gravações (WAL)
+            with self.db.read() as conn:
+                filenames, cached = export_relatorio_cached(
+                    conn, get_pdf_cache(PDF_DIR), filename_base, EXPORT_VOLUME_ROWS, progress=job.report
+                )
+            result = filenames[0] if len(filenames) == 1 else f"{len(filenames)} volumes ({os.path.basename(filenames[0])}...)"
+            return f"{result} (sem alterações desde a última exportação)" if cached else result
+        
+        job = self.jobs.submit(('relatorio',), "Relatório completo", render, self.on_pdf_job_finished)
+        if job is None:
+            self.show_snackbar("O relatório completo já está sendo gerado", "orange")
+    
+    @instrumented
+    def on_import_file_picked(self, e):
+        """Agenda a importação do arquivo escolhido em segundo plano"""
+        if not e.files:
+            return
+        path = e.files[0].path
+        if not path:
+            self.show_snackbar("A importação exige acesso direto ao arquivo (aplicativo desktop)", "orange")
+            return
+        
+        def run(job):
+            return import_inscricoes(self.db, path, progress=job.report)
+        
+        def on_finish(job, result, error):
+            if isinstance(error, JobCancelado):
+                self.show_snackbar("Importação cancelada (lotes já gravados foram mantidos)", "grey")
+                return
+            if error is not None:
+                self.show_snackbar(f"Erro na importação: {str(error)}", "red")
+                return
+            imported, rejected, seconds = result
+            message = f"{imported} inscrições importadas em {seconds:.1f}s"
+            if rejected:
+                message += f"; {rejected} rejeitadas (veja {os.path.splitext(path)[0]}_erros.csv)"
+            self.show_snackbar(message, "green" if not rejected else "orange")
+            if self.current_view == "inscricoes":
+                self.reload_inscricoes()
+        
+        job = self.jobs.submit(('importacao', path), f"Importando {os.path.basename(path)}", run, on_finish)
+        if job is None:
+            self.show_snackbar("Este arquivo já está sendo importado", "orange")
+    
+    def on_pdf_job_finished(self, job, filename, error):
+        """Informa o resultado de um job de PDF (chamado na thread do job)"""
+        if isinstance(error, JobCancelado):
+            self.show_snackbar(f"Geração cancelada: {job.descricao}", "grey")
+        elif error is not None:
+            self.show_snackbar(f"Erro ao gerar PDF: {str(error)}", "red")
+            logger.error("Erro no job '%s': %s", job.descricao, error)
+        else:
+            self.show_snackbar(f"PDF gerado: {filename}", "green")
+            logger.info("PDF gerado: %s", filename)
+    
+    def create_jobs_panel(self):
+        """Cria o painel flutuante que acompanha os jobs em segundo plano"""
+        self.jobs_column = ft.Column(spacing=8)
+        self.jobs_panel = ft.Container(
+            content=self.jobs_column,
+            right=20,
+            bottom=20,
+            width=320,
+            padding=ft.padding.all(12),
+            bgcolor="white",
+            border=ft.border.all(1, "grey300"),
+            border_radius=10,
+            visible=False
+        )
+        self.page.overlay.append(self.jobs_panel)
+    
+    def on_jobs_change(self, job):
+        """Atualiza o painel de jobs, limitando a frequência de envios ao cliente"""
+        with self.jobs_panel_lock:
+            jobs = self.jobs.active_jobs()
+            now = time.monotonic()
+            # Só eventos de progresso são limitados; início e fim sempre atualizam
+            if job in jobs and job.key in self.jobs_panel_rows and now - self.jobs_panel_updated < 0.2:
+                return
+            self.jobs_panel_updated = now
             
-        except Exception as ex:
-            self.show_snackbar(f"Erro ao exportar relatório: {str(ex)}", "red")
+            self.jobs_panel_rows = {}
+            self.jobs_column.controls.clear()
+            for active in jobs:
+                self.jobs_column.controls.append(
+                    ft.Row([
+                        ft.Column([
+                            ft.Text(active.descricao, size=12, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+                            ft.ProgressBar(value=active.progress, width=220)
+                        ], spacing=4, expand=True),
+                        ft.IconButton(
+                            icon="close",
+                            tooltip="Cancelar",
+                            on_click=lambda e, key=active.key: self.jobs.cancel(key)
+                        )
+                    ])
+                )
+                self.jobs_panel_rows[active.key] = active
+            self.jobs_panel.visible = bool(jobs)
+            self.jobs_panel.update()
     
+    @instrumented
     def show_relatorios(self, e=None):
         """Exibe a tela de relatórios"""
         self.page.clean()
@@ -1036,6 +4104,27 @@ class ProgramaSocialApp:
                 icon="analytics",
                 width=300,
                 height=50
+            ),
+            ft.ElevatedButton(
+                text="Histórico de Status",
+                on_click=self.show_status_history,
+                icon="history",
+                width=300,
+                height=50
+            ),
+            ft.ElevatedButton(
+                text="Gerar Fichas em Lote",
+                on_click=self.show_fichas_lote_dialog,
+                icon="library_books",
+                width=300,
+                height=50
+            ),
+            ft.ElevatedButton(
+                text="Salvar Métricas de Desempenho",
+                on_click=self.dump_metrics,
+                icon="speed",
+                width=300,
+                height=50
             )
         ], spacing=15, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
         
@@ -1054,21 +4143,109 @@ class ProgramaSocialApp:
         )
         self.page.update()
     
-    def get_detailed_statistics(self):
-        """Obtém estatísticas detalhadas"""
-        cursor = self.conn.cursor()
+    def dump_metrics(self, e):
+        """Grava o retrato atual das métricas (consultas, telas e jobs) em JSON"""
+        os.makedirs(PDF_DIR, exist_ok=True)
+        filename = os.path.join(PDF_DIR, f"metricas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        METRICS.dump(filename)
+        self.show_snackbar(f"Métricas salvas: {filename}", "green")
+    
+    def show_fichas_lote_dialog(self, e):
+        """Mostra o diálogo de geração de fichas em lote"""
+        self.lote_status = ft.Dropdown(
+            label="Status",
+            width=250,
+            options=[
+                ft.dropdown.Option("Todos"),
+                ft.dropdown.Option("Pendente"),
+                ft.dropdown.Option("Aprovada"),
+                ft.dropdown.Option("Rejeitada")
+            ],
+            value="Aprovada"
+        )
+        self.lote_de = ft.TextField(label="Cadastradas de (AAAA-MM-DD)", width=250)
+        self.lote_ate = ft.TextField(label="Cadastradas até (AAAA-MM-DD)", width=250)
+        self.lote_zip = ft.Checkbox(label="Compactar em arquivo .zip", value=True)
         
-        # Estatísticas básicas
-        stats = self.get_statistics()
+        dialog = ft.AlertDialog(
+            title=ft.Text("Gerar Fichas em Lote"),
+            content=ft.Column([
+                self.lote_status,
+                self.lote_de,
+                self.lote_ate,
+                self.lote_zip
+            ], tight=True, spacing=10),
+            actions=[
+                ft.TextButton("Cancelar", on_click=lambda e: self.close_dialog()),
+                ft.ElevatedButton("Gerar", on_click=self.start_fichas_lote)
+            ]
+        )
+        
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+    
+    @instrumented
+    def start_fichas_lote(self, e):
+        """Agenda a geração das fichas do filtro escolhido em segundo plano"""
+        status = self.lote_status.value
+        date_from = self.lote_de.value or None
+        date_to = self.lote_ate.value or None
+        try:
+            build_fichas_query(status, date_from, date_to)
+        except ValueError:
+            self.show_snackbar("Datas devem estar no formato AAAA-MM-DD", "red")
+            return
+        
+        zip_path = None
+        if self.lote_zip.value:
+            zip_path = os.path.join(PDF_DIR, f"fichas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
         
-        # Média de renda
-        cursor.execute('SELECT AVG(renda_familiar) FROM inscricoes')
-        media_renda = cursor.fetchone()[0] or 0
+        def render(job):
+            with self.db.read() as conn:
+                return generate_fichas_lote(conn, status, date_from, date_to, zip_path, progress=job.report)
+        
+        def on_finish(job, result, error):
+            if error is not None:
+                self.on_pdf_job_finished(job, None, error)
+                return
+            count, seconds, output = result
+            self.show_snackbar(
+                f"{count} fichas geradas em {output} ({count / max(seconds, 0.001):.1f} fichas/s)",
+                "green"
+            )
         
-        # Média de membros da família
-        cursor.execute('SELECT AVG(membros_familia) FROM inscricoes')
-        media_membros = cursor.fetchone()[0] or 0
+        self.close_dialog()
+        job = self.jobs.submit(('fichas_lote',), f"Fichas em lote ({status})", render, on_finish)
+        if job is None:
+            self.show_snackbar("Já existe uma geração de fichas em lote em andamento", "orange")
+    
+    @instrumented
+    def get_analytics(self):
+        """Análises detalhadas (medianas, percentis, renda per capita, histogramas).
         
+        Ficam em cache até mudar renda, família, despesas, escolaridade ou moradia de alguma
+        inscrição; mudanças de status não exigem novo cálculo.
+        """
+        # Importado só aqui: o NumPy não pesa na abertura do app
+        import analytics_social
+
+        def compute():
+            with self.db.read() as conn:
+                columns = analytics_social.load_columns(conn)
+            return analytics_social.compute_analytics(columns)
+
+        return self.db.cached('analises', compute, self.db.data_counter('analises'))
+
+    def get_detailed_statistics(self):
+        """Obtém estatísticas detalhadas"""
+        # Estatísticas básicas (já trazem as somas do resumo)
+        stats = self.get_statistics()
+
+        # Médias calculadas a partir das somas acumuladas
+        media_renda = stats['soma_renda'] / stats['total'] if stats['total'] else 0
+        media_membros = stats['soma_membros'] / stats['total'] if stats['total'] else 0
+
         stats.update({
             'media_renda': media_renda,
             'media_membros': media_membros
@@ -1076,6 +4253,7 @@ class ProgramaSocialApp:
         
         return stats
     
+    @instrumented
     def show_status_report(self, e):
         """Mostra relatório por status com gráfico circular."""
         stats = self.get_statistics()
@@ -1159,6 +4337,7 @@ class ProgramaSocialApp:
         dialog.open = True
         self.page.update()
 
+    @instrumented
     def show_detailed_stats(self, e):
         """Mostra estatísticas detalhadas com gráfico de colunas."""
         stats = self.get_detailed_statistics()
@@ -1254,16 +4433,129 @@ class ProgramaSocialApp:
             animate=500,
         )
         
+        import analytics_social
+
+        analises = self.get_analytics()
+        renda = analises['renda']
+        per_capita = analises['renda_per_capita']
+        percentis = per_capita['percentis']
+
+        # Renda per capita: quantas inscrições em cada faixa
+        faixas_chart = self.build_analytics_bar_chart(
+            [f"F{i + 1}" for i in range(len(analises['faixas_per_capita']))],
+            analises['histograma_per_capita'],
+            [f"{rotulo}: {n}" for rotulo, n in zip(analises['faixas_per_capita'], analises['histograma_per_capita'])],
+            "blue",
+            "Inscrições"
+        )
+
+        # Mediana da renda per capita por escolaridade (rótulos curtos no eixo, nome completo na dica)
+        escolaridades = analises['por_escolaridade']
+        rotulos_curtos = dict(zip(analytics_social.ESCOLARIDADES, analytics_social.ESCOLARIDADES_CURTAS))
+        escolaridade_chart = self.build_analytics_bar_chart(
+            [rotulos_curtos.get(item['categoria'], "N/I") for item in escolaridades],
+            [item['mediana_per_capita'] for item in escolaridades],
+            [f"{item['categoria']}: R$ {item['mediana_per_capita']:.2f} ({item['total']} inscrições)" for item in escolaridades],
+            "purple",
+            "R$ por pessoa"
+        )
+
+        # Histogramas de renda per capita por escolaridade e por moradia: uma coluna por categoria,
+        # com as faixas empilhadas nas cores da legenda
+        faixas = analises['faixas_per_capita']
+        faixa_colors = ["red", "orange", "amber", "lightgreen", "green"]
+        faixas_legenda = ft.Row(
+            [
+                ft.Row([ft.Container(width=12, height=12, bgcolor=cor), ft.Text(rotulo, size=10)], spacing=4)
+                for rotulo, cor in zip(faixas, faixa_colors)
+            ],
+            wrap=True,
+        )
+
+        def histograma_chart(itens, rotulos_curtos):
+            return self.build_analytics_bar_chart(
+                [rotulos_curtos.get(item['categoria'], "N/I") for item in itens],
+                [item['histograma'] for item in itens],
+                [
+                    "\n".join([item['categoria']] + [f"{rotulo}: {n}" for rotulo, n in zip(faixas, item['histograma'])])
+                    for item in itens
+                ],
+                None,
+                "Inscrições",
+                stack_colors=faixa_colors
+            )
+
+        escolaridade_histograma = histograma_chart(escolaridades, rotulos_curtos)
+        moradia_histograma = histograma_chart(
+            analises['por_moradia'],
+            dict(zip(analytics_social.SITUACOES_MORADIA, analytics_social.SITUACOES_MORADIA_CURTAS))
+        )
+
+        # Situação de moradia: participação de cada situação no total
+        moradia_colors = ["green", "blue", "orange", "red", "brown", "teal", "grey"]
+        moradia_sections = [
+            ft.PieChartSection(
+                value=item['total'],
+                title=f"{item['categoria']}: {item['total']}",
+                color=moradia_colors[i % len(moradia_colors)],
+                radius=80,
+                title_style=ft.TextStyle(size=10, color="white", weight=ft.FontWeight.BOLD),
+            )
+            for i, item in enumerate(analises['por_moradia']) if item['total'] > 0
+        ]
+        if not moradia_sections:
+            moradia_sections.append(
+                ft.PieChartSection(
+                    value=1,
+                    title="Sem dados",
+                    color="grey",
+                    radius=80,
+                    title_style=ft.TextStyle(size=10, color="white", weight=ft.FontWeight.BOLD),
+                )
+            )
+        moradia_chart = ft.PieChart(
+            sections=moradia_sections,
+            sections_space=0,
+            center_space_radius=30,
+            width=300,
+            height=300,
+        )
+        
         content = ft.Column([
             ft.Text("Estatísticas Detalhadas", size=20, weight=ft.FontWeight.BOLD),
             ft.Divider(),
             ft.Text(f"Total de Inscrições: {total}", size=16),
             ft.Text(f"Renda Familiar Média: R$ {stats['media_renda']:.2f}", size=14),
+            ft.Text(f"Renda Familiar Mediana: R$ {renda['mediana']:.2f}", size=14),
             ft.Text(f"Média de Membros por Família: {stats['media_membros']:.1f}", size=14),
+            ft.Text(f"Renda per Capita Mediana: R$ {per_capita['mediana']:.2f}", size=14),
+            ft.Text(
+                "Renda per Capita (P10 / P25 / P75 / P90): "
+                f"R$ {percentis[10]:.2f} / R$ {percentis[25]:.2f} / R$ {percentis[75]:.2f} / R$ {percentis[90]:.2f}",
+                size=14
+            ),
+            ft.Text(f"Despesas / Renda (mediana): {analises['comprometimento']['mediana'] * 100:.1f}%", size=14),
             ft.Divider(),
             ft.Text("Distribuição por Status (Gráfico de Colunas)", size=16, weight=ft.FontWeight.BOLD),
-            bar_chart
-        ])
+            bar_chart,
+            ft.Divider(),
+            ft.Text("Faixas de Renda per Capita", size=16, weight=ft.FontWeight.BOLD),
+            faixas_chart,
+            ft.Divider(),
+            ft.Text("Renda per Capita Mediana por Escolaridade", size=16, weight=ft.FontWeight.BOLD),
+            escolaridade_chart,
+            ft.Divider(),
+            ft.Text("Faixas de Renda per Capita por Escolaridade", size=16, weight=ft.FontWeight.BOLD),
+            faixas_legenda,
+            escolaridade_histograma,
+            ft.Divider(),
+            ft.Text("Situação de Moradia", size=16, weight=ft.FontWeight.BOLD),
+            moradia_chart,
+            ft.Divider(),
+            ft.Text("Faixas de Renda per Capita por Situação de Moradia", size=16, weight=ft.FontWeight.BOLD),
+            faixas_legenda,
+            moradia_histograma
+        ], scroll=ft.ScrollMode.AUTO, height=600, width=450)
         
         dialog = ft.AlertDialog(
             title=ft.Text("Estatísticas Detalhadas"),
@@ -1275,6 +4567,134 @@ class ProgramaSocialApp:
         dialog.open = True
         self.page.update()
     
+    def get_status_history_report(self, dias=HISTORICO_DIAS):
+        """Aprovações por dia, percentis do tempo pendente e mudanças do usuário nos últimos dias"""
+        de, ate = history_range(dias)
+        with self.db.read() as conn:
+            aprovacoes = dict(daily_status_counts(conn, 'Aprovada', de, ate))
+            pendencia = time_in_status_percentiles(conn, 'Pendente', de, ate)
+            usuario = dict(conn.execute(SQL_HISTORICO_POR_USUARIO, (self.current_user_id(), de, ate)).fetchall())
+        # Um valor por dia do período, inclusive os dias sem aprovações
+        inicio = datetime.strptime(de, '%Y-%m-%d')
+        dias_periodo = [(inicio + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(dias)]
+        return {
+            'de': de,
+            'ate': ate,
+            'aprovacoes_por_dia': [(dia, aprovacoes.get(dia, 0)) for dia in dias_periodo],
+            'tempo_pendente': pendencia,
+            'mudancas_usuario': usuario
+        }
+    
+    @instrumented
+    def show_status_history(self, e):
+        """Mostra a vazão diária de aprovações e quanto tempo as inscrições ficam pendentes"""
+        report = self.get_status_history_report()
+        por_dia = report['aprovacoes_por_dia']
+        pendencia = report['tempo_pendente']
+        
+        aprovacoes_chart = self.build_analytics_bar_chart(
+            # Rótulo só a cada 5 dias para caber no eixo
+            [dia[8:10] if i % 5 == 0 else "" for i, (dia, _) in enumerate(por_dia)],
+            [total for _, total in por_dia],
+            [f"{dia}: {total} aprovações" for dia, total in por_dia],
+            "green",
+            "Aprovações"
+        )
+        
+        if pendencia['total']:
+            tempos = [
+                ft.Text(f"P{p}: {format_duration(segundos)}", size=14)
+                for p, segundos in pendencia['percentis'].items()
+            ]
+        else:
+            tempos = [ft.Text("Nenhuma inscrição saiu de Pendente no período", size=14, color="grey")]
+        
+        usuario = report['mudancas_usuario']
+        content = ft.Column([
+            ft.Text(f"Período: {report['de']} a {report['ate']}", size=14, color="grey"),
+            ft.Text(f"Aprovações no período: {sum(total for _, total in por_dia)}", size=16),
+            ft.Divider(),
+            ft.Text("Aprovações por Dia", size=16, weight=ft.FontWeight.BOLD),
+            aprovacoes_chart,
+            ft.Divider(),
+            ft.Text(f"Tempo em Pendente ({pendencia['total']} inscrições decididas)", size=16, weight=ft.FontWeight.BOLD),
+            *tempos,
+            ft.Divider(),
+            ft.Text(
+                "Suas mudanças no período: "
+                + (", ".join(f"{status}: {total}" for status, total in usuario.items()) or "nenhuma"),
+                size=14
+            )
+        ], scroll=ft.ScrollMode.AUTO, height=600, width=450)
+        
+        dialog = ft.AlertDialog(
+            title=ft.Text("Histórico de Status"),
+            content=content,
+            actions=[ft.TextButton("Fechar", on_click=lambda e: self.close_dialog())]
+        )
+        
+        self.page.dialog = dialog
+        dialog.open = True
+        self.page.update()
+    
+    def build_analytics_bar_chart(self, labels, values, tooltips, color, title, stack_colors=None):
+        """Gráfico de colunas dos relatórios (uma coluna por rótulo).
+        
+        Com stack_colors, cada valor é a lista das partes da coluna (um histograma, por exemplo),
+        empilhadas de baixo para cima nessas cores.
+        """
+        totals = [sum(value) for value in values] if stack_colors else values
+        max_y_value = max(totals, default=0) or 1
+        return ft.BarChart(
+            bar_groups=[
+                ft.BarChartGroup(
+                    x=i,
+                    bar_rods=[
+                        ft.BarChartRod(
+                            from_y=0,
+                            to_y=total,
+                            color=color,
+                            width=20,
+                            border_radius=0 if stack_colors else 5,
+                            tooltip=tooltip,
+                            rod_stack_items=self.build_stack_items(value, stack_colors) if stack_colors else None
+                        )
+                    ]
+                )
+                for i, (value, total, tooltip) in enumerate(zip(values, totals, tooltips))
+            ],
+            left_axis=ft.ChartAxis(
+                labels_size=40,
+                title=title,
+                title_size=16,
+            ),
+            bottom_axis=ft.ChartAxis(
+                labels=[
+                    ft.ChartAxisLabel(value=i, label=ft.Container(ft.Text(label, size=10), padding=5))
+                    for i, label in enumerate(labels)
+                ],
+                labels_size=30,
+            ),
+            horizontal_grid_lines=ft.ChartGridLines(
+                interval=max_y_value / 5,
+                color="grey",
+                width=0.5,
+            ),
+            min_y=0,
+            max_y=max_y_value * 1.2,
+            height=300,
+            width=400,
+        )
+    
+    def build_stack_items(self, parts, colors):
+        """Trechos de uma coluna empilhada: cada parte começa onde a anterior terminou"""
+        items = []
+        start = 0
+        for part, color in zip(parts, colors):
+            items.append(ft.BarChartRodStackItem(from_y=start, to_y=start + part, color=color))
+            start += part
+        return items
+    
     def close_dialog(self):
         """Fecha o dialog atual"""
         if self.page.dialog:
@@ -1295,9 +4715,410 @@ class ProgramaSocialApp:
         self.page.snack_bar.open = True
         self.page.update()
 
+ASYNC_EXECUTOR = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='async-db')
+
+class AsyncRepository:
+    """Acesso ao banco para handlers async: cada chamada roda no executor, fora do loop de eventos"""
+
+    def __init__(self, database, executor=None):
+        # Future do Database: só é resolvido dentro do executor, sem bloquear o loop na abertura
+        self.database = database
+        self.executor = executor or ASYNC_EXECUTOR
+
+    @property
+    def db(self):
+        return self.database.result()
+
+    async def run(self, func, *args):
+        """Executa uma função bloqueante (SQLite, reportlab) no executor e aguarda o resultado"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    def _execute_write(self, sql, params):
+        return self.db.execute_write(sql, params)
+
+    def _run_write(self, func, *args):
+        return self.db.run_write(func, *args)
+
+    def _fetch(self, sql, params, one):
+        with self.db.read() as conn:
+            cursor = conn.execute(sql, params)
+            return cursor.fetchone() if one else cursor.fetchall()
+
+    async def fetchone(self, sql, params=()):
+        return await self.run(self._fetch, sql, params, True)
+
+    async def fetchall(self, sql, params=()):
+        return await self.run(self._fetch, sql, params, False)
+
+    async def execute(self, sql, params=()):
+        return await self.run(self._execute_write, sql, params)
+
+    async def write(self, func, *args):
+        """Enfileira func(conn, *args) para o escritor (uma transação) e aguarda o resultado"""
+        return await self.run(self._run_write, func, *args)
+
+class AsyncProgramaSocialApp(ProgramaSocialApp):
+    """Variante async do app para o modo web.
+    
+    Todas as sessões de um processo dividem o mesmo loop de eventos; aqui os handlers
+    aguardam as consultas e PDFs no executor de AsyncRepository em vez de bloquear o loop.
+    Métodos chamados de forma síncrona (lambdas dos cards, jobs) agendam a versão async
+    com page.run_task.
+    """
+
+    def init_database(self):
+        """Inicia a abertura do banco e cria o repositório async sobre ela"""
+        super().init_database()
+        self.repo = AsyncRepository(self.database)
+        self.list_generation = 0
+        self.list_loading = None
+
+    @instrumented
+    async def login_click(self, e):
+        """Processa o login do usuário"""
+        email = self.email_field.value
+        senha = self.password_field.value
+        
+        if not email or not senha:
+            self.show_snackbar("Por favor, preencha todos os campos", "red")
+            return
+        
+        senha_hash = hashlib.sha256(senha.encode()).hexdigest()
+        user = await self.repo.fetchone(SQL_LOGIN, (email, senha_hash))
+        
+        if user:
+            self.current_user = {"id": user[0], "nome": user[1], "email": email}
+            await self.repo.run(self.show_dashboard)
+        else:
+            self.show_snackbar("Email ou senha incorretos", "red")
+
+    @instrumented
+    async def register_click(self, e):
+        """Processa o cadastro de novo usuário"""
+        nome = self.reg_nome.value
+        email = self.reg_email.value
+        senha = self.reg_senha.value
+        
+        erro = self.validate_registration(nome, email, senha, self.reg_confirma_senha.value)
+        if erro:
+            self.show_snackbar(erro, "red")
+            return
+        
+        senha_hash = hashlib.sha256(senha.encode()).hexdigest()
+        
+        try:
+            await self.repo.execute(SQL_INSERT_USUARIO, (nome, email, senha_hash))
+            self.show_snackbar("Usuário cadastrado com sucesso!", "green")
+            self.show_login()
+        except sqlite3.IntegrityError:
+            self.show_snackbar("Este email já está cadastrado", "red")
+
+    @instrumented
+    async def save_inscricao(self, e):
+        """Salva a inscrição no banco de dados"""
+        for field in REQUIRED_FIELDS:
+            if not self.form_fields[field].value:
+                self.show_snackbar(f"Campo '{self.form_fields[field].label}' é obrigatório", "red")
+                return
+        
+        try:
+            values = {field: self.form_fields[field].value for field in INSCRICAO_FIELDS}
+            candidatas = await self.repo.write(insert_inscricao, parse_inscricao(values))
+            
+            self.show_saved_message(candidatas)
+            self.clear_form()
+            await self.repo.run(self.show_dashboard)
+            
+        except Exception as ex:
+            self.show_snackbar(f"Erro ao salvar: {str(ex)}", "red")
+
+    def load_inscricoes(self, status_filter="Todos", search=None, criterios=None):
+        """Agenda o recarregamento da lista no loop de eventos"""
+        self.page.run_task(self.load_inscricoes_async, status_filter, search, criterios)
+
+    @instrumented
+    async def load_inscricoes_async(self, status_filter="Todos", search=None, criterios=None):
+        """Reinicia a lista e carrega a primeira página de inscrições"""
+        with self.list_lock:
+            self.list_generation += 1
+            generation = self.list_generation
+            self.list_filter = status_filter
+            self.list_search = search
+            self.list_criterios = criterios
+            self.list_cursor = None
+            self.list_exhausted = False
+            self.list_cards.clear()
+            self.inscricoes_list.controls.clear()
+            self.clear_selection()
+
+        await self.load_next_page_async()
+
+        if generation == self.list_generation and not self.inscricoes_list.controls:
+            self.inscricoes_list.controls.append(
+                ft.Text("Nenhuma inscrição encontrada", size=16, color="grey")
+            )
+        self.page.update()
+
+    @instrumented
+    async def load_next_page_async(self):
+        """Acrescenta a próxima página de inscrições ao final da lista"""
+        # Só uma carga por vez em cada geração da lista; o lock não é mantido durante o await
+        generation = self.list_generation
+        if self.list_exhausted or self.list_loading == generation:
+            return
+        self.list_loading = generation
+        try:
+            inscricoes = await self.repo.run(
+                self.fetch_inscricoes_page, self.list_filter, self.list_cursor, PAGE_SIZE, self.list_search,
+                self.list_criterios
+            )
+            with self.list_lock:
+                # Descarta a página se a lista foi reiniciada durante a consulta
+                if generation == self.list_generation:
+                    self.append_inscricoes_page(inscricoes)
+        finally:
+            if self.list_loading == generation:
+                self.list_loading = None
+
+    async def on_inscricoes_scroll(self, e):
+        """Carrega a próxima página quando a rolagem se aproxima do fim"""
+        if self.list_exhausted or e.max_scroll_extent is None:
+            return
+        if e.pixels >= e.max_scroll_extent - 300:
+            await self.load_next_page_async()
+            self.inscricoes_list.update()
+
+    def show_inscricao_details(self, inscricao_id):
+        """Lê e exibe os detalhes de uma inscrição fora do loop de eventos"""
+        self.page.run_task(self.repo.run, super().show_inscricao_details, inscricao_id)
+
+    def show_detailed_stats(self, e):
+        """Calcula as análises detalhadas fora do loop de eventos (a primeira leitura é demorada)"""
+        self.page.run_task(self.repo.run, super().show_detailed_stats, e)
+
+    @instrumented
+    async def apply_bulk_status(self, e):
+        """Aplica o novo status às inscrições selecionadas com um único UPDATE"""
+        bulk = self.prepare_bulk_status()
+        if bulk is None:
+            return
+        new_status, where_sql, params = bulk
+        try:
+            updated = await self.repo.write(change_status, new_status, where_sql, params, self.current_user_id())
+        except Exception as ex:
+            self.show_snackbar(f"Erro ao atualizar status: {str(ex)}", "red")
+            logger.exception("Erro ao aplicar o status %s em massa", new_status)
+            return
+        self.finish_bulk_status(new_status, updated)
+
+    def update_status(self, inscricao_id, new_status):
+        """Agenda a atualização de status no loop de eventos"""
+        self.page.run_task(self.update_status_async, inscricao_id, new_status)
+
+    @instrumented
+    async def update_status_async(self, inscricao_id, new_status):
+        """Atualiza o status de uma inscrição"""
+        try:
+            await self.repo.write(change_status, new_status, 'id = ?', [inscricao_id], self.current_user_id())
+        except Exception as ex:
+            self.show_snackbar(f"Erro ao atualizar status: {str(ex)}", "red")
+            logger.exception("Erro ao atualizar status da inscrição ID %s", inscricao_id)
+            return
+        self.patch_inscricao_card(inscricao_id, new_status)
+        self.show_snackbar(f"Status atualizado para: {new_status}", "green")
+
+    def resolve_duplicidade(self, inscricao_id, original_id, duplicata):
+        """Agenda a decisão sobre um par de possíveis duplicatas no loop de eventos"""
+        self.page.run_task(self.resolve_duplicidade_async, inscricao_id, original_id, duplicata)
+
+    @instrumented
+    async def resolve_duplicidade_async(self, inscricao_id, original_id, duplicata):
+        """Grava a decisão sobre um par e o tira da tela"""
+        decidido = await self.repo.write(
+            resolve_duplicate, inscricao_id, original_id, duplicata, self.current_user_id()
+        )
+        self.finish_duplicidade(inscricao_id, original_id, duplicata, decidido)
+
+    def generate_pdf(self, inscricao_id):
+        """Agenda a geração do PDF de uma inscrição"""
+        self.page.run_task(self.generate_pdf_async, inscricao_id)
+
+    @instrumented
+    async def generate_pdf_async(self, inscricao_id):
+        """Lê a inscrição e coloca a geração da ficha na fila de jobs"""
+        try:
+            inscricao = await self.repo.run(self.get_inscricao, inscricao_id)
+            if not inscricao:
+                self.show_snackbar("Inscrição não encontrada", "red")
+                logger.warning("Inscrição ID %s não encontrada para PDF", inscricao_id)
+                return
+            self.submit_ficha_job(inscricao)
+        except Exception as ex:
+            self.show_snackbar(f"Erro ao gerar PDF: {str(ex)}", "red")
+            logger.exception("Erro ao gerar PDF para inscrição ID %s", inscricao_id)
+
 def main(page: ft.Page):
     """Função principal do aplicativo"""
     app = ProgramaSocialApp(page)
 
+async def main_async(page: ft.Page):
+    """Função principal da variante async (PROGRAMA_SOCIAL_ASYNC=1)"""
+    AsyncProgramaSocialApp(page)
+
+def run_cli(argv):
+    """Comandos administrativos executados sem abrir a interface"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Programa Social - comandos administrativos")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    resumo_parser = subparsers.add_parser("resumo", help="Recalcula o resumo de estatísticas e reporta divergências")
+    resumo_parser.add_argument("--verificar", action="store_true", help="Apenas verifica, sem corrigir")
+
+    subparsers.add_parser("migrar", help="Aplica as migrações pendentes do banco")
+    subparsers.add_parser("planos", help="Verifica se as consultas do app usam índices (EXPLAIN QUERY PLAN)")
+    subparsers.add_parser("prioridade", help="Recalcula a pontuação de vulnerabilidade de todas as inscrições")
+
+    duplicidades_parser = subparsers.add_parser("duplicidades", help="Procura possíveis duplicatas por nome e endereço")
+    duplicidades_parser.add_argument("--janela", type=int, default=duplicidades_social.JANELA,
+                                     help="Vizinhas comparadas com cada inscrição dentro de um bloco")
+
+    historico_parser = subparsers.add_parser("historico", help="Aprovações por dia e tempo em Pendente (histórico de status)")
+    historico_parser.add_argument("--dias", type=int, default=HISTORICO_DIAS, help="Últimos N dias")
+
+    exportar_parser = subparsers.add_parser("exportar", help="Exporta o relatório completo em PDF (leitura em blocos)")
+    exportar_parser.add_argument("--volume", type=int, default=EXPORT_VOLUME_ROWS,
+                                 help="Divide em volumes de N inscrições (0 = arquivo único)")
+    exportar_parser.add_argument("--com-arquivo", action="store_true", help="Inclui as inscrições arquivadas")
+
+    arquivar_parser = subparsers.add_parser("arquivar", help="Move inscrições encerradas antigas para o banco de arquivo")
+    arquivar_parser.add_argument("--dias", type=int, default=ARQUIVO_IDADE_DIAS,
+                                 help="Sem alteração há mais de N dias")
+    arquivar_parser.add_argument("--lote", type=int, default=ARQUIVO_BATCH_ROWS, help="Inscrições por transação")
+
+    importar_parser = subparsers.add_parser("importar", help="Importa inscrições de um arquivo CSV, JSON ou JSON Lines")
+    importar_parser.add_argument("arquivo", help="Arquivo .csv, .json (array de objetos) ou .jsonl")
+    importar_parser.add_argument("--erros", help="Arquivo das linhas rejeitadas (padrão: <arquivo>_erros.csv)")
+
+    fichas_parser = subparsers.add_parser("fichas", help="Gera em paralelo a ficha de cada inscrição do filtro")
+    fichas_parser.add_argument("--status", default="Aprovada", help="Status das inscrições (ou Todos)")
+    fichas_parser.add_argument("--de", help="Cadastradas a partir de AAAA-MM-DD")
+    fichas_parser.add_argument("--ate", help="Cadastradas até AAAA-MM-DD")
+    fichas_parser.add_argument("--zip", action="store_true", help="Grava as fichas num arquivo .zip")
+    fichas_parser.add_argument("--processos", type=int, help="Processos do pool (padrão: núcleos da CPU)")
+
+    args = parser.parse_args(argv)
+    db = Database(DB_PATH)
+    try:
+        return run_command(args, db)
+    finally:
+        db.close()
+
+def run_command(args, db):
+    """Executa um comando administrativo já interpretado"""
+    if args.comando == "resumo":
+        with db.write() as conn:
+            divergencias = rebuild_resumo(conn, fix=not args.verificar, commit=False)
+        if not divergencias:
+            print("Resumo consistente com a tabela de inscrições.")
+            return 0
+        for d in divergencias:
+            print(f"Divergência em '{d['status']}': esperado (total, renda em centavos, membros) = "
+                  f"{d['esperado']}, resumo = {d['atual']}")
+        if args.verificar:
+            return 1
+        print("Resumo reconstruído.")
+        return 0
+
+    if args.comando == "prioridade":
+        started = time.perf_counter()
+        updated = rescore_prioridade(db, progress=lambda fraction: print(f"  {fraction:.0%}", end='\r'))
+        print(f"{updated} inscrições repontuadas em {time.perf_counter() - started:.1f}s.")
+        return 0
+
+    if args.comando == "duplicidades":
+        novos, seconds = detect_duplicates(
+            db, args.janela, progress=lambda fraction: print(f"  {fraction:.0%}", end='\r')
+        )
+        with db.read() as conn:
+            pendentes = conn.execute(SQL_DUPLICIDADES_PENDENTES_TOTAL).fetchone()[0]
+        print(f"{novos} novos pares de possíveis duplicatas em {seconds:.1f}s; {pendentes} pendentes de revisão.")
+        return 0
+
+    if args.comando == "arquivar":
+        started = time.perf_counter()
+        moved = archive_inscricoes(db, args.dias, args.lote,
+                                   progress=lambda n: print(f"  {n} inscrições arquivadas...", end='\r'))
+        print(f"{moved} inscrições ({', '.join(ARQUIVO_STATUS)}) arquivadas em {db.archive_path} "
+              f"em {time.perf_counter() - started:.1f}s")
+        return 0
+
+    if args.comando == "importar":
+        imported, rejected, seconds = import_inscricoes(db, args.arquivo, args.erros)
+        print(f"{imported} inscrições importadas em {seconds:.1f}s ({imported / max(seconds, 0.001):.0f} linhas/s)")
+        if rejected:
+            print(f"{rejected} linhas rejeitadas: {args.erros or os.path.splitext(args.arquivo)[0] + '_erros.csv'}")
+        return 0
+
+    with db.read() as conn:
+        return run_read_command(args, conn)
+
+def run_read_command(args, conn):
+    """Comandos administrativos que apenas leem o banco"""
+    if args.comando == "migrar":
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        print(f"Esquema na versão {version}.")
+        return 0
+
+    if args.comando == "planos":
+        problemas = check_query_plans(conn)
+        for nome, passo in problemas:
+            print(f"Consulta '{nome}' sem índice: {passo}")
+        if problemas:
+            return 1
+        print(f"Todas as {len(app_queries())} consultas usam índices.")
+        return 0
+
+    if args.comando == "historico":
+        de, ate = history_range(args.dias)
+        started = time.perf_counter()
+        aprovacoes = daily_status_counts(conn, 'Aprovada', de, ate)
+        pendencia = time_in_status_percentiles(conn, 'Pendente', de, ate)
+        elapsed = time.perf_counter() - started
+        print(f"Aprovações por dia de {de} a {ate}:")
+        for dia, total in aprovacoes:
+            print(f"  {dia}: {total}")
+        print(f"Tempo em Pendente ({pendencia['total']} inscrições decididas):")
+        for p, segundos in pendencia['percentis'].items():
+            print(f"  P{p}: {format_duration(segundos)}")
+        print(f"Relatórios calculados em {elapsed * 1000:.1f} ms.")
+        return 0
+
+    if args.comando == "fichas":
+        zip_path = None
+        if args.zip:
+            zip_path = os.path.join(PDF_DIR, f"fichas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip")
+        count, seconds, output = generate_fichas_lote(conn, args.status, args.de, args.ate, zip_path, args.processos)
+        print(f"{count} fichas geradas em {output} em {seconds:.1f}s ({count / max(seconds, 0.001):.1f} fichas/s)")
+        return 0
+
+    if args.comando == "exportar":
+        os.makedirs(PDF_DIR, exist_ok=True)
+        filename_base = f"{PDF_DIR}/relatorio_completo_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        filenames, cached = export_relatorio_cached(conn, get_pdf_cache(PDF_DIR), filename_base, args.volume,
+                                                    com_arquivo=args.com_arquivo)
+        for filename in filenames:
+            print(f"Relatório {'sem alterações desde a última exportação' if cached else 'exportado'}: {filename}")
+        return 0
+
 if __name__ == "__main__":
-    ft.app(target=main)
+    import sys
+    logging.basicConfig(level=os.environ.get('PROGRAMA_SOCIAL_LOG', 'INFO'),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    # analytics_social importa as listas de opções deste módulo: registrar o script com o nome do
+    # módulo evita que esse import execute app_social uma segunda vez
+    sys.modules.setdefault('app_social', sys.modules[__name__])
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    ft.app(target=main_async if os.environ.get('PROGRAMA_SOCIAL_ASYNC') == '1' else main)
@@ -0,0 +1,781 @@
+"""Benchmark das operações mais pesadas do Programa Social.
+
+Gera bancos sintéticos (com semente fixa) de 1k/10k/100k/1M inscrições, mede sem abrir
+a interface Flet a lista paginada (também com critérios de faixa e ordenação), a fila de
+prioridade, as estatísticas, as análises detalhadas (sem e com cache), os relatórios do
+histórico de status, a verificação de duplicidade do cadastro, a exportação do relatório
+completo (e a chave dela no cache de PDFs) e a ficha individual, e grava os tempos em JSON
+para comparar execuções.
+
+    python benchmark_social.py --linhas 1000 10000 100000 --saida bench.json
+    python benchmark_social.py --base bench.json --limite 1.25
+
+Com --base, o script termina com código 1 se alguma operação ficar mais lenta que o
+limite em relação à execução de referência.
+
+Com --sessoes N roda também um teste de carga: N sessões simuladas no mesmo loop asyncio
+(como no modo web do Flet) fazem login, lista, busca, estatísticas e ficha, primeiro com as
+chamadas bloqueando o loop (handlers síncronos) e depois pelo AsyncRepository.
+
+    python benchmark_social.py --linhas 100000 --sessoes 50
+
+Com --escritores N, N threads (atendentes) atualizam status ao mesmo tempo, primeiro cada uma
+com a sua conexão (como antes de get_database) e depois pela fila do escritor com group commit.
+
+    python benchmark_social.py --linhas 10000 --escritores 30
+
+Com --memoria, compara memória por linha e tempo de carga de todas as inscrições como tuplas
+de 17 colunas (modelo anterior) e como objetos Inscricao (completos e só com as colunas da lista).
+
+    python benchmark_social.py --linhas 100000 --memoria
+
+Com --inicializacao, mede a abertura do app num processo novo (python -X importtime): o tempo do
+lançamento até a tela de login pintada, o import de app_social e dos seus maiores imports, e
+quando o banco fica pronto. O script termina com código 1 se o login passar de --orcamento-ms ou
+se reportlab, numpy ou o código das análises forem importados antes do primeiro uso.
+
+    python benchmark_social.py --linhas 100000 --inicializacao --repeticoes 5
+
+Com --importacao, grava N inscrições sintéticas numa planilha CSV (separada por ponto e vírgula,
+valores em reais) e num arquivo JSON com um array, e mede import_inscricoes de cada um num banco
+novo, em linhas por segundo.
+
+    python benchmark_social.py --linhas 200000 --importacao
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app_social import (
+    AsyncRepository, Database, ProgramaSocialApp, FILA_PRIORIDADE, INSCRICAO_COLUMNS, LIST_COLUMN_NAMES, PAGE_SIZE,
+    SQL_LOGIN,
+    change_status, daily_status_counts, export_relatorio_streaming, fetch_inscricao, fill_duplicate_keys,
+    find_duplicates, import_inscricoes, inscricao_cursor, inscricao_insert_sql, page_cursor, relatorio_cache_key, render_ficha_pdf, time_in_status_percentiles
+)
+
+DEFAULT_ROWS = [1000, 10000, 100000]
+DEFAULT_SEED = 42
+DEFAULT_REPEAT = 3
+DEFAULT_ROUNDS = 5
+DEFAULT_WRITES = 50
+
+# Orçamento (ms) do lançamento do processo até a tela de login pintada
+ORCAMENTO_INICIALIZACAO_MS = 1000
+
+# Módulos que só podem ser importados no primeiro uso, nunca antes do login
+MODULOS_SOB_DEMANDA = ('reportlab', 'numpy', 'analytics_social')
+
+# Intervalo do relógio que mede o atraso do loop de eventos durante o teste de carga
+LOOP_TICK = 0.01
+GENERATE_BATCH_ROWS = 20000
+
+# Distribuições aproximadas do público atendido
+STATUS_WEIGHTS = {'Pendente': 60, 'Aprovada': 25, 'Rejeitada': 15}
+GENERO_WEIGHTS = {'Feminino': 52, 'Masculino': 45, 'Outro': 2, 'Prefiro não informar': 1}
+ESCOLARIDADE_WEIGHTS = {
+    'Sem escolaridade': 6,
+    'Ensino Fundamental Incompleto': 24,
+    'Ensino Fundamental Completo': 12,
+    'Ensino Médio Incompleto': 10,
+    'Ensino Médio Completo': 30,
+    'Ensino Superior Incompleto': 7,
+    'Ensino Superior Completo': 9,
+    'Pós-graduação': 2
+}
+MORADIA_WEIGHTS = {
+    'Casa Própria': 35, 'Casa Alugada': 40, 'Casa Cedida': 15,
+    'Ocupação': 6, 'Situação de Rua': 2, 'Outro': 2
+}
+NOMES = ['Maria', 'José', 'Ana', 'João', 'Antônio', 'Francisca', 'Carlos', 'Paulo',
+         'Adriana', 'Lucas', 'Juliana', 'Pedro', 'Márcia', 'Rafael', 'Fernanda', 'Luiz']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves',
+              'Pereira', 'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho']
+RUAS = ['Rua das Flores', 'Avenida Brasil', 'Rua São João', 'Travessa do Comércio',
+        'Rua Sete de Setembro', 'Avenida Getúlio Vargas', 'Rua da Paz']
+
+SQL_INSERT_SINTETICA = inscricao_insert_sql([
+    'nome_completo', 'idade', 'genero', 'cpf', 'endereco', 'telefone', 'email',
+    'renda_familiar', 'membros_familia', 'despesas_mensais', 'escolaridade',
+    'situacao_moradia', 'observacoes', 'status', 'created_at', 'updated_at'
+])
+
+# Histórico sintético: cada inscrição decidida saiu de Pendente entre 1 hora e 60 dias após o
+# cadastro (valor derivado do id, reproduzível), por um de 20 atendentes
+SQL_HISTORICO_SINTETICO = '''
+    INSERT INTO historico_status (inscricao_id, status_anterior, status_novo, usuario_id, segundos_no_status, alterado_em)
+    SELECT id, 'Pendente', status, 1 + id % 20, segundos, datetime(created_at, '+' || segundos || ' seconds')
+    FROM (
+        SELECT id, status, created_at, 3600 + (id * 2654435761) % 5180400 AS segundos
+        FROM inscricoes
+        WHERE status != 'Pendente'
+    )
+'''
+
+def weighted(rnd, weights):
+    return rnd.choices(list(weights), weights=list(weights.values()))[0]
+
+def synthetic_rows(count, seed):
+    """Gera inscrições sintéticas reproduzíveis para a semente informada"""
+    rnd = random.Random(seed)
+    inicio = datetime(2023, 1, 1)
+    periodo = 2 * 365 * 24 * 3600
+    # O CPF é chave única das inscrições: sorteios repetidos ficam sem CPF
+    cpfs = set()
+    for i in range(count):
+        nome = f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {rnd.choice(SOBRENOMES)}"
+        membros = min(1 + int(rnd.expovariate(0.45)), 12)
+        renda = round(min(rnd.lognormvariate(7.2, 0.7), 20000), 2)
+        despesas = round(renda * rnd.uniform(0.5, 1.1), 2)
+        criado = inicio + timedelta(seconds=rnd.randrange(periodo))
+        cpf = f"{rnd.randrange(10 ** 11):011d}" if rnd.random() < 0.8 else None
+        if cpf in cpfs:
+            cpf = None
+        elif cpf:
+            cpfs.add(cpf)
+        telefone = f"(11) 9{rnd.randrange(10 ** 8):08d}" if rnd.random() < 0.7 else None
+        email = f"pessoa{i}@exemplo.com" if rnd.random() < 0.4 else None
+        obs = "Família com criança em idade escolar" if rnd.random() < 0.2 else None
+        yield (
+            nome, rnd.randint(18, 90), weighted(rnd, GENERO_WEIGHTS), cpf,
+            f"{rnd.choice(RUAS)}, {rnd.randint(1, 3000)}", telefone, email,
+            renda, membros, despesas, weighted(rnd, ESCOLARIDADE_WEIGHTS),
+            weighted(rnd, MORADIA_WEIGHTS), obs, weighted(rnd, STATUS_WEIGHTS),
+            criado.strftime('%Y-%m-%d %H:%M:%S'), criado.strftime('%Y-%m-%d %H:%M:%S')
+        )
+
+def generate_history(path):
+    """Preenche o histórico de status de um banco sintético que ainda não o tenha"""
+    db = Database(path)
+    try:
+        with db.write() as conn:
+            if conn.execute('SELECT 1 FROM historico_status LIMIT 1').fetchone():
+                return
+            print(f"Gerando histórico de status em {path}...")
+            conn.execute(SQL_HISTORICO_SINTETICO)
+            conn.execute('ANALYZE historico_status')
+    finally:
+        db.close()
+
+def generate_database(path, count, seed):
+    """Cria (uma vez) o banco sintético com `count` inscrições e o seu histórico de status"""
+    if os.path.exists(path):
+        # Bancos gerados antes do histórico de status o recebem aqui
+        generate_history(path)
+        return
+    print(f"Gerando {count} inscrições em {path}...")
+    started = time.perf_counter()
+    db = Database(path)
+    try:
+        batch = []
+        for row in synthetic_rows(count, seed):
+            batch.append(row)
+            if len(batch) >= GENERATE_BATCH_ROWS:
+                with db.write() as conn:
+                    conn.executemany(SQL_INSERT_SINTETICA, batch)
+                batch = []
+        if batch:
+            with db.write() as conn:
+                conn.executemany(SQL_INSERT_SINTETICA, batch)
+        with db.write() as conn:
+            # Chaves de duplicidade: o INSERT sintético não passa por parse_inscricao
+            last_id = 0
+            while last_id is not None:
+                last_id = fill_duplicate_keys(conn, last_id)
+            conn.execute('ANALYZE')
+    finally:
+        db.close()
+    generate_history(path)
+    print(f"Banco gerado em {time.perf_counter() - started:.1f}s")
+
+def headless_app(db):
+    """Instância do app sem janela Flet, apenas com o banco"""
+    app = ProgramaSocialApp.__new__(ProgramaSocialApp)
+    app.db = db
+    return app
+
+def bench_load_inscricoes(app, db, workdir):
+    # Primeira página e rolagem por mais 20 páginas (cursor da lista)
+    cursor = None
+    for _ in range(21):
+        rows = app.fetch_inscricoes_page("Todos", cursor, PAGE_SIZE)
+        if len(rows) < PAGE_SIZE:
+            break
+        cursor = (rows[-1].created_at, rows[-1].id)
+    app.fetch_inscricoes_page("Pendente", None, PAGE_SIZE)
+
+def bench_lista_criterios(app, db, workdir):
+    # Pendentes com 60 anos ou mais e sem escolaridade, da menor renda per capita, e rolagem por
+    # mais 20 páginas: o índice da ordenação conduz e os demais critérios filtram
+    criterios = {'ordem': "Menor renda per capita", 'idade': (60, None), 'escolaridade': "Sem escolaridade"}
+    cursor = None
+    for _ in range(21):
+        rows = app.fetch_inscricoes_page("Pendente", cursor, PAGE_SIZE, None, criterios)
+        if len(rows) < PAGE_SIZE:
+            break
+        cursor = page_cursor(rows[-1], "Pendente", criterios)
+
+def bench_fila_prioridade(app, db, workdir):
+    # Primeira página da fila de prioridade e rolagem por mais 20 páginas
+    cursor = None
+    for _ in range(21):
+        rows = app.fetch_inscricoes_page(FILA_PRIORIDADE, cursor, PAGE_SIZE)
+        if len(rows) < PAGE_SIZE:
+            break
+        cursor = (rows[-1].prioridade, rows[-1].id)
+
+def bench_get_statistics(app, db, workdir):
+    app.get_statistics()
+
+def bench_historico(app, db, workdir):
+    # Relatórios do histórico num trimestre do período sintético
+    with db.read() as conn:
+        daily_status_counts(conn, 'Aprovada', '2024-01-01', '2024-03-31')
+        time_in_status_percentiles(conn, 'Pendente', '2024-01-01', '2024-03-31')
+
+def bench_duplicidade(app, db, workdir):
+    # Verificação de duplicidade de um cadastro novo (a mesma de insert_inscricao), num nome e
+    # endereço comuns do banco sintético
+    with db.read() as conn:
+        find_duplicates(conn, f"{NOMES[0]} {SOBRENOMES[0]} {SOBRENOMES[1]}", f"{RUAS[0]}, 100")
+
+def bench_export_all_pdf(app, db, workdir):
+    with db.read() as conn:
+        export_relatorio_streaming(conn, os.path.join(workdir, 'relatorio_bench'))
+
+def bench_chave_relatorio(app, db, workdir):
+    # Chave do relatório no cache de PDFs: o custo de decidir se a exportação anterior serve
+    with db.read() as conn:
+        relatorio_cache_key(conn)
+
+def bench_generate_pdf(app, db, workdir):
+    with db.read() as conn:
+        inscricao = fetch_inscricao(conn, 1)
+    render_ficha_pdf(inscricao, io.BytesIO())
+
+def bench_analytics_cold(app, db, workdir):
+    # Leitura das colunas e cálculo completo, sem o cache
+    import analytics_social
+    with db.read() as conn:
+        columns = analytics_social.load_columns(conn)
+    analytics_social.compute_analytics(columns)
+
+def bench_get_analytics(app, db, workdir):
+    # Abertura repetida das estatísticas detalhadas, sem gravações entre elas
+    app.get_analytics()
+
+OPERATIONS = {
+    'load_inscricoes': bench_load_inscricoes,
+    'lista_criterios': bench_lista_criterios,
+    'fila_prioridade': bench_fila_prioridade,
+    'get_statistics': bench_get_statistics,
+    'analytics_cold': bench_analytics_cold,
+    'get_analytics': bench_get_analytics,
+    'historico': bench_historico,
+    'duplicidade': bench_duplicidade,
+    'export_all_pdf': bench_export_all_pdf,
+    'chave_relatorio': bench_chave_relatorio,
+    'generate_pdf': bench_generate_pdf,
+}
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def summarize(latencies):
+    return {
+        name: {
+            'p50_ms': percentile(values, 0.5) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'max_ms': max(values) * 1000,
+            'execucoes': len(values)
+        }
+        for name, values in latencies.items()
+    }
+
+async def simulated_session(app, repo, count, rounds, seed, latencies, blocking):
+    """Sequência de ações de um usuário; com blocking=True as chamadas rodam no próprio loop"""
+    rnd = random.Random(seed)
+    senha_hash = hashlib.sha256('admin123'.encode()).hexdigest()
+
+    async def call(func, *args):
+        if blocking:
+            return func(*args)
+        return await repo.run(func, *args)
+
+    def fetchone(sql, params):
+        with app.db.read() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    actions = [
+        ('login', lambda: call(fetchone, SQL_LOGIN, ('admin@programa.gov.br', senha_hash))),
+        ('lista', lambda: call(app.fetch_inscricoes_page, "Pendente", None, PAGE_SIZE)),
+        ('busca', lambda: call(app.fetch_inscricoes_page, "Todos", None, PAGE_SIZE, rnd.choice(SOBRENOMES))),
+        ('estatisticas', lambda: call(app.get_statistics)),
+        ('ficha', lambda: call(lambda: render_ficha_pdf(
+            app.get_inscricao(rnd.randint(1, count)), io.BytesIO()))),
+    ]
+    for _ in range(rounds):
+        for name, action in actions:
+            # Pequena pausa entre cliques, como um usuário real; a latência conta a partir do
+            # clique, incluindo a espera até o loop atender o handler
+            pause = rnd.uniform(0, 0.02)
+            clicked = time.perf_counter() + pause
+            await asyncio.sleep(pause)
+            await action()
+            latencies.setdefault(name, []).append(time.perf_counter() - clicked)
+
+async def loop_lag_monitor(lags, stop):
+    """Mede quanto o loop de eventos atrasa um timer de LOOP_TICK segundos"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(LOOP_TICK)
+        lags.append(max(0.0, loop.time() - started - LOOP_TICK))
+
+async def load_test(db, count, sessions, rounds, blocking):
+    app = headless_app(db)
+    repo = AsyncRepository(app.database)
+    latencies = {}
+    lags = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag_monitor(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        simulated_session(app, repo, count, rounds, seed, latencies, blocking)
+        for seed in range(sessions)
+    ])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    result = summarize(latencies)
+    result['atraso_do_loop'] = summarize({'lag': lags or [0.0]})['lag']
+    result['duracao_s'] = elapsed
+    return result
+
+def run_load_tests(rows_list, seed, data_dir, sessions, rounds):
+    """Teste de carga com sessões concorrentes: loop bloqueado x AsyncRepository"""
+    results = {}
+    for count in rows_list:
+        path = os.path.join(data_dir, f"bench_{count}_{seed}.db")
+        generate_database(path, count, seed)
+        db = Database(path)
+        try:
+            results[str(count)] = {}
+            for mode, blocking in (('bloqueante', True), ('async', False)):
+                result = asyncio.run(load_test(db, count, sessions, rounds, blocking))
+                results[str(count)][mode] = result
+                lag = result['atraso_do_loop']
+                print(f"{count:>8} linhas  {sessions} sessões {mode:<10} "
+                      f"atraso do loop p95 {lag['p95_ms']:8.1f} ms  max {lag['max_ms']:8.1f} ms")
+                for name in ('login', 'lista', 'busca', 'estatisticas', 'ficha'):
+                    print(f"{'':>26}{name:<14} p50 {result[name]['p50_ms']:8.1f} ms  p95 {result[name]['p95_ms']:8.1f} ms")
+        finally:
+            db.close()
+    return results
+
+def concurrent_writes(path, count, writers, writes, shared_db):
+    """Cada atendente grava `writes` mudanças de status; retorna (gravações/s, falhas)"""
+    failures = []
+    barrier = threading.Barrier(writers)
+
+    def writer(seed):
+        rnd = random.Random(seed)
+        conn = None
+        if shared_db is None:
+            # Uma conexão por sessão, com o timeout padrão do sqlite3, como o app fazia
+            conn = sqlite3.connect(path)
+        barrier.wait()
+        for _ in range(writes):
+            params = (rnd.choice(list(STATUS_WEIGHTS)), 'id = ?', [rnd.randint(1, count)])
+            try:
+                if shared_db is None:
+                    change_status(conn, *params)
+                    conn.commit()
+                else:
+                    shared_db.run_write(change_status, *params)
+            except sqlite3.Error as ex:
+                failures.append(str(ex))
+                if conn is not None:
+                    conn.rollback()
+        if conn is not None:
+            conn.close()
+
+    threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return (writers * writes - len(failures)) / elapsed, len(failures)
+
+def run_write_tests(rows_list, seed, data_dir, writers, writes):
+    """Atualizações de status simultâneas: conexão por sessão x fila do escritor"""
+    results = {}
+    for count in rows_list:
+        path = os.path.join(data_dir, f"bench_{count}_{seed}.db")
+        generate_database(path, count, seed)
+        results[str(count)] = {}
+        for mode in ('conexao_por_sessao', 'fila_do_escritor'):
+            db = Database(path) if mode == 'fila_do_escritor' else None
+            try:
+                throughput, failures = concurrent_writes(path, count, writers, writes, db)
+            finally:
+                if db is not None:
+                    db.close()
+            results[str(count)][mode] = {'gravacoes_por_s': throughput, 'falhas': failures}
+            print(f"{count:>8} linhas  {writers} escritores {mode:<20} {throughput:8.0f} gravações/s  {failures} falhas")
+    return results
+
+ROW_MODELS = {
+    'tupla_17_colunas': (False, f'SELECT {INSCRICAO_COLUMNS} FROM inscricoes'),
+    'inscricao_completa': (True, f'SELECT {INSCRICAO_COLUMNS} FROM inscricoes'),
+    'inscricao_lista': (True, f'SELECT {", ".join(LIST_COLUMN_NAMES)} FROM inscricoes'),
+}
+
+def measure_row_model(db, use_model, sql):
+    """Carrega todas as linhas; retorna (bytes por linha, segundos)"""
+    with db.read() as conn:
+        cursor = inscricao_cursor(conn) if use_model else conn.cursor()
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows = cursor.execute(sql).fetchall()
+        elapsed = time.perf_counter() - started
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return allocated / max(len(rows), 1), elapsed
+
+def run_row_model_tests(rows_list, seed, data_dir):
+    """Memória por linha e tempo de carga de cada modelo de linha"""
+    results = {}
+    for count in rows_list:
+        path = os.path.join(data_dir, f"bench_{count}_{seed}.db")
+        generate_database(path, count, seed)
+        db = Database(path)
+        try:
+            results[str(count)] = {}
+            for name, (use_model, sql) in ROW_MODELS.items():
+                per_row, elapsed = measure_row_model(db, use_model, sql)
+                results[str(count)][name] = {'bytes_por_linha': per_row, 'carga_s': elapsed}
+                print(f"{count:>8} linhas  {name:<20} {per_row:8.0f} bytes/linha  carga {elapsed * 1000:9.1f} ms")
+        finally:
+            db.close()
+    return results
+
+# Campos de synthetic_rows gravados nos arquivos de importação (a importação não recebe status nem datas)
+CAMPOS_IMPORTACAO = [
+    'nome_completo', 'idade', 'genero', 'cpf', 'endereco', 'telefone', 'email',
+    'renda_familiar', 'membros_familia', 'despesas_mensais', 'escolaridade',
+    'situacao_moradia', 'observacoes'
+]
+
+def reais(value):
+    """1234.5 -> '1.234,50', como numa planilha brasileira"""
+    return f"{value:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+def write_import_files(directory, count, seed):
+    """Grava as inscrições sintéticas em importacao.csv e importacao.json; retorna os caminhos"""
+    csv_path = os.path.join(directory, 'importacao.csv')
+    json_path = os.path.join(directory, 'importacao.json')
+    with open(csv_path, 'w', encoding='utf-8', newline='') as csv_file, \
+         open(json_path, 'w', encoding='utf-8') as json_file:
+        writer = csv.writer(csv_file, delimiter=';')
+        writer.writerow(CAMPOS_IMPORTACAO)
+        json_file.write('[\n')
+        for i, row in enumerate(synthetic_rows(count, seed)):
+            record = dict(zip(CAMPOS_IMPORTACAO, row))
+            writer.writerow([
+                reais(value) if field in ('renda_familiar', 'despesas_mensais') else ('' if value is None else value)
+                for field, value in record.items()
+            ])
+            json_file.write((',\n' if i else '') + json.dumps(record, ensure_ascii=False))
+        json_file.write('\n]\n')
+    return {'csv': csv_path, 'json': json_path}
+
+def run_import_tests(rows_list, seed):
+    """Importação de planilhas (CSV e array JSON) num banco novo: linhas por segundo"""
+    results = {}
+    for count in rows_list:
+        results[str(count)] = {}
+        with tempfile.TemporaryDirectory() as workdir:
+            for formato, path in write_import_files(workdir, count, seed).items():
+                db = Database(os.path.join(workdir, f'importacao_{formato}.db'))
+                try:
+                    imported, rejected, seconds = import_inscricoes(db, path)
+                finally:
+                    db.close()
+                results[str(count)][formato] = {
+                    'linhas_por_s': imported / seconds, 'segundos': seconds, 'rejeitadas': rejected
+                }
+                print(f"{count:>8} linhas  importação {formato:<5} {imported / seconds:10.0f} linhas/s  "
+                      f"{seconds:6.2f} s  {rejected} rejeitadas")
+    return results
+
+# Roda com python -X importtime num processo novo: abre o app sobre uma página sem janela e
+# imprime, em JSON, os instantes (time.time) do import, da tela de login e do banco pronto.
+# Com --sem-interface não monta a tela de login (que depende dos controles do Flet instalado):
+# abre o banco como a thread de abertura do app e lista os módulos carregados com ele pronto
+SONDA_INICIALIZACAO = '''
+import json
+import sys
+import time
+
+import app_social
+
+importado_em = time.time()
+
+class PaginaSemJanela:
+    """Página Flet mínima: registra quando a primeira tela é enviada ao cliente"""
+
+    def __init__(self):
+        self.controls = []
+        self.overlay = []
+        self.pintada_em = None
+
+    def clean(self):
+        self.controls.clear()
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+
+    def update(self, *controls):
+        if self.controls and self.pintada_em is None:
+            self.pintada_em = time.time()
+
+app_social.DB_PATH = sys.argv[1]
+if '--sem-interface' in sys.argv[2:]:
+    app_social.get_database(sys.argv[1])
+    login_em = None
+    carregados = sorted(set(name.split('.')[0] for name in sys.modules))
+else:
+    page = PaginaSemJanela()
+    app = app_social.ProgramaSocialApp(page)
+    carregados = sorted(set(name.split('.')[0] for name in sys.modules))
+    app.database.result()
+    login_em = page.pintada_em
+print(json.dumps({
+    'importado_em': importado_em,
+    'login_em': login_em,
+    'banco_em': time.time(),
+    'modulos': carregados
+}))
+'''
+
+def parse_importtime(stderr):
+    """(ms cumulativos de app_social, {import direto de app_social: ms}) da saída de -X importtime"""
+    direct = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        _, cumulative, name = line.split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        # O nome vem recuado dois espaços por nível; os imports de um módulo aparecem antes dele
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if level == 0:
+            if name == 'app_social':
+                return int(cumulative) / 1000, direct
+            direct = {}
+        elif level == 1:
+            direct[name] = int(cumulative) / 1000
+    return None, direct
+
+def measure_startup(path, interface=True):
+    """Abre o app num processo novo; retorna os tempos (ms desde o lançamento) e os módulos carregados.
+    
+    Sem interface, só importa app_social e abre o banco: login_ms fica None e os módulos são os
+    carregados com o banco pronto.
+    """
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, '-X', 'importtime', '-c', SONDA_INICIALIZACAO, os.path.abspath(path)]
+    if not interface:
+        command.append('--sem-interface')
+    launched = time.time()
+    proc = subprocess.run(command, cwd=app_dir, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Sonda de inicialização falhou:\n{proc.stderr[-2000:]}")
+    probe = json.loads(proc.stdout.strip().splitlines()[-1])
+    import_ms, direct = parse_importtime(proc.stderr)
+    return {
+        'import_ms': (probe['importado_em'] - launched) * 1000,
+        'login_ms': (probe['login_em'] - launched) * 1000 if probe['login_em'] is not None else None,
+        'banco_ms': (probe['banco_em'] - launched) * 1000,
+        'import_app_social_ms': import_ms,
+        'imports_diretos_ms': direct,
+        'sob_demanda_carregados': [name for name in MODULOS_SOB_DEMANDA if name in probe['modulos']]
+    }
+
+def run_startup_tests(rows_list, seed, data_dir, repeat):
+    """Abertura a frio do app: lançamento até o login, import de app_social e banco pronto"""
+    results = {}
+    for count in rows_list:
+        path = os.path.join(data_dir, f"bench_{count}_{seed}.db")
+        generate_database(path, count, seed)
+        runs = [measure_startup(path) for _ in range(repeat)]
+        result = {
+            name: statistics.median(run[name] for run in runs)
+            for name in ('import_ms', 'login_ms', 'banco_ms', 'import_app_social_ms')
+        }
+        direct = runs[-1]['imports_diretos_ms']
+        result['maiores_imports_ms'] = dict(sorted(direct.items(), key=lambda item: -item[1])[:5])
+        result['sob_demanda_carregados'] = sorted({name for run in runs for name in run['sob_demanda_carregados']})
+        results[str(count)] = result
+        print(f"{count:>8} linhas  inicialização: login {result['login_ms']:7.1f} ms  "
+              f"import de app_social {result['import_app_social_ms']:7.1f} ms  banco pronto {result['banco_ms']:7.1f} ms")
+        print(f"{'':>26}maiores imports: " +
+              ", ".join(f"{name} {ms:.1f} ms" for name, ms in result['maiores_imports_ms'].items()))
+    return results
+
+def startup_violations(startup, budget_ms):
+    """Mensagens de inicialização fora do orçamento ou com imports que deviam ser sob demanda"""
+    violations = []
+    for count, result in startup.items():
+        if result['login_ms'] > budget_ms:
+            violations.append(f"login com {count} linhas em {result['login_ms']:.1f} ms (orçamento {budget_ms:.0f} ms)")
+        for name in result['sob_demanda_carregados']:
+            violations.append(f"{name} importado antes do login com {count} linhas")
+    return violations
+
+def run_benchmarks(rows_list, seed, repeat, data_dir, operations):
+    """Mede cada operação em cada tamanho de banco; retorna {linhas: {operacao: tempos}}"""
+    results = {}
+    for count in rows_list:
+        path = os.path.join(data_dir, f"bench_{count}_{seed}.db")
+        generate_database(path, count, seed)
+        db = Database(path)
+        app = headless_app(db)
+        try:
+            with tempfile.TemporaryDirectory() as workdir:
+                results[str(count)] = {}
+                for name in operations:
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        OPERATIONS[name](app, db, workdir)
+                        timings.append(time.perf_counter() - started)
+                    results[str(count)][name] = {
+                        'min': min(timings),
+                        'mediana': statistics.median(timings),
+                        'execucoes': len(timings)
+                    }
+                    print(f"{count:>8} linhas  {name:<16} mediana {statistics.median(timings) * 1000:10.1f} ms")
+        finally:
+            db.close()
+    return results
+
+def find_regressions(results, base, limit, slack_ms):
+    """Compara medianas com a execução de referência"""
+    regressions = []
+    for count, operations in results.items():
+        for name, timing in operations.items():
+            reference = base.get('resultados', {}).get(count, {}).get(name)
+            if not reference:
+                continue
+            allowed = reference['mediana'] * limit + slack_ms / 1000
+            if timing['mediana'] > allowed:
+                regressions.append((count, name, reference['mediana'], timing['mediana']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das operações do Programa Social")
+    parser.add_argument("--linhas", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="Tamanhos dos bancos sintéticos (ex.: 1000 10000 100000 1000000)")
+    parser.add_argument("--semente", type=int, default=DEFAULT_SEED, help="Semente do gerador")
+    parser.add_argument("--repeticoes", type=int, default=DEFAULT_REPEAT, help="Execuções por operação")
+    parser.add_argument("--operacoes", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS),
+                        help="Operações medidas")
+    parser.add_argument("--sessoes", type=int, default=0,
+                        help="Sessões simultâneas do teste de carga (0 = não executa)")
+    parser.add_argument("--rodadas", type=int, default=DEFAULT_ROUNDS,
+                        help="Repetições da sequência de ações por sessão no teste de carga")
+    parser.add_argument("--escritores", type=int, default=0,
+                        help="Threads gravando status ao mesmo tempo (0 = não executa)")
+    parser.add_argument("--gravacoes", type=int, default=DEFAULT_WRITES,
+                        help="Mudanças de status feitas por cada escritor")
+    parser.add_argument("--memoria", action="store_true",
+                        help="Compara memória por linha e tempo de carga dos modelos de linha")
+    parser.add_argument("--inicializacao", action="store_true",
+                        help="Mede a abertura do app (importtime e tempo até o login) num processo novo")
+    parser.add_argument("--importacao", action="store_true",
+                        help="Mede a importação de planilhas CSV e JSON (linhas por segundo)")
+    parser.add_argument("--orcamento-ms", type=float, default=ORCAMENTO_INICIALIZACAO_MS,
+                        help="Tempo máximo do lançamento até a tela de login com --inicializacao")
+    parser.add_argument("--dados", default="bench_data", help="Pasta dos bancos sintéticos (reaproveitados)")
+    parser.add_argument("--saida", default="bench_resultados.json", help="Arquivo JSON com os tempos")
+    parser.add_argument("--base", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--limite", type=float, default=1.25,
+                        help="Regressão quando a mediana passa de LIMITE x a referência")
+    parser.add_argument("--folga-ms", type=float, default=5.0,
+                        help="Folga absoluta somada ao limite, para operações muito rápidas")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.dados, exist_ok=True)
+    results = run_benchmarks(args.linhas, args.semente, args.repeticoes, args.dados, args.operacoes)
+    load = {}
+    if args.sessoes:
+        load = run_load_tests(args.linhas, args.semente, args.dados, args.sessoes, args.rodadas)
+    row_models = {}
+    if args.memoria:
+        row_models = run_row_model_tests(args.linhas, args.semente, args.dados)
+    writes = {}
+    if args.escritores:
+        writes = run_write_tests(args.linhas, args.semente, args.dados, args.escritores, args.gravacoes)
+    startup = {}
+    if args.inicializacao:
+        startup = run_startup_tests(args.linhas, args.semente, args.dados, args.repeticoes)
+    imports = {}
+    if args.importacao:
+        imports = run_import_tests(args.linhas, args.semente)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'semente': args.semente,
+            'repeticoes': args.repeticoes,
+            'resultados': results,
+            'carga': load,
+            'gravacoes_concorrentes': writes,
+            'modelo_de_linha': row_models,
+            'inicializacao': startup,
+            'importacao': imports
+        }, f, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {args.saida}")
+
+    violations = startup_violations(startup, args.orcamento_ms)
+    for violation in violations:
+        print(f"INICIALIZAÇÃO: {violation}")
+    if violations:
+        return 1
+
+    if args.base:
+        with open(args.base, encoding='utf-8') as f:
+            base = json.load(f)
+        regressions = find_regressions(results, base, args.limite, args.folga_ms)
+        for count, name, before, after in regressions:
+            print(f"REGRESSÃO: {name} com {count} linhas: {before * 1000:.1f} ms -> {after * 1000:.1f} ms")
+        if regressions:
+            return 1
+        print(f"Nenhuma regressão acima de {args.limite:.2f}x em relação a {args.base}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
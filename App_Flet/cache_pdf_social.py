@@ -0,0 +1,178 @@
+"""Cache dos PDFs gerados, endereçado pelo conteúdo.
+
+Cada documento é guardado sob uma chave calculada a partir dos dados que ele mostra (o hash da
+linha da inscrição, ou das linhas lidas pelo relatório): enquanto os dados não mudam, a mesma
+chave devolve os arquivos já gerados em vez de renderizá-los de novo. O manifesto, um JSON no
+próprio diretório dos PDFs, guarda os arquivos, o tamanho, o hash do conteúdo e o último uso de
+cada entrada; assim o cache sobrevive a reinícios, um arquivo alterado fora do cache é gerado de
+novo, e quando o total passa do limite as entradas usadas há mais tempo são apagadas.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('programa_social')
+
+# Nome do manifesto dentro do diretório dos PDFs
+MANIFESTO = 'cache_manifesto.json'
+
+# Versão do formato do manifesto; um manifesto de outra versão recomeça vazio
+VERSAO_MANIFESTO = 2
+
+# Intervalo mínimo (segundos) entre gravações do manifesto causadas só por acertos: o último uso
+# das entradas fica na memória e vai para o disco com a próxima gravação (ou flush(), na saída)
+INTERVALO_USO = 60
+
+# Total (bytes) dos PDFs mantidos pelo cache; acima dele as entradas usadas há mais tempo saem
+TAMANHO_MAXIMO = 512 * 1024 * 1024
+
+def file_digest(path, block_size=1024 * 1024):
+    """sha256 (hexadecimal) do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as arquivo:
+        for block in iter(lambda: arquivo.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class CachePDF:
+    """Entradas do cache de um diretório de PDFs, protegidas por um lock entre as threads dos jobs.
+
+    Cada entrada é {'arquivos': [[nome, bytes, sha256], ...], 'tamanho', 'criado_em', 'usado_em'},
+    com os nomes relativos ao diretório. Um arquivo só pertence a uma entrada: regravá-lo (um
+    arquivo danificado gerado de novo com o mesmo nome) descarta a entrada anterior.
+    """
+
+    def __init__(self, directory, max_bytes=TAMANHO_MAXIMO):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.path = os.path.join(directory, MANIFESTO)
+        self.lock = threading.Lock()
+        self.entries = self.load()
+        # Usos registrados só na memória e o momento da última gravação do manifesto
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    def load(self):
+        """Entradas do manifesto gravado; um manifesto ausente, ilegível ou de outra versão recomeça vazio"""
+        try:
+            with open(self.path, encoding='utf-8') as manifesto:
+                data = json.load(manifesto)
+            if data['versao'] != VERSAO_MANIFESTO:
+                logger.info("Manifesto do cache de PDFs na versão %s, recomeçando vazio: %s", data['versao'], self.path)
+                return {}
+            return dict(data['entradas'])
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Manifesto do cache de PDFs ilegível, recomeçando vazio: %s", self.path)
+            return {}
+
+    def save(self):
+        """Grava o manifesto por substituição atômica (com o lock adquirido)"""
+        os.makedirs(self.directory, exist_ok=True)
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as manifesto:
+            json.dump({'versao': VERSAO_MANIFESTO, 'entradas': self.entries}, manifesto, ensure_ascii=False)
+        os.replace(temp, self.path)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    def flush(self):
+        """Grava os usos ainda só na memória (na saída do processo, por exemplo)"""
+        with self.lock:
+            if self.dirty:
+                self.save()
+
+    def intact(self, entry):
+        """Todos os arquivos da entrada ainda no disco, com o tamanho e o hash registrados"""
+        for nome, tamanho, digest in entry['arquivos']:
+            path = os.path.join(self.directory, nome)
+            try:
+                # O tamanho descarta a maioria das alterações sem ler o arquivo
+                if os.path.getsize(path) != tamanho or file_digest(path) != digest:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def get(self, chave):
+        """Caminhos dos arquivos da chave, ou None se for preciso gerá-los"""
+        return self.get_many([chave]).get(chave)
+
+    def get_many(self, chaves):
+        """{chave: caminhos} das chaves presentes no cache.
+
+        O uso das entradas encontradas é registrado na memória; o manifesto só é regravado se a
+        última gravação tiver sido há mais de INTERVALO_USO segundos.
+        """
+        with self.lock:
+            entries = {chave: self.entries[chave] for chave in chaves if chave in self.entries}
+        # Conteúdo conferido fora do lock: o hash de um relatório grande não segura os outros jobs
+        intactas = {chave for chave, entry in entries.items() if self.intact(entry)}
+        found = {}
+        agora = time.time()
+        with self.lock:
+            for chave, entry in entries.items():
+                if self.entries.get(chave) is not entry:
+                    # Substituída ou descartada durante a conferência
+                    continue
+                self.dirty = True
+                if chave not in intactas:
+                    # Apagado ou alterado fora do cache
+                    del self.entries[chave]
+                    continue
+                entry['usado_em'] = agora
+                found[chave] = [os.path.join(self.directory, nome) for nome, _, _ in entry['arquivos']]
+            if self.dirty and time.monotonic() - self.saved_at >= INTERVALO_USO:
+                self.save()
+        return found
+
+    def put(self, chave, arquivos):
+        """Registra os arquivos recém-gerados da chave e aplica o limite de tamanho"""
+        self.put_many([(chave, arquivos)])
+
+    def put_many(self, itens):
+        """Registra vários pares (chave, arquivos) recém-gerados, com uma só gravação do manifesto"""
+        agora = time.time()
+        novas = {}
+        for chave, arquivos in itens:
+            nomes = [os.path.relpath(arquivo, self.directory) for arquivo in arquivos]
+            registrados = [
+                [nome, os.path.getsize(os.path.join(self.directory, nome)), file_digest(os.path.join(self.directory, nome))]
+                for nome in nomes
+            ]
+            novas[chave] = {
+                'arquivos': registrados,
+                'tamanho': sum(tamanho for _, tamanho, _ in registrados),
+                'criado_em': agora,
+                'usado_em': agora
+            }
+        nomes = {nome for entry in novas.values() for nome, _, _ in entry['arquivos']}
+        with self.lock:
+            for outra, entry in list(self.entries.items()):
+                if any(nome in nomes for nome, _, _ in entry['arquivos']):
+                    del self.entries[outra]
+            self.entries.update(novas)
+            self.evict(keep=novas)
+            self.save()
+
+    def evict(self, keep=()):
+        """Apaga as entradas usadas há mais tempo até o total caber no limite (com o lock adquirido)"""
+        total = sum(entry['tamanho'] for entry in self.entries.values())
+        for chave, entry in sorted(self.entries.items(), key=lambda item: item[1]['usado_em']):
+            if total <= self.max_bytes:
+                break
+            if chave in keep:
+                continue
+            for nome, _, _ in entry['arquivos']:
+                try:
+                    os.remove(os.path.join(self.directory, nome))
+                except FileNotFoundError:
+                    pass
+            total -= entry['tamanho']
+            del self.entries[chave]
+            logger.info("Cache de PDFs: %s descartado (%d bytes)", chave, entry['tamanho'])
@@ -0,0 +1,197 @@
+"""Detecção de inscrições duplicadas sem comparar todos os pares.
+
+Cada inscrição recebe duas chaves de bloco: a fonética das palavras do nome (chave_nome) e a
+fonética da rua com o número da casa (chave_endereco). Só inscrições que dividem uma chave são
+comparadas, e dentro de cada bloco apenas as JANELA vizinhas depois de ordenar pelo outro campo
+(vizinhança ordenada): o total de comparações fica limitado a linhas x JANELA por chave, qualquer
+que seja o tamanho do bloco. Cada par é pontuado pela semelhança de trigramas do nome e do
+endereço.
+"""
+
+import functools
+import re
+import unicodedata
+
+# Palavras ignoradas no nome e no endereço (não distinguem pessoas nem ruas)
+PARTICULAS = {'DA', 'DE', 'DO', 'DAS', 'DOS', 'E'}
+
+# Tipos de logradouro e abreviações: "R. das Flores" e "Rua das Flores" são a mesma rua
+LOGRADOUROS = {
+    'RUA', 'R', 'AVENIDA', 'AV', 'AVE', 'TRAVESSA', 'TV', 'TRAV', 'ALAMEDA', 'AL',
+    'ESTRADA', 'EST', 'RODOVIA', 'ROD', 'PRACA', 'PC', 'PCA', 'LARGO', 'LGO', 'BECO'
+}
+
+# Regras fonéticas simplificadas para o português, aplicadas em ordem a cada palavra
+FONETICA_REGRAS = [
+    (re.compile(r'PH'), 'F'),
+    (re.compile(r'TH'), 'T'),
+    (re.compile(r'LH'), 'L'),
+    (re.compile(r'NH'), 'N'),
+    (re.compile(r'[CS]H'), 'X'),
+    (re.compile(r'SC(?=[EI])'), 'S'),
+    (re.compile(r'C(?=[EIY])'), 'S'),
+    (re.compile(r'QU|Q|C'), 'K'),
+    (re.compile(r'G(?=[EIY])'), 'J'),
+    (re.compile(r'GU(?=[EI])'), 'G'),
+    (re.compile(r'Y'), 'I'),
+    (re.compile(r'W'), 'V'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'H'), ''),
+    (re.compile(r'M$'), 'N'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+VOGAIS = re.compile(r'(?<=.)[AEIOU]')
+NAO_ALFANUMERICO = re.compile(r'[^A-Z0-9]+')
+DIGITOS = re.compile(r'\d+')
+NUMERO_FINAL = re.compile(r'\s(\d+)\s*$')
+
+# Semelhança mínima (0 a 1) para um par ser registrado como possível duplicata
+LIMIAR = 0.8
+
+# Peso do nome e do endereço na pontuação do par
+PESOS = {'nome': 0.5, 'endereco': 0.5}
+
+# Vizinhas comparadas com cada inscrição dentro de um bloco
+JANELA = 10
+
+def normalize_text(text):
+    """Maiúsculas sem acentos, só letras e dígitos separados por um espaço"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(NAO_ALFANUMERICO.sub(' ', text.upper()).split())
+
+def normalize_cpf(cpf):
+    """CPF só com dígitos, igual à coluna gerada cpf_normalizado (None se vazio)"""
+    if cpf is None:
+        return None
+    for char in '.-/ ':
+        cpf = cpf.replace(char, '')
+    return cpf or None
+
+@functools.lru_cache(maxsize=65536)
+def phonetic_word(word):
+    """Código fonético de uma palavra já normalizada (primeira letra e consoantes)"""
+    for pattern, replacement in FONETICA_REGRAS:
+        word = pattern.sub(replacement, word)
+    return VOGAIS.sub('', word)
+
+def name_words(nome):
+    """Palavras do nome que distinguem pessoas"""
+    return [word for word in normalize_text(nome).split() if word not in PARTICULAS]
+
+def split_street(endereco):
+    """Separa o endereço em (rua como digitada, número da casa ou None).
+
+    O número é o primeiro depois da vírgula ("Rua 7 de Setembro, 120"); sem vírgula, o que
+    termina o endereço ("Rua das Flores 120").
+    """
+    rua, virgula, resto = (endereco or '').partition(',')
+    numeros = DIGITOS.findall(resto)
+    if not virgula:
+        final = NUMERO_FINAL.search(rua)
+        numeros = [final.group(1)] if final else []
+        rua = rua[:final.start()] if final else rua
+    return rua, str(int(numeros[0])) if numeros else None
+
+@functools.lru_cache(maxsize=65536)
+def street_words(rua):
+    """Palavras da rua que distinguem logradouros (as ruas se repetem muito entre as inscrições)"""
+    return tuple(
+        word for word in normalize_text(rua).split()
+        if word not in PARTICULAS and word not in LOGRADOUROS
+    )
+
+def split_address(endereco):
+    """Separa o endereço em (palavras da rua, número da casa ou None)"""
+    rua, numero = split_street(endereco)
+    return list(street_words(rua)), numero
+
+@functools.lru_cache(maxsize=65536)
+def name_token_key(token):
+    """Códigos fonéticos de uma palavra do nome como digitada ('' para partículas)"""
+    return ' '.join(phonetic_word(word) for word in normalize_text(token).split() if word not in PARTICULAS)
+
+@functools.lru_cache(maxsize=65536)
+def street_key(rua):
+    """Códigos fonéticos das palavras de uma rua como digitada"""
+    return ' '.join(phonetic_word(word) for word in street_words(rua))
+
+def duplicate_keys(nome, endereco):
+    """(chave_nome, chave_endereco) de uma inscrição; cadeias vazias quando não há o que comparar.
+
+    Calculadas por palavra do nome e por rua, em cache: numa importação, cada nome e rua
+    repetidos são normalizados uma única vez.
+    """
+    chave_nome = ' '.join(filter(None, map(name_token_key, (nome or '').split())))
+    rua, numero = split_street(endereco)
+    chave_endereco = street_key(rua)
+    if chave_endereco and numero is not None:
+        chave_endereco += f' {numero}'
+    return chave_nome, chave_endereco
+
+def trigrams(text):
+    """Conjunto de trigramas do texto, com as bordas marcadas"""
+    text = f' {text} '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def similarity(a, b):
+    """Índice de Jaccard entre dois conjuntos de trigramas"""
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+class Perfil:
+    """Campos de comparação de uma inscrição, calculados uma vez por passada.
+
+    Os trigramas só são montados quando o perfil chega a ser pontuado.
+    """
+
+    __slots__ = ('id', 'nome', 'rua', 'numero', '_trigramas')
+
+    def __init__(self, inscricao_id, nome, endereco):
+        words, numero = split_address(endereco)
+        self.id = inscricao_id
+        self.nome = ' '.join(name_words(nome))
+        self.rua = ' '.join(words)
+        self.numero = numero
+        self._trigramas = None
+
+    def trigramas(self):
+        """(trigramas do nome, trigramas da rua)"""
+        if self._trigramas is None:
+            self._trigramas = (trigrams(self.nome), trigrams(self.rua))
+        return self._trigramas
+
+def score(a, b, limiar=0.0):
+    """Pontuação de 0 a 1 do par; números de casa diferentes zeram a parte do endereço.
+
+    Pares que não podem alcançar o limiar (a parte do endereço zerada) valem 0 sem ser comparados.
+    """
+    numeros_diferentes = a.numero is not None and b.numero is not None and a.numero != b.numero
+    if numeros_diferentes and PESOS['nome'] < limiar:
+        return 0.0
+    nome_a, rua_a = a.trigramas()
+    nome_b, rua_b = b.trigramas()
+    endereco = 0.0 if numeros_diferentes else similarity(rua_a, rua_b)
+    return PESOS['nome'] * similarity(nome_a, nome_b) + PESOS['endereco'] * endereco
+
+def block_pairs(block, sort_key, janela=JANELA, limiar=LIMIAR):
+    """Pares (id mais novo, id mais antigo, pontuação) acima do limiar num bloco de perfis.
+
+    O bloco é ordenado por sort_key e cada perfil é comparado só com as `janela` vizinhas seguintes.
+    """
+    block = sorted(block, key=sort_key)
+    pairs = []
+    for i, a in enumerate(block):
+        for b in block[i + 1:i + 1 + janela]:
+            pontuacao = score(a, b, limiar)
+            if pontuacao >= limiar:
+                novo, antigo = (a.id, b.id) if a.id > b.id else (b.id, a.id)
+                pairs.append((novo, antigo, round(pontuacao, 3)))
+    return pairs
+
+def by_address(perfil):
+    return (perfil.rua, perfil.numero or '', perfil.nome)
+
+def by_name(perfil):
+    return (perfil.nome, perfil.rua, perfil.numero or '')
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Os módulos do app ficam soltos em App_Flet, sem pacote
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_social
+
+INSCRICOES = [
+    {'nome_completo': 'Maria da Silva', 'idade': 34, 'genero': 'Feminino', 'cpf': '111.111.111-11',
+     'endereco': 'Rua das Flores, 120', 'renda_familiar': '1200,00', 'membros_familia': 4,
+     'despesas_mensais': '900', 'escolaridade': 'Ensino Médio Completo', 'situacao_moradia': 'Casa Alugada'},
+    {'nome_completo': 'José Santos', 'idade': 61, 'genero': 'Masculino', 'cpf': '222.222.222-22',
+     'endereco': 'Avenida Brasil 45', 'renda_familiar': '800', 'membros_familia': 2,
+     'despesas_mensais': '750', 'escolaridade': 'Sem escolaridade', 'situacao_moradia': 'Casa Cedida'},
+    {'nome_completo': 'Ana Oliveira', 'idade': 22, 'genero': 'Feminino', 'cpf': None,
+     'endereco': 'Travessa do Comércio, 7', 'renda_familiar': '2500', 'membros_familia': 1,
+     'despesas_mensais': '1800', 'escolaridade': 'Ensino Superior Incompleto', 'situacao_moradia': 'Ocupação'},
+]
+
+@pytest.fixture
+def conn(tmp_path):
+    """Banco novo com todas as migrações, o arquivo anexado e algumas inscrições"""
+    conn = sqlite3.connect(tmp_path / 'programa_social.db')
+    conn.execute('ATTACH DATABASE ? AS arquivo', (str(tmp_path / 'programa_social_arquivo.db'),))
+    app_social.run_migrations(conn)
+    for statement in app_social.split_sql(app_social.ARQUIVO_SCHEMA):
+        conn.execute(statement)
+    conn.execute(app_social.SQL_VIEW_TODAS)
+    for values in INSCRICOES:
+        app_social.insert_inscricao(conn, app_social.parse_inscricao(values))
+    conn.execute("UPDATE inscricoes SET status = 'Aprovada' WHERE id = 2")
+    conn.commit()
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def db(tmp_path):
+    """Database do app (escritor, pool de leitores e arquivo) num banco novo com as mesmas inscrições"""
+    db = app_social.Database(str(tmp_path / 'programa_social.db'))
+    with db.write() as conn:
+        for values in INSCRICOES:
+            app_social.insert_inscricao(conn, app_social.parse_inscricao(values))
+    yield db
+    db.close()
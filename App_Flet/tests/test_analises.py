@@ -0,0 +1,35 @@
+"""Análises detalhadas: colunas tipadas numa única consulta e histogramas por categoria"""
+
+import numpy as np
+
+import analytics_social
+
+def test_load_columns_is_typed(conn):
+    columns = analytics_social.load_columns(conn)
+    assert columns['renda'].dtype == np.float64
+    assert columns['escolaridade'].dtype == np.intp
+    assert columns['renda'].tolist() == [1200.0, 800.0, 2500.0]
+    assert columns['escolaridade'].tolist() == [4, 0, 5]
+    assert columns['moradia'].tolist() == [1, 2, 3]
+
+def test_histograms_by_category(conn):
+    # Valor fora da lista (dado importado, por exemplo) conta como "Não informado"
+    conn.execute("UPDATE inscricoes SET escolaridade = 'Supletivo' WHERE id = 3")
+    analises = analytics_social.compute_analytics(analytics_social.load_columns(conn))
+
+    assert analises['total'] == 3
+    assert analises['renda_per_capita']['mediana'] == 400.0
+    assert analises['histograma_per_capita'] == [0, 2, 0, 0, 1]
+    assert 'membros' not in analises
+
+    escolaridades = {item['categoria']: item for item in analises['por_escolaridade']}
+    assert list(escolaridades)[-1] == analytics_social.OUTRA_CATEGORIA
+    assert escolaridades['Ensino Médio Completo']['histograma'] == [0, 1, 0, 0, 0]
+    assert escolaridades['Ensino Médio Completo']['mediana_per_capita'] == 300.0
+    assert escolaridades[analytics_social.OUTRA_CATEGORIA]['histograma'] == [0, 0, 0, 0, 1]
+    assert escolaridades['Pós-graduação']['total'] == 0
+
+    moradias = {item['categoria']: item for item in analises['por_moradia']}
+    assert list(moradias) == analytics_social.SITUACOES_MORADIA
+    assert moradias['Casa Cedida']['histograma'] == [0, 1, 0, 0, 0]
+    assert sum(sum(item['histograma']) for item in analises['por_moradia']) == 3
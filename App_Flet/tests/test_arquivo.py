@@ -0,0 +1,46 @@
+"""Arquivamento: as inscrições encerradas saem da tabela principal e voltam intactas pelo arquivo"""
+
+import app_social
+
+ANTIGA = '2000-01-01 00:00:00'
+
+def encerrar(db, inscricao_id, status):
+    """Encerra a inscrição com updated_at antigo, já no ponto de ser arquivada"""
+    with db.write() as conn:
+        conn.execute('UPDATE inscricoes SET status = ?, updated_at = ? WHERE id = ?', (status, ANTIGA, inscricao_id))
+
+def linhas(db, tabela, ids):
+    with db.read() as conn:
+        return conn.execute(
+            f'SELECT {app_social.ARQUIVO_COLUMNS} FROM {tabela} WHERE id IN ({", ".join("?" for _ in ids)}) ORDER BY id',
+            ids
+        ).fetchall()
+
+def test_archive_round_trip(db):
+    encerrar(db, 1, 'Aprovada')
+    encerrar(db, 2, 'Rejeitada')
+    originais = linhas(db, 'main.inscricoes', [1, 2])
+
+    assert app_social.archive_inscricoes(db, batch_rows=1) == 2
+
+    assert linhas(db, 'main.inscricoes', [1, 2, 3]) == linhas(db, 'main.inscricoes', [3])
+    assert linhas(db, 'arquivo.inscricoes', [1, 2]) == originais
+    with db.read() as conn:
+        todas = conn.execute('SELECT id, arquivada FROM inscricoes_todas ORDER BY id').fetchall()
+        resumo = conn.execute('SELECT COALESCE(SUM(total), 0) FROM resumo_inscricoes').fetchone()[0]
+    assert todas == [(1, 1), (2, 1), (3, 0)]
+    assert resumo == 1
+    # Nada mais a arquivar: a segunda execução não move nem duplica nada
+    assert app_social.archive_inscricoes(db) == 0
+    assert linhas(db, 'arquivo.inscricoes', [1, 2]) == originais
+
+def test_interrupted_archive_is_finished_by_next_run(db):
+    encerrar(db, 3, 'Aprovada')
+    # Execução interrompida entre a cópia e a remoção: a inscrição está nas duas tabelas
+    with db.write() as conn:
+        conn.execute(app_social.SQL_ARQUIVO_COPIA, ('[3]',))
+    original = linhas(db, 'main.inscricoes', [3])
+
+    assert app_social.archive_inscricoes(db) == 1
+    assert linhas(db, 'main.inscricoes', [3]) == []
+    assert linhas(db, 'arquivo.inscricoes', [1, 2, 3]) == original
@@ -0,0 +1,28 @@
+"""Busca textual da lista (FTS5): sem acentos, sem diferenciar maiúsculas e por prefixo"""
+
+import pytest
+
+import app_social
+
+def search(conn, text, status_filter="Todos"):
+    sql, params = app_social.build_page_query(status_filter, None, 10, search=text)
+    return [inscricao.id for inscricao in app_social.inscricao_cursor(conn).execute(sql, params)]
+
+@pytest.mark.parametrize('texto, esperado', [
+    ("jose", [2]),
+    ("JOSÉ santos", [2]),
+    ("comercio", [3]),
+    ("Comércio", [3]),
+    ("oliv", [3]),
+    ("maria flores", [1]),
+    ("maria santos", []),
+])
+def test_search_ignores_accents_and_case(conn, texto, esperado):
+    assert search(conn, texto) == esperado
+
+def test_search_follows_edits_and_status(conn):
+    conn.execute("UPDATE inscricoes SET nome_completo = 'João Antônio Santos' WHERE id = 2")
+    assert search(conn, "joao antonio") == [2]
+    assert search(conn, "jose") == []
+    assert search(conn, "joao", "Pendente") == []
+    assert search(conn, "joao", "Aprovada") == [2]
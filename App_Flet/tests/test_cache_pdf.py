@@ -0,0 +1,70 @@
+"""Cache de PDFs: manifesto gravado em lote, conteúdo conferido pelo hash e chaves sem reler o banco"""
+
+import json
+import os
+
+import app_social
+import cache_pdf_social
+
+def gerar(directory, nome, conteudo):
+    path = os.path.join(directory, nome)
+    with open(path, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    return path
+
+def manifesto(cache):
+    with open(cache.path, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+def test_hits_do_not_rewrite_manifest(tmp_path, monkeypatch):
+    cache = cache_pdf_social.CachePDF(str(tmp_path))
+    cache.put('ficha:a', [gerar(tmp_path, 'a.pdf', b'%PDF a')])
+    gravado = manifesto(cache)
+
+    for _ in range(3):
+        assert cache.get('ficha:a') == [os.path.join(tmp_path, 'a.pdf')]
+    assert manifesto(cache) == gravado
+
+    # Depois do intervalo, ou na saída do processo, o último uso vai para o disco
+    cache.flush()
+    assert manifesto(cache)['entradas']['ficha:a']['usado_em'] > gravado['entradas']['ficha:a']['usado_em']
+    monkeypatch.setattr(cache_pdf_social, 'INTERVALO_USO', 0)
+    cache.get('ficha:a')
+    assert not cache.dirty
+
+def test_same_size_change_is_detected(tmp_path):
+    cache = cache_pdf_social.CachePDF(str(tmp_path))
+    cache.put('ficha:a', [gerar(tmp_path, 'a.pdf', b'%PDF a')])
+    gerar(tmp_path, 'a.pdf', b'%PDF b')
+
+    assert cache.get('ficha:a') is None
+    assert 'ficha:a' not in cache.entries
+
+def test_old_manifest_version_starts_empty(tmp_path):
+    with open(tmp_path / cache_pdf_social.MANIFESTO, 'w', encoding='utf-8') as arquivo:
+        json.dump({'versao': 1, 'entradas': {'ficha:a': {'arquivos': [['a.pdf', 6]]}}}, arquivo)
+    assert cache_pdf_social.CachePDF(str(tmp_path)).entries == {}
+
+def test_ficha_filename_changes_with_the_data(conn):
+    antes = app_social.ficha_filename(app_social.fetch_inscricao(conn, 1))
+    conn.execute("UPDATE inscricoes SET renda_familiar = 1300, updated_at = '2030-01-01 00:00:00' WHERE id = 1")
+    depois = app_social.ficha_filename(app_social.fetch_inscricao(conn, 1))
+    assert antes.startswith('inscricao_1_Maria_da_Silva_') and depois.startswith('inscricao_1_Maria_da_Silva_')
+    assert antes != depois
+
+def test_relatorio_key_follows_reported_columns(conn):
+    chave = app_social.relatorio_cache_key(conn)
+    # Coluna fora do relatório: a chave continua a mesma
+    conn.execute("UPDATE inscricoes SET telefone = '99999-0000' WHERE id = 1")
+    assert app_social.relatorio_cache_key(conn) == chave
+    assert app_social.relatorio_cache_key(conn, volume_rows=100) != chave
+
+    conn.execute("UPDATE inscricoes SET status = 'Rejeitada' WHERE id = 1")
+    nova = app_social.relatorio_cache_key(conn)
+    assert nova != chave
+
+    com_arquivo = app_social.relatorio_cache_key(conn, com_arquivo=True)
+    # Cópia para o arquivo (execução interrompida antes da remoção): só muda o relatório com arquivo
+    conn.execute(app_social.SQL_ARQUIVO_COPIA, ('[1]',))
+    assert app_social.relatorio_cache_key(conn) == nova
+    assert app_social.relatorio_cache_key(conn, com_arquivo=True) != com_arquivo
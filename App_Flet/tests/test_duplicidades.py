@@ -0,0 +1,51 @@
+"""Duplicidades: pares parecidos por nome e endereço e CPF já inscrito, inclusive no arquivo"""
+
+import pytest
+
+import app_social
+
+PARECIDA = {
+    'nome_completo': 'Maria Silva', 'idade': 34, 'genero': 'Feminino', 'cpf': None,
+    'endereco': 'R. das Flores 120', 'renda_familiar': '1200', 'membros_familia': 4,
+    'despesas_mensais': '900', 'escolaridade': 'Ensino Médio Completo', 'situacao_moradia': 'Casa Alugada'
+}
+
+def pares_pendentes(db):
+    with db.read() as conn:
+        return [row[:2] for row in conn.execute(app_social.SQL_DUPLICIDADES_PENDENTES, (100,))]
+
+def test_insert_registers_duplicate_pair(db):
+    with db.write() as conn:
+        candidatas = app_social.insert_inscricao(conn, app_social.parse_inscricao(PARECIDA))
+    # "Maria da Silva, Rua das Flores, 120" (id 1) e nenhuma das outras
+    assert [candidata[0] for candidata in candidatas] == [1]
+    assert candidatas[0][2] >= app_social.duplicidades_social.LIMIAR
+    assert pares_pendentes(db) == [(4, 1)]
+
+def test_detect_duplicates_finds_pair(db):
+    with db.write() as conn:
+        app_social.insert_inscricao(conn, app_social.parse_inscricao(PARECIDA))
+        conn.execute('DELETE FROM duplicidades')
+        # Inscrição gravada por fora do app, ainda sem chaves de bloco
+        conn.execute('UPDATE inscricoes SET chave_nome = NULL, chave_endereco = NULL WHERE id = 4')
+
+    novos, _ = app_social.detect_duplicates(db)
+    assert novos == 1
+    assert pares_pendentes(db) == [(4, 1)]
+    # Par já registrado não volta à fila
+    assert app_social.detect_duplicates(db)[0] == 0
+
+@pytest.mark.parametrize('arquivada', [False, True])
+def test_cpf_already_enrolled_is_rejected(db, arquivada):
+    if arquivada:
+        with db.write() as conn:
+            conn.execute("UPDATE inscricoes SET status = 'Aprovada', updated_at = '2000-01-01 00:00:00' WHERE id = 1")
+        assert app_social.archive_inscricoes(db) == 1
+
+    # Mesmo CPF da inscrição 1 (111.111.111-11), escrito sem pontuação
+    valores = dict(PARECIDA, nome_completo='Outra Pessoa', endereco='Rua Nova, 5', cpf='11111111111')
+    with db.write() as conn:
+        with pytest.raises(ValueError, match=r'inscrição #1 \(Maria da Silva\)'):
+            app_social.insert_inscricao(conn, app_social.parse_inscricao(valores))
+    with db.read() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM inscricoes WHERE nome_completo = 'Outra Pessoa'").fetchone()[0] == 0
@@ -0,0 +1,76 @@
+"""Importação de planilhas: lotes gravados por INSERT ... SELECT e linhas recusadas uma a uma"""
+
+import csv
+import json
+
+import app_social
+
+CAMPOS = {
+    'idade': 30, 'genero': 'Feminino', 'cpf': '', 'endereco': 'Rua das Acácias, 10', 'renda_familiar': '1.200,50',
+    'membros_familia': 3, 'despesas_mensais': '800', 'escolaridade': 'Ensino Médio Completo',
+    'situacao_moradia': 'Casa Alugada'
+}
+
+def registro(nome, **campos):
+    return dict(CAMPOS, nome_completo=nome, **campos)
+
+def erros(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return {int(row['linha']): row['erro'] for row in csv.DictReader(f)}
+
+def test_import_rejects_rows_and_keeps_the_rest_of_the_batch(db, tmp_path):
+    # José (CPF 222.222.222-22) vai para o arquivo
+    with db.write() as conn:
+        conn.execute("UPDATE inscricoes SET status = 'Aprovada', updated_at = '2000-01-01 00:00:00' WHERE id = 2")
+    assert app_social.archive_inscricoes(db) == 1
+    # Uma restrição que só o banco conhece, para recusar uma linha no meio do lote
+    db.writer.execute('''
+        CREATE TEMP TRIGGER recusa_importacao BEFORE INSERT ON main.inscricoes
+        WHEN NEW.nome_completo = 'Recusada Pelo Banco'
+        BEGIN SELECT RAISE(ABORT, 'nome bloqueado'); END
+    ''')
+    registros = [
+        registro('Carla Nova', cpf='333.333.333-33'),
+        registro('Sem Idade', idade=''),
+        registro('Renda Ruim', renda_familiar='muito'),
+        registro('Maria Repetida', cpf='11111111111'),
+        registro('José Arquivado', cpf='222.222.222-22'),
+        registro('Carla Dupla', cpf='33333333333'),
+        registro('Recusada Pelo Banco'),
+        registro('Bruno Novo', situacao_moradia='Ocupação'),
+    ]
+    path = tmp_path / 'planilha.csv'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(registros[0]), delimiter=';')
+        writer.writeheader()
+        writer.writerows(registros)
+
+    imported, rejected, _ = app_social.import_inscricoes(db, str(path))
+
+    assert (imported, rejected) == (2, 6)
+    motivos = erros(tmp_path / 'planilha_erros.csv')
+    assert sorted(motivos) == [3, 4, 5, 6, 7, 8]
+    assert "'idade'" in motivos[3]
+    assert "numéricos" in motivos[4]
+    assert "#1" in motivos[5]
+    assert "#2" in motivos[6]
+    assert "linha 2" in motivos[7]
+    assert "nome bloqueado" in motivos[8]
+    with db.write() as conn:
+        # O trabalho dos triggers de INSERT, feito para o lote inteiro, bate com o de cada linha
+        assert app_social.rebuild_resumo(conn, fix=False, commit=False) == []
+        encontradas = conn.execute(
+            "SELECT rowid FROM inscricoes_fts WHERE inscricoes_fts MATCH 'Carla OR Bruno' ORDER BY rowid").fetchall()
+        assert [row[0] for row in encontradas] == [4, 5]
+        pontuacoes = conn.execute(
+            f"SELECT prioridade = {app_social.prioridade_expression()} FROM inscricoes WHERE id IN (4, 5)").fetchall()
+        assert pontuacoes == [(1,), (1,)]
+        triggers = {row[0] for row in conn.execute("SELECT name FROM main.sqlite_master WHERE type = 'trigger'")}
+        assert set(app_social.IMPORTACAO_TRIGGERS) <= triggers
+
+def test_import_reads_json_array(db, tmp_path):
+    path = tmp_path / 'planilha.json'
+    path.write_text(json.dumps([registro('Ana Array'), registro('Beto Array'), 5], indent=2), encoding='utf-8')
+    imported, rejected, _ = app_social.import_inscricoes(db, str(path))
+    assert (imported, rejected) == (2, 1)
+    assert "objeto JSON" in erros(tmp_path / 'planilha_erros.csv')[3]
@@ -0,0 +1,51 @@
+"""Abertura a frio do app: orçamento até a tela de login e imports sob demanda"""
+
+import statistics
+
+import flet as ft
+import pytest
+
+import app_social
+import benchmark_social
+
+@pytest.fixture(scope='module')
+def banco(tmp_path_factory):
+    """Banco já migrado: as aberturas medem o app, não as migrações"""
+    path = tmp_path_factory.mktemp('inicializacao') / 'programa_social.db'
+    app_social.Database(str(path)).close()
+    return str(path)
+
+@pytest.fixture(scope='module')
+def abertura(banco):
+    """Três processos novos que só importam app_social e abrem o banco (qualquer versão do Flet)"""
+    return [benchmark_social.measure_startup(banco, interface=False) for _ in range(3)]
+
+@pytest.fixture(scope='module')
+def startup(banco):
+    """Três aberturas do app em processos novos, até a tela de login"""
+    # O login usa os controles clássicos do Flet (ElevatedButton, ft.padding.all), que o Flet 1.0 removeu
+    if not hasattr(ft, 'ElevatedButton'):
+        pytest.skip("o Flet instalado não tem os controles usados pela tela de login")
+    return [benchmark_social.measure_startup(banco) for _ in range(3)]
+
+def test_import_within_budget(abertura):
+    # O import de app_social é a parte da abertura que vem antes de qualquer tela
+    import_ms = statistics.median(run['import_ms'] for run in abertura)
+    assert import_ms <= benchmark_social.ORCAMENTO_INICIALIZACAO_MS
+
+@pytest.mark.parametrize('modulo', benchmark_social.MODULOS_SOB_DEMANDA)
+def test_heavy_modules_not_loaded_by_import_or_database(abertura, modulo):
+    # Verificado em sys.modules com o banco já aberto
+    assert not any(modulo in run['sob_demanda_carregados'] for run in abertura)
+
+def test_login_within_budget(startup):
+    login_ms = statistics.median(run['login_ms'] for run in startup)
+    assert login_ms <= benchmark_social.ORCAMENTO_INICIALIZACAO_MS
+
+def test_login_paints_before_database_is_ready(startup):
+    assert all(run['login_ms'] <= run['banco_ms'] for run in startup)
+
+@pytest.mark.parametrize('modulo', benchmark_social.MODULOS_SOB_DEMANDA)
+def test_heavy_modules_load_on_first_use(startup, modulo):
+    # Verificado em sys.modules logo depois de o login ser pintado
+    assert not any(modulo in run['sob_demanda_carregados'] for run in startup)
@@ -0,0 +1,33 @@
+"""Paginação da lista de inscrições pelo cursor (coluna da ordenação, id)"""
+
+import pytest
+
+import app_social
+
+def load_all(conn, status_filter="Todos", criterios=None, limit=1):
+    """Ids de todas as páginas da lista, seguindo o cursor como load_next_page"""
+    ids = []
+    after = None
+    while True:
+        sql, params = app_social.build_page_query(status_filter, after, limit, criterios=criterios)
+        page = app_social.inscricao_cursor(conn).execute(sql, params).fetchall()
+        ids.extend(inscricao.id for inscricao in page)
+        if len(page) < limit:
+            return ids
+        after = app_social.page_cursor(page[-1], status_filter, criterios)
+
+@pytest.mark.parametrize('limit', [1, 2])
+@pytest.mark.parametrize('ordem, empate, esperado', [
+    ("Mais recentes", "created_at = '2024-05-01 10:00:00'", [3, 2, 1]),
+    ("Mais antigas", "created_at = '2024-05-01 10:00:00'", [1, 2, 3]),
+    ("Menor idade", "idade = 40", [1, 2, 3]),
+    ("Maior renda", "renda_familiar = 1000", [3, 2, 1]),
+])
+def test_page_boundary_with_equal_sort_keys(conn, limit, ordem, empate, esperado):
+    # Todas com o mesmo valor na coluna da ordenação: só o id desempata entre as páginas
+    conn.execute(f"UPDATE inscricoes SET {empate}")
+    assert load_all(conn, criterios={'ordem': ordem}, limit=limit) == esperado
+
+def test_priority_queue_pages_ties_by_id(conn):
+    conn.execute("UPDATE inscricoes SET status = 'Pendente', prioridade = 50")
+    assert load_all(conn, app_social.FILA_PRIORIDADE, limit=2) == [1, 2, 3]
@@ -0,0 +1,34 @@
+"""Pontuação de vulnerabilidade: calculada no INSERT e repontuada em segundo plano quando as regras mudam"""
+
+import app_social
+
+REGRAS_NOVAS = dict(app_social.PRIORIDADE_REGRAS, situacao_moradia={"Casa Cedida": 50})
+
+def prioridades(db):
+    with db.read() as conn:
+        return dict(conn.execute('SELECT id, prioridade FROM inscricoes'))
+
+def test_insert_scores_without_trigger(db):
+    with db.read() as conn:
+        triggers = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_prioridade_%'")]
+        esperadas = dict(conn.execute(f'SELECT id, {app_social.prioridade_expression()} FROM inscricoes'))
+    assert triggers == ['trg_prioridade_update']
+    assert prioridades(db) == esperadas
+    assert any(esperadas.values())
+
+def test_rules_change_is_rescored_by_job_not_at_open(db):
+    antes = prioridades(db)
+    with db.write() as conn:
+        assert not app_social.apply_prioridade_regras(conn)
+        # Regras novas: abrir o banco só recria o trigger, sem tocar nas pontuações gravadas
+        assert app_social.apply_prioridade_regras(conn, REGRAS_NOVAS)
+    assert prioridades(db) == antes
+
+    assert app_social.rescore_prioridade(db, REGRAS_NOVAS, batch_rows=1) == 3
+    with db.read() as conn:
+        esperadas = dict(conn.execute(f'SELECT id, {app_social.prioridade_expression(REGRAS_NOVAS)} FROM inscricoes'))
+    assert prioridades(db) == esperadas != antes
+    with db.write() as conn:
+        # Repontuação concluída: as regras novas ficam registradas como aplicadas
+        assert not app_social.apply_prioridade_regras(conn, REGRAS_NOVAS)
@@ -0,0 +1,9 @@
+"""Planos das consultas do app (EXPLAIN QUERY PLAN) sobre um banco recém-migrado"""
+
+import app_social
+
+def test_migrations_reach_latest_version(conn):
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == app_social.MIGRATIONS[-1][0]
+
+def test_app_queries_use_indexes(conn):
+    assert app_social.check_query_plans(conn) == []
@@ -0,0 +1,48 @@
+"""Exportação do relatório completo: páginas desenhadas à medida que o cursor é lido"""
+
+import app_social
+
+EXTRAS = 500
+
+def add_inscricoes(conn, count):
+    conn.executemany('''
+        INSERT INTO inscricoes (nome_completo, idade, genero, endereco, renda_familiar, membros_familia,
+                                despesas_mensais, escolaridade, situacao_moradia)
+        VALUES (?, 30, 'Feminino', 'Rua A, 1', 1000, 2, 500, 'Ensino Médio Completo', 'Casa Alugada')
+    ''', [(f'Pessoa {i}',) for i in range(count)])
+    conn.commit()
+
+def test_export_materializes_at_most_one_fetch_block(conn, tmp_path, monkeypatch):
+    add_inscricoes(conn, EXTRAS)
+    lidas = 0
+    desenhadas = 0
+    adiantadas = []
+    from_row = app_social.Inscricao.from_row
+    draw_table = app_social.draw_relatorio_table
+
+    def counting_from_row(cursor, row):
+        nonlocal lidas
+        lidas += 1
+        return from_row(cursor, row)
+
+    def counting_draw_table(canv, rows, x, top):
+        nonlocal desenhadas
+        desenhadas += len(rows)
+        # Inscrições já lidas do banco que ainda não estão numa página desenhada
+        adiantadas.append(lidas - desenhadas)
+        return draw_table(canv, rows, x, top)
+
+    monkeypatch.setattr(app_social.Inscricao, 'from_row', counting_from_row)
+    monkeypatch.setattr(app_social, 'draw_relatorio_table', counting_draw_table)
+    filenames = app_social.export_relatorio_streaming(conn, str(tmp_path / 'relatorio'), chunk_rows=50)
+
+    assert desenhadas == lidas == EXTRAS + 3
+    assert len(adiantadas) > 10
+    assert max(adiantadas) < 50
+    with open(filenames[0], 'rb') as pdf:
+        assert pdf.read(5) == b'%PDF-'
+
+def test_export_splits_volumes(conn, tmp_path):
+    add_inscricoes(conn, EXTRAS)
+    filenames = app_social.export_relatorio_streaming(conn, str(tmp_path / 'relatorio'), volume_rows=200)
+    assert [name[-11:] for name in filenames] == ['_vol001.pdf', '_vol002.pdf', '_vol003.pdf']
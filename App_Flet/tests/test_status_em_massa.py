@@ -0,0 +1,76 @@
+"""Mudança de status em massa: um único UPDATE numa transação, e erro de gravação sem exceção no handler"""
+
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+import app_social
+
+RECUSA_UPDATE = '''
+    CREATE TEMP TRIGGER recusa_status BEFORE UPDATE OF status ON main.inscricoes
+    BEGIN
+        SELECT RAISE(ABORT, 'gravação recusada');
+    END
+'''
+
+class AppFalsa:
+    """O mínimo do app de que apply_bulk_status precisa, com a seleção de todas as inscrições"""
+
+    def __init__(self, db):
+        self.db = db
+        self.repo = app_social.AsyncRepository(Future())
+        self.repo.database.set_result(db)
+        self.snackbars = []
+        self.finalizadas = []
+
+    def prepare_bulk_status(self):
+        return ('Aprovada',) + tuple(app_social.build_status_filter({1, 2, 3}))
+
+    def current_user_id(self):
+        return None
+
+    def show_snackbar(self, message, color):
+        self.snackbars.append((message, color))
+
+    def finish_bulk_status(self, new_status, updated):
+        self.finalizadas.append((new_status, updated))
+
+def status_e_historico(db):
+    with db.read() as conn:
+        status = [row[0] for row in conn.execute('SELECT status FROM inscricoes ORDER BY id')]
+        historico = conn.execute('SELECT COUNT(*) FROM historico_status').fetchone()[0]
+    return status, historico
+
+def test_bulk_transition_is_one_update_in_one_transaction(db, monkeypatch):
+    metrics = app_social.Metrics()
+    monkeypatch.setattr(app_social, 'METRICS', metrics)
+    statements = []
+    db.writer.set_trace_callback(statements.append)
+    try:
+        app = AppFalsa(db)
+        app_social.ProgramaSocialApp.apply_bulk_status(app, None)
+    finally:
+        db.writer.set_trace_callback(None)
+
+    assert app.finalizadas == [('Aprovada', 3)]
+    assert status_e_historico(db) == (['Aprovada'] * 3, 3)
+    # O trace repete a instrução a cada trigger disparado; as métricas contam só as execuções
+    executadas = {name: serie['contagem'] for name, serie in metrics.snapshot()['series'].items()
+                  if name.startswith(('sql: UPDATE inscricoes', 'sql: INSERT INTO historico_status'))}
+    assert sorted(executadas.values()) == [1, 1]
+    assert [s for s in statements if s in ('BEGIN IMMEDIATE', 'COMMIT', 'ROLLBACK')] == ['BEGIN IMMEDIATE', 'COMMIT']
+
+@pytest.mark.parametrize('variante', ['sync', 'async'])
+def test_bulk_write_error_shows_snackbar(db, variante):
+    db.writer.execute(RECUSA_UPDATE)
+    app = AppFalsa(db)
+    if variante == 'sync':
+        app_social.ProgramaSocialApp.apply_bulk_status(app, None)
+    else:
+        asyncio.run(app_social.AsyncProgramaSocialApp.apply_bulk_status(app, None))
+
+    assert app.finalizadas == []
+    assert app.snackbars == [("Erro ao atualizar status: gravação recusada", "red")]
+    # O histórico gravado antes do UPDATE recusado é desfeito junto
+    assert status_e_historico(db) == (['Pendente'] * 3, 0)